@@ -0,0 +1,337 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Reproducible benchmark harness for the HashMap
+#              implementations; see the module docstring, which is also
+#              the --help text.
+
+"""
+Reproducible benchmark harness for the HashMap implementations. Measures
+put / get / contains_key / remove throughput and per-operation latency
+percentiles, plus resize and iteration time, across maps, hash functions,
+key workloads and sizes. Results are written as JSON so two runs can be
+compared with --compare.
+
+The default run (size 1000) takes well under a minute. Larger sizes grow
+quadratically on the collision workload, where every hash_function_1 key
+lands in one bucket.
+
+usage examples:
+  python benchmark.py --output run.json
+  python benchmark.py --sizes 1000 10000 --output run.json
+  python benchmark.py --compare old.json new.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import string
+import sys
+import time
+from itertools import permutations, islice
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1, hash_function_2
+from hash_family import fnv1a_64, make_siphash, xxh64
+from hash_map_compact import CompactHashMap
+from hash_map_flat import FlatHashMap
+from hash_map_pooled import PooledHashMap
+
+
+# map name -> factory taking (capacity, hash function)
+MAPS = {
+    'sc': lambda capacity, function: hash_map_sc.HashMap(capacity, function),
+    'sc_pow2': lambda capacity, function: hash_map_sc.HashMap(
+        capacity, function, power_of_two=True),
+    'sc_pooled': PooledHashMap,
+    'oa': lambda capacity, function: hash_map_oa.HashMap(capacity, function),
+    'oa_robin_hood': lambda capacity, function: hash_map_oa.HashMap(
+        capacity, function, probing='robin_hood'),
+    'oa_pow2': lambda capacity, function: hash_map_oa.HashMap(
+        capacity, function, power_of_two=True),
+    'oa_flat': FlatHashMap,
+    'oa_compact': CompactHashMap,
+}
+
+# hash function name -> callable; other modules can add to this. Every one
+# gives the same hashes in every run; the builtin hash is left out because
+# string hashes change with PYTHONHASHSEED
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a_64': fnv1a_64,
+    'xxh64': xxh64,
+    # fixed secret so runs are reproducible
+    'siphash24': make_siphash(bytes(range(16))),
+}
+
+# latency percentiles reported for every operation
+PERCENTILES = (50, 90, 99, 99.9)
+
+# starting capacity, small so that put pays for every resize
+INITIAL_CAPACITY = 11
+
+
+# ------------------------- WORKLOADS ------------------------------------- #
+
+def _random_strings(rng: random.Random, count: int, length: int) -> list:
+    """Return count distinct random alphanumeric strings of given length."""
+    alphabet = string.ascii_letters + string.digits
+    keys = set()
+    while len(keys) < count:
+        keys.add(''.join(rng.choices(alphabet, k=length)))
+    return sorted(keys)
+
+
+def uniform_workload(rng: random.Random, size: int) -> tuple:
+    """Random 12 character keys; lookups uniform over inserted keys."""
+    keys = _random_strings(rng, size, 12)
+    rng.shuffle(keys)
+    return keys, rng.choices(keys, k=size)
+
+
+def zipfian_workload(rng: random.Random, size: int, skew: float = 1.1) -> tuple:
+    """Random keys; lookups follow a Zipf distribution over key rank."""
+    keys = _random_strings(rng, size, 12)
+    rng.shuffle(keys)
+    weights = [1 / (rank ** skew) for rank in range(1, size + 1)]
+    return keys, rng.choices(keys, weights=weights, k=size)
+
+
+def collision_workload(rng: random.Random, size: int) -> tuple:
+    """
+    Adversarial keys: distinct permutations of one string, so every key has
+    the same character sum and collides under hash_function_1
+    """
+    base = 'abcdefghijklmnop'
+    keys = [''.join(p) for p in islice(permutations(base), size)]
+    rng.shuffle(keys)
+    return keys, rng.choices(keys, k=size)
+
+
+def sequential_workload(rng: random.Random, size: int) -> tuple:
+    """Sequential integer keys as strings, inserted in order."""
+    keys = [str(i) for i in range(size)]
+    return keys, rng.choices(keys, k=size)
+
+
+def long_string_workload(rng: random.Random, size: int) -> tuple:
+    """Random 256 character keys; stresses the cost of hashing."""
+    keys = _random_strings(rng, size, 256)
+    rng.shuffle(keys)
+    return keys, rng.choices(keys, k=size)
+
+
+WORKLOADS = {
+    'uniform': uniform_workload,
+    'zipfian': zipfian_workload,
+    'collision': collision_workload,
+    'sequential': sequential_workload,
+    'long_string': long_string_workload,
+}
+
+
+# ------------------------- MEASUREMENT ----------------------------------- #
+
+def _percentile(sorted_samples: list, percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = round(percentile / 100 * (len(sorted_samples) - 1))
+    return sorted_samples[rank]
+
+
+def _summarize(samples: list) -> dict:
+    """Throughput and latency percentiles (ns) for per-op samples."""
+    total = sum(samples)
+    ordered = sorted(samples)
+    summary = {
+        'ops': len(samples),
+        'total_s': total / 1e9,
+        'ops_per_s': len(samples) / (total / 1e9) if total else 0.0,
+        'mean_ns': total / len(samples) if samples else 0.0,
+        'max_ns': ordered[-1] if ordered else 0,
+    }
+    for percentile in PERCENTILES:
+        summary[f'p{percentile:g}_ns'] = _percentile(ordered, percentile)
+    return summary
+
+
+def _time_each(operation, arguments: list) -> list:
+    """Call operation once per argument tuple; return per-call ns."""
+    clock = time.perf_counter_ns
+    samples = []
+    for args in arguments:
+        start = clock()
+        operation(*args)
+        samples.append(clock() - start)
+    return samples
+
+
+def _time_once(operation) -> int:
+    """Return ns taken by one call of operation()."""
+    start = time.perf_counter_ns()
+    operation()
+    return time.perf_counter_ns() - start
+
+
+def run_case(factory, function, keys: list, lookups: list,
+             missing: list) -> dict:
+    """
+    Benchmark one (map, hash function, workload, size) combination on a
+    fresh map and return a dict of per-operation summaries
+    """
+    m = factory(INITIAL_CAPACITY, function)
+    results = {}
+
+    results['put'] = _summarize(
+        _time_each(m.put, [(key, i) for i, key in enumerate(keys)]))
+    results['get'] = _summarize(_time_each(m.get, [(key,) for key in lookups]))
+
+    # half present, half absent keys
+    probes = [(key,) for pair in zip(lookups, missing) for key in pair]
+    results['contains_key'] = _summarize(_time_each(m.contains_key, probes))
+
+    results['iterate'] = _summarize([_time_once(m.get_keys_and_values)])
+    results['resize'] = _summarize(
+        [_time_once(lambda: m.resize_table(m.get_capacity() * 2))])
+
+    results['remove'] = _summarize(_time_each(m.remove, [(key,) for key in keys]))
+
+    results['final_capacity'] = m.get_capacity()
+    return results
+
+
+def run(maps: list, functions: list, workloads: list, sizes: list,
+        seed: int, repeat: int, collect_garbage: bool) -> dict:
+    """
+    Run every requested combination and return the full JSON-ready report
+    """
+    report = {
+        'meta': {
+            'python': sys.version,
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeat': repeat,
+            'gc_enabled': collect_garbage,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': [],
+    }
+
+    for workload in workloads:
+        for size in sizes:
+            # every map and hash function sees exactly the same keys
+            rng = random.Random(f'{seed}-{workload}-{size}')
+            keys, lookups = WORKLOADS[workload](rng, size)
+            missing = [key + '#' for key in lookups]
+
+            for map_name in maps:
+                for function_name in functions:
+                    for run_index in range(repeat):
+                        gc.collect()
+                        if not collect_garbage:
+                            gc.disable()
+                        try:
+                            results = run_case(MAPS[map_name],
+                                               HASH_FUNCTIONS[function_name],
+                                               keys, lookups, missing)
+                        finally:
+                            gc.enable()
+
+                        report['results'].append({
+                            'map': map_name,
+                            'hash_function': function_name,
+                            'workload': workload,
+                            'size': size,
+                            'run': run_index,
+                            'operations': results,
+                        })
+                        print(f'{map_name:14} {function_name:16} {workload:12} '
+                              f'{size:>8} put {results["put"]["ops_per_s"]:>12,.0f}/s '
+                              f'get {results["get"]["ops_per_s"]:>12,.0f}/s',
+                              file=sys.stderr)
+    return report
+
+
+# ------------------------- COMPARISON ------------------------------------ #
+
+def _best_by_case(report: dict) -> dict:
+    """Map (map, fn, workload, size, op) -> best ops_per_s across runs."""
+    best = {}
+    for result in report['results']:
+        case = (result['map'], result['hash_function'],
+                result['workload'], result['size'])
+        for operation, summary in result['operations'].items():
+            if not isinstance(summary, dict):
+                continue
+            key = case + (operation,)
+            best[key] = max(best.get(key, 0.0), summary['ops_per_s'])
+    return best
+
+
+def compare(old_report: dict, new_report: dict, threshold: float) -> int:
+    """
+    Print throughput ratios new/old for every case present in both reports.
+    Returns the number of regressions worse than threshold
+    """
+    old, new = _best_by_case(old_report), _best_by_case(new_report)
+    regressions = 0
+    for key in sorted(old.keys() & new.keys(), key=str):
+        if not old[key]:
+            continue
+        ratio = new[key] / old[key]
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f'{" ".join(map(str, key)):70} {ratio:6.2f}x{flag}')
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--maps', nargs='+', default=list(MAPS),
+                        choices=list(MAPS))
+    parser.add_argument('--hash-functions', nargs='+',
+                        default=['hash_function_1', 'hash_function_2'],
+                        choices=list(HASH_FUNCTIONS))
+    parser.add_argument('--workloads', nargs='+', default=list(WORKLOADS),
+                        choices=list(WORKLOADS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000],
+                        help='keys per case (default: 1000)')
+    parser.add_argument('--seed', type=int, default=261)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-gc', action='store_true',
+                        help='disable the garbage collector while timing')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two JSON reports instead of running')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='throughput drop that counts as a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old_file, open(args.compare[1]) as new_file:
+            regressions = compare(json.load(old_file), json.load(new_file),
+                                  args.threshold)
+        return 1 if regressions else 0
+
+    report = run(args.maps, args.hash_functions, args.workloads, args.sizes,
+                 args.seed, args.repeat, not args.no_gc)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,421 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Higher quality string hash functions for the HashMap
+#              constructors, each in a pure Python form and a vectorized
+#              NumPy form registered with hash_functions.register_bulk.
+#              Keys are hashed as their UTF-8 bytes.
+#
+#              function    speed (pure Python)   quality
+#              ----------  --------------------  ---------------------------
+#              fnv1a_64    one step per byte;     good spread, cheap for the
+#                          fastest on short keys  short keys maps usually see
+#              xxh64       8 bytes per step;      excellent avalanche, best
+#                          fastest on long keys   general choice
+#              siphash24   slowest, several       keyed: with a secret seed
+#                          times xxh64 per key    keys can't be picked to
+#                                                 collide (hash flooding)
+#
+#              make_siphash() returns a siphash24 seeded with a random or
+#              given secret; its bulk form is found through hash_many too.
+
+import os
+from functools import partial
+
+from hash_functions import register_bulk
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; bulk hashing falls back to Python
+    np = None
+
+
+_MASK_64 = (1 << 64) - 1
+
+# FNV-1a 64 bit parameters
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+
+# XXH64 primes
+_P1 = 0x9E3779B185EBCA87
+_P2 = 0xC2B2AE3D27D4EB4F
+_P3 = 0x165667B19E3779F9
+_P4 = 0x85EBCA77C2B2AE63
+_P5 = 0x27D4EB2F165667C5
+
+
+def _key_bytes(key) -> bytes:
+    """
+    Returns the bytes a key is hashed as: UTF-8 for str, unchanged for bytes
+    """
+    if isinstance(key, bytes):
+        return key
+    return key.encode('utf-8', 'surrogatepass')
+
+
+def _rotl(value: int, bits: int) -> int:
+    """
+    Rotates a 64 bit value left by bits
+    """
+    return ((value << bits) | (value >> (64 - bits))) & _MASK_64
+
+
+# ------------------------- SCALAR FORMS ---------------------------------- #
+
+def fnv1a_64(key: str) -> int:
+    """
+    64 bit FNV-1a: xor in each byte, then multiply by the FNV prime.
+    Simple and well spread for short keys, but one Python step per byte
+    makes it slow on long keys, and it is not seeded
+    """
+    hash_value = _FNV_OFFSET
+    for byte in _key_bytes(key):
+        hash_value = ((hash_value ^ byte) * _FNV_PRIME) & _MASK_64
+    return hash_value
+
+
+def _xxh64_round(accumulator: int, lane: int) -> int:
+    """
+    One XXH64 accumulator round
+    """
+    accumulator = (accumulator + lane * _P2) & _MASK_64
+    return (_rotl(accumulator, 31) * _P1) & _MASK_64
+
+
+def xxh64(key: str, seed: int = 0) -> int:
+    """
+    XXH64, returning the same values as the reference xxHash. Consumes 8
+    bytes per step, so it is the fastest of these on long keys, with full
+    avalanche. The seed varies the output but is not secret-safe
+    """
+    data = _key_bytes(key)
+    length = len(data)
+    position = 0
+
+    if length >= 32:
+        v1 = (seed + _P1 + _P2) & _MASK_64
+        v2 = (seed + _P2) & _MASK_64
+        v3 = seed & _MASK_64
+        v4 = (seed - _P1) & _MASK_64
+        while position <= length - 32:
+            v1 = _xxh64_round(v1, int.from_bytes(data[position:position + 8], 'little'))
+            v2 = _xxh64_round(v2, int.from_bytes(data[position + 8:position + 16], 'little'))
+            v3 = _xxh64_round(v3, int.from_bytes(data[position + 16:position + 24], 'little'))
+            v4 = _xxh64_round(v4, int.from_bytes(data[position + 24:position + 32], 'little'))
+            position += 32
+
+        hash_value = (_rotl(v1, 1) + _rotl(v2, 7)
+                      + _rotl(v3, 12) + _rotl(v4, 18)) & _MASK_64
+        for accumulator in (v1, v2, v3, v4):
+            hash_value ^= _xxh64_round(0, accumulator)
+            hash_value = (hash_value * _P1 + _P4) & _MASK_64
+    else:
+        hash_value = (seed + _P5) & _MASK_64
+
+    hash_value = (hash_value + length) & _MASK_64
+
+    while position + 8 <= length:
+        lane = int.from_bytes(data[position:position + 8], 'little')
+        hash_value ^= _xxh64_round(0, lane)
+        hash_value = (_rotl(hash_value, 27) * _P1 + _P4) & _MASK_64
+        position += 8
+
+    if position + 4 <= length:
+        lane = int.from_bytes(data[position:position + 4], 'little')
+        hash_value ^= (lane * _P1) & _MASK_64
+        hash_value = (_rotl(hash_value, 23) * _P2 + _P3) & _MASK_64
+        position += 4
+
+    while position < length:
+        hash_value ^= (data[position] * _P5) & _MASK_64
+        hash_value = (_rotl(hash_value, 11) * _P1) & _MASK_64
+        position += 1
+
+    # final avalanche
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * _P2) & _MASK_64
+    hash_value ^= hash_value >> 29
+    hash_value = (hash_value * _P3) & _MASK_64
+    hash_value ^= hash_value >> 32
+    return hash_value
+
+
+def _sip_rounds(v0: int, v1: int, v2: int, v3: int, rounds: int) -> tuple:
+    """
+    Applies SipRound to the state rounds times
+    """
+    for _ in range(rounds):
+        v0 = (v0 + v1) & _MASK_64
+        v1 = _rotl(v1, 13) ^ v0
+        v0 = _rotl(v0, 32)
+        v2 = (v2 + v3) & _MASK_64
+        v3 = _rotl(v3, 16) ^ v2
+        v0 = (v0 + v3) & _MASK_64
+        v3 = _rotl(v3, 21) ^ v0
+        v2 = (v2 + v1) & _MASK_64
+        v1 = _rotl(v1, 17) ^ v2
+        v2 = _rotl(v2, 32)
+    return v0, v1, v2, v3
+
+
+def siphash24(key: str, k0: int = 0, k1: int = 0) -> int:
+    """
+    SipHash-2-4 keyed by the two 64 bit halves k0, k1 of a 128 bit secret
+    (the same function CPython uses for str). Slowest of these, but when
+    the secret is unknown an attacker can't choose keys that collide, so
+    chains and probe sequences stay short under hostile input. Use
+    make_siphash for a seeded instance
+    """
+    data = _key_bytes(key)
+    length = len(data)
+
+    v0 = k0 ^ 0x736f6d6570736575
+    v1 = k1 ^ 0x646f72616e646f6d
+    v2 = k0 ^ 0x6c7967656e657261
+    v3 = k1 ^ 0x7465646279746573
+
+    end = length - length % 8
+    for position in range(0, end, 8):
+        word = int.from_bytes(data[position:position + 8], 'little')
+        v3 ^= word
+        v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 2)
+        v0 ^= word
+
+    # last word holds the remaining bytes and the length's low byte
+    word = int.from_bytes(data[end:], 'little') | ((length & 0xff) << 56)
+    v3 ^= word
+    v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 2)
+    v0 ^= word
+
+    v2 ^= 0xff
+    v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 4)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def make_siphash(secret: bytes = None):
+    """
+    Returns siphash24 seeded with a 16 byte secret, random if not given.
+    The result plugs into the function parameter of either HashMap
+    """
+    if secret is None:
+        secret = os.urandom(16)
+    if len(secret) != 16:
+        raise ValueError("secret must be 16 bytes")
+    return partial(siphash24, k0=int.from_bytes(secret[:8], 'little'),
+                   k1=int.from_bytes(secret[8:], 'little'))
+
+
+# ------------------------- VECTORIZED FORMS ------------------------------ #
+
+def _length_groups(keys: list):
+    """
+    Groups keys by encoded byte length. Yields (indexes, matrix) where
+    matrix row i is the bytes of keys[indexes[i]], so every row of one
+    group goes through the same steps
+    """
+    encoded = [_key_bytes(key) for key in keys]
+    groups = {}
+    for index, data in enumerate(encoded):
+        groups.setdefault(len(data), []).append(index)
+
+    for length, indexes in groups.items():
+        buffer = b''.join([encoded[index] for index in indexes])
+        matrix = np.frombuffer(buffer, dtype=np.uint8).reshape(len(indexes), length)
+        yield np.array(indexes), matrix
+
+
+def _lanes(matrix, start: int, stop: int, dtype):
+    """
+    Returns columns start:stop of a byte matrix read as little endian
+    unsigned integers of dtype, widened to uint64
+    """
+    columns = np.ascontiguousarray(matrix[:, start:stop])
+    return columns.view(dtype).astype(np.uint64)
+
+
+def _vector_rotl(values, bits: int):
+    """
+    Rotates every uint64 in values left by bits
+    """
+    return (values << np.uint64(bits)) | (values >> np.uint64(64 - bits))
+
+
+def _bulk(scalar_function, group_function):
+    """
+    Builds a bulk hash function that runs group_function on each group of
+    equal length keys, falling back to scalar_function without NumPy or
+    for keys that are neither str nor bytes
+    """
+    def bulk_function(keys, **keywords) -> list:
+        keys = list(keys)
+        if np is None or not all(isinstance(key, (str, bytes)) for key in keys):
+            return [scalar_function(key, **keywords) for key in keys]
+
+        hashes = np.zeros(len(keys), dtype=np.uint64)
+        for indexes, matrix in _length_groups(keys):
+            hashes[indexes] = group_function(matrix, **keywords)
+        return hashes.tolist()
+
+    return bulk_function
+
+
+def _fnv1a_64_group(matrix):
+    """
+    fnv1a_64 of every row of a byte matrix
+    """
+    hashes = np.full(matrix.shape[0], _FNV_OFFSET, dtype=np.uint64)
+    prime = np.uint64(_FNV_PRIME)
+    for column in range(matrix.shape[1]):
+        hashes ^= matrix[:, column].astype(np.uint64)
+        hashes *= prime
+    return hashes
+
+
+def _xxh64_group_round(accumulators, lanes):
+    """
+    One XXH64 accumulator round over arrays
+    """
+    accumulators = accumulators + lanes * np.uint64(_P2)
+    return _vector_rotl(accumulators, 31) * np.uint64(_P1)
+
+
+def _xxh64_group(matrix, seed: int = 0):
+    """
+    xxh64 of every row of a byte matrix
+    """
+    count, length = matrix.shape
+    position = 0
+    p1, p2, p3, p4, p5 = (np.uint64(prime) for prime in (_P1, _P2, _P3, _P4, _P5))
+
+    def full(value):
+        return np.full(count, value & _MASK_64, dtype=np.uint64)
+
+    if length >= 32:
+        stripes = length // 32
+        lanes = _lanes(matrix, 0, stripes * 32, '<u8')
+        accumulators = [full(seed + _P1 + _P2), full(seed + _P2),
+                        full(seed), full(seed - _P1)]
+        for stripe in range(stripes):
+            for lane in range(4):
+                accumulators[lane] = _xxh64_group_round(
+                    accumulators[lane], lanes[:, stripe * 4 + lane])
+        position = stripes * 32
+
+        v1, v2, v3, v4 = accumulators
+        hashes = (_vector_rotl(v1, 1) + _vector_rotl(v2, 7)
+                  + _vector_rotl(v3, 12) + _vector_rotl(v4, 18))
+        for accumulator in accumulators:
+            hashes ^= _xxh64_group_round(full(0), accumulator)
+            hashes = hashes * p1 + p4
+    else:
+        hashes = full(seed + _P5)
+
+    hashes += np.uint64(length)
+
+    if position + 8 <= length:
+        words = (length - position) // 8
+        lanes = _lanes(matrix, position, position + words * 8, '<u8')
+        for word in range(words):
+            hashes ^= _xxh64_group_round(full(0), lanes[:, word])
+            hashes = _vector_rotl(hashes, 27) * p1 + p4
+        position += words * 8
+
+    if position + 4 <= length:
+        lane = _lanes(matrix, position, position + 4, '<u4')[:, 0]
+        hashes ^= lane * p1
+        hashes = _vector_rotl(hashes, 23) * p2 + p3
+        position += 4
+
+    for column in range(position, length):
+        hashes ^= matrix[:, column].astype(np.uint64) * p5
+        hashes = _vector_rotl(hashes, 11) * p1
+
+    hashes ^= hashes >> np.uint64(33)
+    hashes *= p2
+    hashes ^= hashes >> np.uint64(29)
+    hashes *= p3
+    hashes ^= hashes >> np.uint64(32)
+    return hashes
+
+
+def _sip_group_rounds(v0, v1, v2, v3, rounds: int) -> tuple:
+    """
+    Applies SipRound to arrays of states rounds times
+    """
+    for _ in range(rounds):
+        v0 = v0 + v1
+        v1 = _vector_rotl(v1, 13) ^ v0
+        v0 = _vector_rotl(v0, 32)
+        v2 = v2 + v3
+        v3 = _vector_rotl(v3, 16) ^ v2
+        v0 = v0 + v3
+        v3 = _vector_rotl(v3, 21) ^ v0
+        v2 = v2 + v1
+        v1 = _vector_rotl(v1, 17) ^ v2
+        v2 = _vector_rotl(v2, 32)
+    return v0, v1, v2, v3
+
+
+def _siphash24_group(matrix, k0: int = 0, k1: int = 0):
+    """
+    siphash24 of every row of a byte matrix
+    """
+    count, length = matrix.shape
+
+    def full(value):
+        return np.full(count, value, dtype=np.uint64)
+
+    v0 = full(k0 ^ 0x736f6d6570736575)
+    v1 = full(k1 ^ 0x646f72616e646f6d)
+    v2 = full(k0 ^ 0x6c7967656e657261)
+    v3 = full(k1 ^ 0x7465646279746573)
+
+    words = length // 8
+    lanes = _lanes(matrix, 0, words * 8, '<u8')
+    for index in range(words):
+        word = lanes[:, index]
+        v3 ^= word
+        v0, v1, v2, v3 = _sip_group_rounds(v0, v1, v2, v3, 2)
+        v0 ^= word
+
+    # remaining bytes zero padded to a word, with the length's low byte
+    tail = np.zeros((count, 8), dtype=np.uint8)
+    tail[:, :length - words * 8] = matrix[:, words * 8:]
+    tail[:, 7] = length & 0xff
+    word = tail.view('<u8')[:, 0].astype(np.uint64)
+    v3 ^= word
+    v0, v1, v2, v3 = _sip_group_rounds(v0, v1, v2, v3, 2)
+    v0 ^= word
+
+    v2 ^= np.uint64(0xff)
+    v0, v1, v2, v3 = _sip_group_rounds(v0, v1, v2, v3, 4)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+fnv1a_64_many = _bulk(fnv1a_64, _fnv1a_64_group)
+xxh64_many = _bulk(xxh64, _xxh64_group)
+siphash24_many = _bulk(siphash24, _siphash24_group)
+
+register_bulk(fnv1a_64, fnv1a_64_many)
+register_bulk(xxh64, xxh64_many)
+register_bulk(siphash24, siphash24_many)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    from hash_functions import hash_many
+
+    print("\nreference values example 1")
+    print("--------------------------")
+    print(hex(fnv1a_64('')), hex(fnv1a_64('a')))
+    print(hex(xxh64('')), hex(xxh64('abc')))
+    print(hex(siphash24(bytes(range(15)),
+                        0x0706050403020100, 0x0f0e0d0c0b0a0908)))
+
+    print("\nhash_many example 1")
+    print("-------------------")
+    keys = ['', 'a', 'key1', 'a longer key', 'ünïcödé', 'str' * 50]
+    seeded = make_siphash(bytes(16))
+    for function in (fnv1a_64, xxh64, siphash24, seeded):
+        bulk = hash_many(function, keys)
+        print(bulk == [function(key) for key in keys])
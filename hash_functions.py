@@ -0,0 +1,184 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Bulk (batched) hashing of key sequences. The sample hash
+#              functions from a6_include have vectorized NumPy versions
+#              that encode a batch of keys into one code point buffer and
+#              reduce it with prefix sums, returning exactly the same
+#              integers; any other hash function is called once per key.
+
+from bisect import bisect_right
+from functools import partial
+from itertools import accumulate
+
+from a6_include import hash_function_1, hash_function_2
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; bulk hashing falls back to Python
+    np = None
+
+
+# most characters encoded into one NumPy buffer at a time
+_CHUNK_CHARS = 1 << 20
+
+# longest run hash_function_2 can sum in int64 without overflow, since the
+# running sum of position * code point is bounded by 0x10FFFF * n * n / 2
+_MAX_WEIGHTED_CHARS = 4_000_000
+
+
+def _all_strings(keys: list) -> bool:
+    """Return True if every key is a str (anything else uses the scalar path)."""
+    return all(type(key) is str for key in keys)
+
+
+def _chunks(offsets: list):
+    """
+    Split keys into runs of at most _CHUNK_CHARS characters, given the
+    running character offsets of the keys. A single key longer than that
+    becomes a run of its own. Yields (start, stop) key index pairs.
+    """
+    count = len(offsets) - 1
+    start = 0
+    while start < count:
+        stop = bisect_right(offsets, offsets[start] + _CHUNK_CHARS) - 1
+        stop = min(max(stop, start + 1), count)
+        yield start, stop
+        start = stop
+
+
+def _encode(keys: list, offsets: list, start: int, stop: int):
+    """
+    Concatenate keys[start:stop] into one int64 array of code points.
+    Returns (codes, begin, end) where begin/end hold each key's bounds.
+    """
+    data = ''.join(keys[start:stop]).encode('utf-32-le', 'surrogatepass')
+    codes = np.frombuffer(data, dtype=np.uint32).astype(np.int64)
+    bounds = np.array(offsets[start:stop + 1], dtype=np.int64) - offsets[start]
+    return codes, bounds[:-1], bounds[1:]
+
+
+def _prefix_sums(values):
+    """Return running sums of values with a leading 0."""
+    sums = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(values, out=sums[1:])
+    return sums
+
+
+def hash_function_1_many(keys) -> list:
+    """
+    Vectorized hash_function_1: returns [hash_function_1(k) for k in keys]
+    """
+    keys = list(keys)
+    if np is None or not _all_strings(keys):
+        return [hash_function_1(key) for key in keys]
+
+    offsets = list(accumulate(map(len, keys), initial=0))
+    hashes = []
+    for start, stop in _chunks(offsets):
+        codes, begin, end = _encode(keys, offsets, start, stop)
+        sums = _prefix_sums(codes)
+        hashes.extend((sums[end] - sums[begin]).tolist())
+    return hashes
+
+
+def hash_function_2_many(keys) -> list:
+    """
+    Vectorized hash_function_2: returns [hash_function_2(k) for k in keys]
+    """
+    keys = list(keys)
+    if np is None or not _all_strings(keys):
+        return [hash_function_2(key) for key in keys]
+
+    offsets = list(accumulate(map(len, keys), initial=0))
+    hashes = []
+    for start, stop in _chunks(offsets):
+        if offsets[stop] - offsets[start] > _MAX_WEIGHTED_CHARS:
+            # too long to sum exactly in int64; Python ints don't overflow
+            hashes.extend(hash_function_2(key) for key in keys[start:stop])
+            continue
+
+        # sum((g - b + 1) * c) over a key's global positions g starting at
+        # b equals sum(g * c) - (b - 1) * sum(c), both from prefix sums
+        codes, begin, end = _encode(keys, offsets, start, stop)
+        sums = _prefix_sums(codes)
+        weighted = _prefix_sums(codes * np.arange(len(codes), dtype=np.int64))
+        result = ((weighted[end] - weighted[begin])
+                  - (begin - 1) * (sums[end] - sums[begin]))
+        hashes.extend(result.tolist())
+    return hashes
+
+
+# scalar hash function -> bulk version returning identical integers
+_BULK_FUNCTIONS = {
+    hash_function_1: hash_function_1_many,
+    hash_function_2: hash_function_2_many,
+}
+
+
+def register_bulk(function, bulk_function) -> None:
+    """
+    Register bulk_function as the batched form of function. bulk_function
+    takes an iterable of keys and returns a list of the same integers
+    function would return for each key. If function takes keyword
+    arguments, bulk_function must accept them as well.
+    """
+    _BULK_FUNCTIONS[function] = bulk_function
+
+
+def hash_many(function, keys) -> list:
+    """
+    Hash every key in keys with function and return the hashes in input
+    order, using the registered bulk version of function when there is one.
+    A functools.partial binding only keyword arguments (such as a seed) of
+    a registered function uses that function's bulk version with the same
+    keywords
+    """
+    bulk_function = _BULK_FUNCTIONS.get(function)
+    if bulk_function is not None:
+        return bulk_function(keys)
+
+    if isinstance(function, partial) and not function.args:
+        bulk_function = _BULK_FUNCTIONS.get(function.func)
+        if bulk_function is not None:
+            return bulk_function(keys, **function.keywords)
+
+    return [function(key) for key in keys]
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+def mix64(hash_value: int) -> int:
+    """
+    Multiply-xorshift finalizer (MurmurHash3 fmix64) that spreads every
+    input bit over all 64 output bits. Power of two tables index with the
+    low bits only, so weak hashes like hash_function_1 are mixed first
+    """
+    hash_value &= _MASK_64
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * 0xff51afd7ed558ccd) & _MASK_64
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * 0xc4ceb9fe1a85ec53) & _MASK_64
+    hash_value ^= hash_value >> 33
+    return hash_value
+
+
+def mixed_hash(function, key) -> int:
+    """
+    Returns mix64(function(key)); bind function with functools.partial to
+    get a mixed version of a hash function
+    """
+    return mix64(function(key))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nhash_many example 1")
+    print("-------------------")
+    keys = ['', 'a', 'key1', 'a longer key', 'ünïcödé', 'str' * 50]
+    for function in (hash_function_1, hash_function_2):
+        bulk = hash_many(function, keys)
+        print(function.__name__, bulk == [function(key) for key in keys])
+    print('numpy available:', np is not None)
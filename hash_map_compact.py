@@ -0,0 +1,434 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Open addressing hash map with a compact, insertion ordered
+#              layout. The probed table only holds small integer indexes
+#              into dense entry arrays (hashes, keys, values) that are
+#              appended to in insertion order, so iteration and export touch
+#              live entries only, in the order they were added.
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry, hash_function_1,
+                        hash_function_2, is_prime, next_prime, to_list)
+from hash_functions import hash_many
+
+
+# hashes are stored as unsigned 64 bit values
+_MASK_64 = (1 << 64) - 1
+
+# index table codes; entry indexes are >= 0
+_EMPTY = -1
+_DUMMY = -2
+
+# key of a dense entry whose key was removed
+_DELETED = object()
+
+
+def _index_typecode(capacity: int) -> str:
+    """
+    Returns the smallest signed array typecode that holds every entry
+    index of a table with the given capacity
+    """
+    for typecode in ('b', 'h', 'i', 'q'):
+        if capacity < 1 << (array(typecode).itemsize * 8 - 1):
+            return typecode
+    return 'q'
+
+
+class CompactHashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision
+        resolution over a sparse index table, with entries kept in dense
+        arrays in insertion order
+        """
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._indices = self._new_indices(self._capacity)
+        self._dummies = 0
+
+        self._hash_function = function
+        self._size = 0
+        self._allocate_entries()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            entry = self._indices[i]
+            if entry == _EMPTY:
+                slot = None
+            elif entry == _DUMMY:
+                slot = 'K: None V: None TS: True'
+            else:
+                slot = f"K: {self._keys[entry]} V: {self._values[entry]} TS: False"
+            out += str(i) + ': ' + str(slot) + '\n'
+        return out
+
+    @staticmethod
+    def _new_indices(capacity: int) -> array:
+        """
+        Returns an index table of the given capacity with every slot empty
+        """
+        return array(_index_typecode(capacity), [_EMPTY]) * capacity
+
+    def _allocate_entries(self) -> None:
+        """
+        Create fresh, empty dense entry arrays
+        """
+        self._hashes = array('Q')
+        self._keys = []
+        self._values = []
+
+        # removed entries stay in place until the next resize or compact
+        self._deleted = 0
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _hash(self, key: str) -> int:
+        """
+        Returns the stored (64 bit) hash of key
+        """
+        return self._hash_function(key) & _MASK_64
+
+    def _find(self, key: str, hash_value: int) -> int:
+        """
+        Returns index table slot pointing at key's entry, or -1 if key is
+        not in the map
+        """
+        indices, hashes, keys = self._indices, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash_value % capacity
+        probe_count = 0
+
+        # an empty slot ends the probe sequence
+        while True:
+            entry = indices[index]
+            if entry == _EMPTY:
+                return -1
+
+            # compare cached hash first so most mismatches skip key ==
+            if entry >= 0 and hashes[entry] == hash_value and keys[entry] == key:
+                return index
+
+            probe_count += 1
+            if probe_count == capacity:
+                return -1
+
+            # quadratic probing
+            index = (hash_value + probe_count * probe_count) % capacity
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pair in hash map. If given key already exists, its
+        value is replaced with the new value. Otherwise the key/value is added
+        """
+        # double capacity if load is greater than or equal to .5
+        if self._size / self._capacity >= 0.5:
+            self.resize_table(self._capacity * 2)
+
+        # removed entries still hold index slots; drop them once they would
+        # push the table past .5
+        elif len(self._keys) / self._capacity >= 0.5:
+            self.compact()
+
+        self._put(key, value, self._hash(key))
+
+    def _put(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Performs put using an already computed hash value for key, without
+        checking the load factor
+        """
+        indices, hashes, keys = self._indices, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash_value % capacity
+
+        # first dummy seen is reused if the key turns out to be absent
+        target = -1
+
+        for probe_count in range(1, capacity + 1):
+            entry = indices[index]
+
+            if entry == _EMPTY:
+                if target == -1:
+                    target = index
+                break
+
+            if entry == _DUMMY:
+                if target == -1:
+                    target = index
+
+            # key already present, replace value in place
+            elif hashes[entry] == hash_value and keys[entry] == key:
+                self._values[entry] = value
+                return
+
+            index = (hash_value + probe_count * probe_count) % capacity
+
+        if target == -1:
+            return
+
+        if indices[target] == _DUMMY:
+            self._dummies -= 1
+        indices[target] = len(keys)
+        hashes.append(hash_value)
+        keys.append(key)
+        self._values.append(value)
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Returns current hash table load factor
+        """
+        return self._size / self._capacity
+
+    def effective_load(self) -> float:
+        """
+        Returns load factor counting tombstones as occupied
+        """
+        return (self._size + self._dummies) / self._capacity
+
+    def get_tombstone_count(self) -> int:
+        """
+        Returns number of tombstones in the hash table
+        """
+        return self._dummies
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in the hash table; tombstones are
+        not empty
+        """
+        return self._capacity - self._size - self._dummies
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at its current capacity, dropping all tombstones
+        and removed entries
+        """
+        self.resize_table(self._capacity)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        changes capacity of internal hash table while keeping existing
+        key/value pairs in insertion order. Only the index table is rebuilt,
+        from the stored hashes; removed entries are squeezed out first
+        """
+        # ends method if new capacity is less than or equal to 1 or
+        # new_capacity is less than size
+        if new_capacity <= 1 or new_capacity < self._size:
+            return
+
+        # check if prime, if not prime set next prime
+        if not is_prime(new_capacity):
+            new_capacity = next_prime(new_capacity)
+
+        # keep the load at or below .5 so every probe finds an empty slot
+        while self._size * 2 > new_capacity:
+            new_capacity = next_prime(new_capacity * 2)
+
+        if self._deleted:
+            self._compact_entries()
+
+        indices = self._new_indices(new_capacity)
+        hashes = self._hashes
+
+        # each entry takes the first empty slot of its new probe sequence;
+        # no key comparisons are needed since keys are unique
+        for entry in range(len(hashes)):
+            hash_value = hashes[entry]
+            index = hash_value % new_capacity
+            probe_count = 0
+            while indices[index] != _EMPTY:
+                probe_count += 1
+                index = (hash_value + probe_count * probe_count) % new_capacity
+            indices[index] = entry
+
+        self._indices = indices
+        self._dummies = 0
+        self._capacity = new_capacity
+
+    def _compact_entries(self) -> None:
+        """
+        Moves live entries to the front of the dense arrays, keeping their
+        order. The index table is left stale for resize_table to rebuild
+        """
+        live = [entry for entry, key in enumerate(self._keys)
+                if key is not _DELETED]
+
+        hashes = array('Q', (self._hashes[entry] for entry in live))
+        keys = [self._keys[entry] for entry in live]
+        values = [self._values[entry] for entry in live]
+
+        self._allocate_entries()
+        self._hashes, self._keys, self._values = hashes, keys, values
+
+    def get(self, key: str) -> object:
+        """
+        Gets value of associated key. Returns None if value not found
+        """
+        index = self._find(key, self._hash(key))
+        if index == -1:
+            return None
+        return self._values[self._indices[index]]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it
+        returns False
+        """
+        return self._find(key, self._hash(key)) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes given key and associated value. Method does nothing if value
+        not found.
+        """
+        self._remove(key, self._hash(key))
+
+    def _remove(self, key: str, hash_value: int) -> None:
+        """
+        Performs remove using an already computed hash value for key
+        """
+        index = self._find(key, hash_value)
+        if index == -1:
+            return
+
+        # index slot becomes a tombstone; the entry keeps its place in the
+        # dense arrays but drops its references so they can be collected
+        entry = self._indices[index]
+        self._indices[index] = _DUMMY
+        self._dummies += 1
+        self._keys[entry] = _DELETED
+        self._values[entry] = None
+        self._deleted += 1
+        self._size -= 1
+
+    def clear(self) -> None:
+        """
+        Clears contents of hash map while retaining underlying hash table
+        capacity
+        """
+        self._indices = self._new_indices(self._capacity)
+        self._dummies = 0
+        self._size = 0
+        self._allocate_entries()
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every (key, value) pair in pairs, as put would. All keys are
+        hashed in one batch and the table is resized at most once up front
+        """
+        pairs = to_list(pairs)
+        hashes = hash_many(self._hash_function, [pair[0] for pair in pairs])
+
+        # size for the worst case where every pair is a new key; removed
+        # entries are dropped by the resize, so they don't count
+        if (len(self._keys) + len(pairs)) * 2 >= self._capacity:
+            new_capacity = self._capacity
+            while (self._size + len(pairs)) * 2 >= new_capacity:
+                new_capacity *= 2
+            self.resize_table(new_capacity)
+
+        for (key, value), hash_value in zip(pairs, hashes):
+            self._put(key, value, hash_value & _MASK_64)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns dynamic array with the value of each key in keys, in input
+        order. Missing keys give None
+        """
+        keys = to_list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, hash_many(self._hash_function, keys)):
+            index = self._find(key, hash_value & _MASK_64)
+            values.append(None if index == -1
+                          else self._values[self._indices[index]])
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys. Keys not in the map are ignored
+        """
+        keys = to_list(keys)
+        for key, hash_value in zip(keys, hash_many(self._hash_function, keys)):
+            self._remove(key, hash_value & _MASK_64)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        returns dynamic array where each index contains a tuple of a
+        key/value pair, in insertion order
+        """
+        result = DynamicArray()
+        for key, value in zip(self._keys, self._values):
+            if key is not _DELETED:
+                result.append((key, value))
+        return result
+
+    def __iter__(self):
+        """
+        Enables hash map to iterate across itself in insertion order,
+        yielding HashEntry objects built on the fly for each live entry
+        """
+        for key, value, hash_value in zip(self._keys, self._values, self._hashes):
+            if key is not _DELETED:
+                yield HashEntry(key, value, hash_value)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nCompact - put example 1")
+    print("-----------------------")
+    m = CompactHashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nCompact - contains_key / remove example 1")
+    print("-----------------------------------------")
+    m = CompactHashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+    result = True
+    for key in keys:
+        # all inserted keys must be present
+        result &= m.contains_key(str(key))
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result)
+    for key in keys[::2]:
+        m.remove(str(key))
+    print(m.get_size(), all(m.get(str(key)) == key * 42 for key in keys[1::2]))
+
+    print("\nCompact - get_keys_and_values example 1")
+    print("---------------------------------------")
+    m = CompactHashMap(11, hash_function_2)
+    for i in (5, 3, 1, 4, 2):
+        m.put(str(i), str(i * 10))
+    m.remove('1')
+    m.put('1', '100')
+    # insertion order, not hash order
+    print(m.get_keys_and_values())
+    m.resize_table(2)
+    print(m.get_keys_and_values())
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
@@ -0,0 +1,337 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Thread-safe OA hash map built from lock-striped segments.
+#              Keys are split across a power of two number of segments, each
+#              an independent hash_map_oa.HashMap with its own lock, so
+#              writers to different segments never wait on each other and a
+#              resize only rebuilds the one segment that filled up.
+#
+#              Readers take no lock. Every segment carries a sequence number
+#              that a writer bumps to odd before it changes the segment and
+#              back to even after (a seqlock). A reader notes the sequence,
+#              does an ordinary lookup and keeps the result only if the
+#              sequence is still the same even number; otherwise a writer
+#              ran meanwhile and the lookup is repeated under the lock.
+#
+#              Sizes, iteration and get_keys_and_values visit one segment at
+#              a time, so under concurrent writes they are weakly
+#              consistent: each segment is exact as of the moment it was
+#              read, but not all at the same moment.
+
+from threading import Lock
+
+import hash_map_oa
+from a6_include import DynamicArray, hash_function_1, to_list
+from hash_map_views import ItemsView, KeysView, ValuesView
+
+
+class _Segment:
+    """
+    One stripe: a map, the lock writers hold and the seqlock sequence
+    """
+
+    __slots__ = ('map', 'lock', 'sequence')
+
+    def __init__(self, hash_map: hash_map_oa.HashMap) -> None:
+        self.map = hash_map
+        self.lock = Lock()
+        self.sequence = 0
+
+
+class ConcurrentHashMap:
+    def __init__(self, capacity: int = 11, function=hash_function_1,
+                 segments: int = 16, **options) -> None:
+        """
+        Initialize a map of segments hash_map_oa.HashMap segments, a power
+        of two, sharing capacity between them. options go to every segment.
+        Segments always resize all at once: an incremental resize moves
+        entries inside get, which lock-free readers must not do. Statistics
+        counters aren't thread safe, so stats isn't supported either
+        """
+        if segments < 1 or segments & (segments - 1):
+            raise ValueError("segments must be a power of two")
+        if options.get('incremental_resize'):
+            raise ValueError("segments can't resize incrementally")
+        if options.get('stats'):
+            raise ValueError("stats aren't supported on a concurrent map")
+
+        # segments are picked by the builtin hash, so a segment's own hash
+        # function still spreads its keys over its whole table
+        self._mask = segments - 1
+        share = max(capacity // segments, 1)
+        self._segments = [_Segment(hash_map_oa.HashMap(share, function,
+                                                       **options))
+                          for _ in range(segments)]
+
+    def _segment(self, key: str) -> _Segment:
+        """
+        Returns the segment that holds key
+        """
+        return self._segments[hash(key) & self._mask]
+
+    def _group(self, keys: list) -> dict:
+        """
+        Returns {segment index: [positions in keys]} for keys
+        """
+        groups = {}
+        mask = self._mask
+        for position, key in enumerate(keys):
+            groups.setdefault(hash(key) & mask, []).append(position)
+        return groups
+
+    @staticmethod
+    def _read(segment: _Segment, operation, *args) -> object:
+        """
+        Returns operation(segment.map, *args), run without the lock when no
+        writer gets in the way and under it otherwise
+        """
+        sequence = segment.sequence
+        if not sequence & 1:
+            try:
+                result = operation(segment.map, *args)
+            except Exception:
+                # a writer moved the table under the lookup; retry locked
+                pass
+            else:
+                if segment.sequence == sequence:
+                    return result
+
+        with segment.lock:
+            return operation(segment.map, *args)
+
+    @staticmethod
+    def _write(segment: _Segment, operation, *args) -> None:
+        """
+        Runs operation(segment.map, *args) under the segment's lock, with
+        the sequence odd for as long as the segment is changing
+        """
+        with segment.lock:
+            segment.sequence += 1
+            try:
+                operation(segment.map, *args)
+            finally:
+                segment.sequence += 1
+
+    # ------------------------------------------------------------------ #
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(segment.map.get_size() for segment in self._segments)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the total over all segments
+        """
+        return sum(segment.map.get_capacity() for segment in self._segments)
+
+    def get_segment_count(self) -> int:
+        """
+        Returns the number of segments
+        """
+        return len(self._segments)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pair in hash map. If given key already exists, its
+        value is replaced with the new value, otherwise the pair is added.
+        Only the key's segment is locked, and only it ever resizes
+        """
+        # _write inlined for the same reason as _read in get
+        segment = self._segments[hash(key) & self._mask]
+        with segment.lock:
+            segment.sequence += 1
+            try:
+                segment.map.put(key, value)
+            finally:
+                segment.sequence += 1
+
+    def get(self, key: str) -> object:
+        """
+        Gets value of associated key. Returns None if value not found.
+        Takes no lock unless a writer is changing the key's segment
+        """
+        # the same seqlock read as _read, inlined on purpose: get is the
+        # call a shared map serves most, and through _segment and _read it
+        # costs two extra Python calls. That overhead had made this map
+        # slower than one behind a single global lock; keep the two copies
+        # in step
+        segment = self._segments[hash(key) & self._mask]
+        sequence = segment.sequence
+        if not sequence & 1:
+            try:
+                value = segment.map.get(key)
+            except Exception:
+                pass
+            else:
+                if segment.sequence == sequence:
+                    return value
+
+        with segment.lock:
+            return segment.map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it
+        returns False. Takes no lock unless a writer is changing the key's
+        segment
+        """
+        return self._read(self._segment(key),
+                          hash_map_oa.HashMap.contains_key, key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes given key and associated value. Method does nothing if value
+        not found
+        """
+        self._write(self._segment(key), hash_map_oa.HashMap.remove, key)
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every (key, value) pair in pairs, locking each segment once
+        for all of its pairs
+        """
+        pairs = to_list(pairs)
+        groups = self._group([pair[0] for pair in pairs])
+        for index, positions in groups.items():
+            self._write(self._segments[index], hash_map_oa.HashMap.put_many,
+                        [pairs[position] for position in positions])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns dynamic array with the value of each key in keys, in input
+        order. Missing keys give None. Each segment is read once for all of
+        its keys
+        """
+        keys = to_list(keys)
+        values = [None] * len(keys)
+        for index, positions in self._group(keys).items():
+            found = self._read(self._segments[index],
+                               hash_map_oa.HashMap.get_many,
+                               [keys[position] for position in positions])
+            for i, position in enumerate(positions):
+                values[position] = found.get_at_index(i)
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys, locking each segment once for all of its
+        keys. Keys not in the map are ignored
+        """
+        keys = to_list(keys)
+        for index, positions in self._group(keys).items():
+            self._write(self._segments[index],
+                        hash_map_oa.HashMap.remove_many,
+                        [keys[position] for position in positions])
+
+    def clear(self) -> None:
+        """
+        Clears contents of hash map, one segment at a time
+        """
+        for segment in self._segments:
+            self._write(segment, hash_map_oa.HashMap.clear)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the map to about new_capacity by resizing
+        every segment to its share of it, one segment at a time
+        """
+        share = max(-(-new_capacity // len(self._segments)), 1)
+        for segment in self._segments:
+            self._write(segment, hash_map_oa.HashMap.resize_table, share)
+
+    def table_load(self) -> float:
+        """
+        Returns current hash table load factor over all segments
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets over all segments
+        """
+        return sum(segment.map.empty_buckets() for segment in self._segments)
+
+    def _entries(self, segment: _Segment) -> list:
+        """
+        Returns the live entries of segment, copied out under its lock
+        """
+        with segment.lock:
+            return list(segment.map)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        returns dynamic array where each index contains a tuple of a
+        key/value pair
+        """
+        result = DynamicArray()
+        for entry in self:
+            result.append((entry.key, entry.value))
+        return result
+
+    def keys(self) -> KeysView:
+        """
+        Returns a live view of the keys in the map
+        """
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """
+        Returns a live view of the values in the map
+        """
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Returns a live view of the (key, value) pairs in the map
+        """
+        return ItemsView(self)
+
+    def __iter__(self):
+        """
+        Yields the live entries of the map a segment at a time. Writers may
+        keep going meanwhile; each segment is copied as it is reached, so
+        iteration never fails, but it may or may not see their changes
+        """
+        for segment in self._segments:
+            yield from self._entries(segment)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    from threading import Thread
+
+    print("\nConcurrent - put / get example 1")
+    print("--------------------------------")
+    m = ConcurrentHashMap(11, hash_function_1, segments=4)
+    for i in range(100):
+        m.put('key' + str(i), i)
+    print(m.get_size(), m.get('key42'), m.contains_key('key100'))
+    m.remove('key42')
+    print(m.get_size(), m.get('key42'), m.get_segment_count())
+
+    print("\nConcurrent - threads example 1")
+    print("------------------------------")
+    m = ConcurrentHashMap(11, hash_function_1)
+
+    def writer(start: int) -> None:
+        for i in range(start, start + 500):
+            m.put('key' + str(i), i)
+
+    threads = [Thread(target=writer, args=(i * 500,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(m.get_size(), m.get('key3999'), sorted(m.keys())[:3])
+
+    print("\nConcurrent - batch example 1")
+    print("----------------------------")
+    m = ConcurrentHashMap(11, hash_function_1, segments=8)
+    m.put_many([('a', 1), ('b', 2), ('c', 3)])
+    print(m.get_many(['c', 'x', 'a']))
+    m.remove_many(['a', 'b'])
+    print(m.get_size(), list(m.items()))
@@ -0,0 +1,340 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Open addressing hash map that stores its slots in flat
+#              parallel arrays (hashes, keys, values, states) instead of
+#              one HashEntry object per slot.
+
+from a6_include import (DynamicArray, HashEntry, hash_function_1,
+                        hash_function_2, is_prime, next_prime)
+
+
+# slot state codes stored in the states bytearray
+_EMPTY = 0
+_FULL = 1
+_TOMBSTONE = 2
+
+
+class FlatHashMap:
+    def __init__(self, capacity: int, function,
+                 tombstone_threshold: float = 0.25) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision
+        resolution and keeps hashes, keys, values and slot states in
+        separate flat arrays. Once tombstones fill tombstone_threshold of
+        the table it is compacted in place; None turns that off
+        """
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+
+        # tombstones are counted apart from live entries
+        self._tombstones = 0
+        self._tombstone_threshold = tombstone_threshold
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == _EMPTY:
+                slot = None
+            else:
+                slot = (f"K: {self._keys[i]} V: {self._values[i]} "
+                        f"TS: {self._states[i] == _TOMBSTONE}")
+            out += str(i) + ': ' + str(slot) + '\n'
+        return out
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Create fresh, empty parallel arrays with the given number of slots
+        """
+        self._hashes = [0] * capacity
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._states = bytearray(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash_value: int) -> int:
+        """
+        Returns slot index holding key, or -1 if key is not in the table
+        """
+        hashes, keys, states = self._hashes, self._keys, self._states
+        capacity = self._capacity
+        index = hash_value % capacity
+        probe_count = 0
+
+        # an empty slot ends the probe sequence
+        while states[index] != _EMPTY:
+
+            # compare cached hash first so most mismatches skip key ==
+            if (hashes[index] == hash_value and keys[index] == key
+                    and states[index] == _FULL):
+                return index
+
+            probe_count += 1
+            if probe_count == capacity:
+                break
+
+            # quadratic probing
+            index = (hash_value + probe_count * probe_count) % capacity
+
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pair in hash map. If given key already exists, its
+        value is replaced with the new value. Otherwise the key/value is added
+        """
+        # double capacity if load is greater than or equal to .5
+        if self._size / self._capacity >= 0.5:
+            self.resize_table(self._capacity * 2)
+
+        hash_value = self._hash_function(key)
+        hashes, keys, states = self._hashes, self._keys, self._states
+        capacity = self._capacity
+        index = hash_value % capacity
+
+        # first tombstone seen is reused if the key turns out to be absent
+        target = -1
+
+        for probe_count in range(1, capacity + 1):
+            state = states[index]
+
+            if state == _EMPTY:
+                if target == -1:
+                    target = index
+                break
+
+            if state == _TOMBSTONE:
+                if target == -1:
+                    target = index
+
+            # key already present, replace value in place
+            elif hashes[index] == hash_value and keys[index] == key:
+                self._values[index] = value
+                return
+
+            index = (hash_value + probe_count * probe_count) % capacity
+
+        if target == -1:
+            return
+
+        if states[target] == _TOMBSTONE:
+            self._tombstones -= 1
+        hashes[target] = hash_value
+        keys[target] = key
+        self._values[target] = value
+        states[target] = _FULL
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Returns current hash table load factor
+        """
+        return self._size / self._capacity
+
+    def effective_load(self) -> float:
+        """
+        Returns load factor counting tombstones as occupied
+        """
+        return (self._size + self._tombstones) / self._capacity
+
+    def get_tombstone_count(self) -> int:
+        """
+        Returns number of tombstones in the hash table
+        """
+        return self._tombstones
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in the hash table; tombstones are
+        not empty
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at its current capacity, dropping all tombstones
+        """
+        self._rebuild(self._capacity)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        changes capacity of internal hash table while keeping existing
+        key/value pairs, reusing the stored hashes instead of rehashing keys.
+        A capacity too small for the entries is ignored, never enlarged
+        """
+        # ends method if new capacity is less than or equal to 1 or
+        # new_capacity is less than size
+        if new_capacity <= 1 or new_capacity < self._size:
+            return
+
+        # check if prime, if not prime set next prime
+        if not is_prime(new_capacity):
+            new_capacity = next_prime(new_capacity)
+
+        # a load above .5 could leave a probe sequence with no empty slot
+        if self._size * 2 > new_capacity:
+            return
+
+        self._rebuild(new_capacity)
+
+    def _rebuild(self, new_capacity: int) -> None:
+        """
+        Moves every live slot into a new table of new_capacity
+        """
+        old_hashes, old_keys = self._hashes, self._keys
+        old_values, old_states = self._values, self._states
+
+        self._allocate(new_capacity)
+        self._capacity = new_capacity
+        self._tombstones = 0
+        hashes, keys, values, states = (self._hashes, self._keys,
+                                        self._values, self._states)
+
+        # place every live slot into the first empty slot of its new probe
+        # sequence; no key comparisons are needed since keys are unique
+        for i in range(len(old_states)):
+            if old_states[i] != _FULL:
+                continue
+
+            hash_value = old_hashes[i]
+            index = hash_value % new_capacity
+            probe_count = 0
+            while states[index] != _EMPTY:
+                probe_count += 1
+                index = (hash_value + probe_count * probe_count) % new_capacity
+
+            hashes[index] = hash_value
+            keys[index] = old_keys[i]
+            values[index] = old_values[i]
+            states[index] = _FULL
+
+    def get(self, key: str) -> object:
+        """
+        Gets value of associated key. Returns None if value not found
+        """
+        index = self._find(key, self._hash_function(key))
+        if index == -1:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it
+        returns False
+        """
+        return self._find(key, self._hash_function(key)) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes given key and associated value. Method does nothing if value
+        not found.
+        """
+        index = self._find(key, self._hash_function(key))
+        if index == -1:
+            return
+
+        # slot becomes a tombstone; drop references so they can be collected
+        self._states[index] = _TOMBSTONE
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+        self._tombstones += 1
+
+        # rehash in place once tombstones crowd out empty slots
+        if (self._tombstone_threshold is not None and self._tombstones
+                >= self._tombstone_threshold * self._capacity):
+            self.compact()
+
+    def clear(self) -> None:
+        """
+        Clears contents of hash map while retaining underlying hash table
+        capacity
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        returns dynamic array where each index contains a tuple of a
+        key/value pair
+        """
+        array = DynamicArray()
+        keys, values, states = self._keys, self._values, self._states
+
+        for i in range(self._capacity):
+            if states[i] == _FULL:
+                array.append((keys[i], values[i]))
+
+        return array
+
+    def __iter__(self):
+        """
+        Enables hash map to iterate across itself, yielding HashEntry objects
+        built on the fly for each live slot
+        """
+        keys, values, states = self._keys, self._values, self._states
+        for i in range(len(states)):
+            if states[i] == _FULL:
+                yield HashEntry(keys[i], values[i])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nFlat - put example 1")
+    print("--------------------")
+    m = FlatHashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nFlat - contains_key / remove example 1")
+    print("--------------------------------------")
+    m = FlatHashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+    result = True
+    for key in keys:
+        # all inserted keys must be present
+        result &= m.contains_key(str(key))
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result)
+    for key in keys[::2]:
+        m.remove(str(key))
+    print(m.get_size(), all(m.get(str(key)) == key * 42 for key in keys[1::2]))
+
+    print("\nFlat - get_keys_and_values example 1")
+    print("------------------------------------")
+    m = FlatHashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+    m.resize_table(2)
+    print(m.get_keys_and_values())
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
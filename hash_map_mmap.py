@@ -0,0 +1,424 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Read-only open addressing hash map served straight from a
+#              memory mapped file. save_mapped writes the table as fixed
+#              width slot records (hash, key and value offsets into a heap
+#              of encoded bytes) on a prime capacity with quadratic probing.
+#              MappedHashMap maps that file read-only and answers lookups
+#              by unpacking slot records and comparing key bytes in place,
+#              so every process that opens the file shares one page cached
+#              copy. Opening checks the header and, unless verify=False,
+#              the checksum, which reads the whole file once; without it
+#              opening costs nothing per entry.
+#
+# Layout (little endian):
+#   header    magic b'HASHMMAP', format version, slot record size, length
+#             of the hash function identity, capacity, size, table
+#             offset, heap offset, heap length, CRC-32 of the header
+#             fields before it and everything after the header
+#   identity  UTF-8 JSON naming the hash function (see hash_map_snapshot);
+#             a keyed function's key is not stored
+#   table     capacity slot records, 8 byte aligned
+#   heap      encoded keys and values
+#
+# Keys must be str or bytes; values str, bytes, int, float, bool or None.
+
+import json
+import mmap
+import os
+import struct
+import zlib
+
+from a6_include import (DynamicArray, HashEntry, hash_function_1,
+                        hash_function_2, next_prime, to_list)
+from hash_map_snapshot import SnapshotError, function_identity, resolve_function
+from hash_map_views import ItemsView, KeysView, ValuesView
+
+
+MAGIC = b'HASHMMAP'
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct('<8sHHIQQQQQI')
+
+# the checksum ends the header and covers every byte but its own
+_CHECKSUM = struct.Struct('<I')
+_CHECKSUM_OFFSET = _HEADER.size - _CHECKSUM.size
+
+# hash, key offset, value offset, key length, value length, key kind,
+# value kind
+_SLOT = struct.Struct('<QQQIIBB6x')
+
+# hashes are stored as unsigned 64 bit values
+_MASK_64 = (1 << 64) - 1
+
+# key kinds; an empty slot has key kind _EMPTY
+_EMPTY = 0
+_STR = 1
+_BYTES = 2
+
+# value kinds besides _STR and _BYTES
+_NONE = 0
+_INT = 3
+_FLOAT = 4
+_BOOL = 5
+
+# CRC is computed over the file in chunks this large
+_CHUNK_SIZE = 1 << 20
+
+# entries whose stored hash is recomputed when a file is opened
+_HASH_CHECKS = 8
+
+
+def _encode(value: object) -> tuple:
+    """
+    Returns (kind, bytes) for a key or value
+    """
+    if value is None:
+        return _NONE, b''
+    if isinstance(value, str):
+        return _STR, value.encode('utf-8')
+    if isinstance(value, bytes):
+        return _BYTES, value
+    if isinstance(value, bool):
+        return _BOOL, b'1' if value else b'0'
+    if isinstance(value, int):
+        return _INT, str(value).encode('ascii')
+    if isinstance(value, float):
+        return _FLOAT, repr(value).encode('ascii')
+    raise ValueError(f"cannot store {type(value).__name__} in a mapped table")
+
+
+def _decode(kind: int, data) -> object:
+    """
+    Returns the key or value encoded as kind in the buffer data
+    """
+    if kind == _STR:
+        return str(data, 'utf-8')
+    if kind == _BYTES:
+        return bytes(data)
+    if kind == _NONE:
+        return None
+    if kind == _INT:
+        return int(data)
+    if kind == _FLOAT:
+        return float(data)
+    return data == b'1'
+
+
+def save_mapped(path: str, pairs, function=hash_function_1) -> None:
+    """
+    Writes the (key, value) pairs to a mapped table file at path, hashed
+    with function, which must be importable by name. Later pairs replace
+    earlier ones with the same key, as put would. The key of a keyed
+    function isn't written, so opening the file needs the function again
+    """
+    pairs = dict(to_list(pairs))
+    identity = json.dumps(function_identity(function)).encode('utf-8')
+
+    # load stays under .5, so quadratic probing always finds a free slot
+    capacity = next_prime(len(pairs) * 2 + 1)
+    table = bytearray(capacity * _SLOT.size)
+    used = bytearray(capacity)
+    heap = bytearray()
+
+    for key, value in pairs.items():
+        key_kind, key_bytes = _encode(key)
+        if key_kind not in (_STR, _BYTES):
+            raise ValueError("mapped table keys must be str or bytes")
+        value_kind, value_bytes = _encode(value)
+        hash_value = function(key) & _MASK_64
+
+        index = hash_value % capacity
+        probe_count = 0
+        while used[index]:
+            probe_count += 1
+            index = (hash_value + probe_count * probe_count) % capacity
+        used[index] = 1
+
+        key_offset = len(heap)
+        heap += key_bytes
+        value_offset = len(heap)
+        heap += value_bytes
+        _SLOT.pack_into(table, index * _SLOT.size, hash_value, key_offset,
+                        value_offset, len(key_bytes), len(value_bytes),
+                        key_kind, value_kind)
+
+    # the table starts 8 byte aligned after the header and identity
+    table_offset = -(-(_HEADER.size + len(identity)) // 8) * 8
+    heap_offset = table_offset + len(table)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, _SLOT.size, len(identity),
+                          capacity, len(pairs), table_offset, heap_offset,
+                          len(heap), 0)
+    padding = bytes(table_offset - _HEADER.size - len(identity))
+
+    checksum = zlib.crc32(header[:_CHECKSUM_OFFSET])
+    for part in (identity, padding, table, heap):
+        checksum = zlib.crc32(part, checksum)
+
+    with open(path, 'wb') as mapped:
+        mapped.write(header[:_CHECKSUM_OFFSET])
+        mapped.write(_CHECKSUM.pack(checksum))
+        mapped.write(identity)
+        mapped.write(padding)
+        mapped.write(table)
+        mapped.write(heap)
+
+
+class MappedHashMap:
+    def __init__(self, path: str, function: callable = None,
+                 verify: bool = True) -> None:
+        """
+        Opens the mapped table file at path read-only and checks its header
+        and, with verify, its checksum, reading the whole file once. With
+        verify off only the header and the first few slots are read, and
+        damage elsewhere goes unnoticed until verify() is called. function
+        is needed when the file was saved with a keyed one, such as
+        make_siphash(secret), whose key isn't stored.
+        Raises SnapshotError if the file is not a mapped table, fails its
+        checksum, or its hash function no longer gives the stored hashes
+        """
+        with open(path, 'rb') as mapped:
+            file_size = os.fstat(mapped.fileno()).st_size
+            if file_size < _HEADER.size:
+                raise SnapshotError("mapped table is truncated")
+            self._mmap = mmap.mmap(mapped.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        try:
+            self._open(file_size, function, verify)
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self, file_size: int, function: callable,
+              verify: bool) -> None:
+        """
+        Reads and checks the header of the mapped file, and with verify
+        the checksum of the whole file
+        """
+        (magic, version, slot_size, identity_length, self._capacity,
+         self._size, self._table, self._heap, heap_length,
+         self._checksum) = _HEADER.unpack_from(self._mmap, 0)
+
+        if magic != MAGIC:
+            raise SnapshotError("not a mapped hash table")
+        if version != FORMAT_VERSION or slot_size != _SLOT.size:
+            raise SnapshotError(f"unsupported mapped table version {version}")
+        if (self._heap != self._table + self._capacity * _SLOT.size
+                or self._heap + heap_length != file_size):
+            raise SnapshotError("mapped table is truncated")
+        if verify:
+            self.verify()
+
+        identity = self._mmap[_HEADER.size:_HEADER.size + identity_length]
+        self._hash_function = resolve_function(json.loads(identity), function)
+
+        # a str hash seeded per process would find nothing, so recompute
+        # the hashes of the first few entries
+        for checked, slot in enumerate(self._slots()):
+            if checked == _HASH_CHECKS:
+                break
+            if self._hash(self._read(slot[5], slot[1], slot[3])) != slot[0]:
+                raise SnapshotError(
+                    "hash function does not reproduce the stored hashes")
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        view, table = self._view, self._table
+        for index in range(self._capacity):
+            slot = _SLOT.unpack_from(view, table + index * _SLOT.size)
+            entry = None
+            if slot[5] != _EMPTY:
+                entry = HashEntry(self._read(slot[5], slot[1], slot[3]),
+                                  self._read(slot[6], slot[2], slot[4]))
+            out += str(index) + ': ' + str(entry) + '\n'
+        return out
+
+    def __enter__(self) -> "MappedHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmaps the file; the map can't be used afterwards
+        """
+        self._view.release()
+        self._mmap.close()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def table_load(self) -> float:
+        """
+        Returns current hash table load factor
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in the hash table
+        """
+        return self._capacity - self._size
+
+    # ------------------------------------------------------------------ #
+
+    def _hash(self, key: object) -> int:
+        """
+        Returns the stored (64 bit) hash of key
+        """
+        return self._hash_function(key) & _MASK_64
+
+    def _find(self, key: object) -> tuple:
+        """
+        Returns the slot record of key, or None if key is not in the map
+        """
+        key_kind, key_bytes = _encode(key)
+        hash_value = self._hash(key)
+        capacity, table, heap = self._capacity, self._table, self._heap
+        view = self._view
+        index = hash_value % capacity
+
+        for probe_count in range(1, capacity + 1):
+            slot = _SLOT.unpack_from(view, table + index * _SLOT.size)
+
+            # an empty slot ends the probe sequence
+            if slot[5] == _EMPTY:
+                return None
+
+            # compare cached hash first, then the key bytes in place
+            if (slot[0] == hash_value and slot[5] == key_kind
+                    and slot[3] == len(key_bytes)
+                    and view[heap + slot[1]:heap + slot[1] + slot[3]] == key_bytes):
+                return slot
+
+            index = (hash_value + probe_count * probe_count) % capacity
+
+        return None
+
+    def _slots(self):
+        """
+        Yields every occupied slot record in table order
+        """
+        view, table = self._view, self._table
+        for index in range(self._capacity):
+            slot = _SLOT.unpack_from(view, table + index * _SLOT.size)
+            if slot[5] != _EMPTY:
+                yield slot
+
+    def _read(self, kind: int, offset: int, length: int) -> object:
+        """
+        Decodes the key or value of the given kind stored at offset in the
+        heap
+        """
+        start = self._heap + offset
+        return _decode(kind, self._view[start:start + length])
+
+    def get(self, key: object) -> object:
+        """
+        Gets value of associated key. Returns None if value not found
+        """
+        slot = self._find(key)
+        if slot is None:
+            return None
+        return self._read(slot[6], slot[2], slot[4])
+
+    def contains_key(self, key: object) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it
+        returns False
+        """
+        return self._find(key) is not None
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        returns dynamic array where each index contains a tuple of a
+        key/value pair
+        """
+        result = DynamicArray()
+        for slot in self._slots():
+            result.append((self._read(slot[5], slot[1], slot[3]),
+                           self._read(slot[6], slot[2], slot[4])))
+        return result
+
+    def verify(self) -> None:
+        """
+        Reads the whole file and raises SnapshotError if it doesn't match
+        the checksum written with it
+        """
+        checksum = zlib.crc32(self._view[:_CHECKSUM_OFFSET])
+        for start in range(_HEADER.size, len(self._mmap), _CHUNK_SIZE):
+            checksum = zlib.crc32(self._view[start:start + _CHUNK_SIZE], checksum)
+        if checksum != self._checksum:
+            raise SnapshotError("mapped table checksum mismatch")
+
+    def keys(self) -> KeysView:
+        """
+        Returns a view of the keys in the map
+        """
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """
+        Returns a view of the values in the map
+        """
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Returns a view of the (key, value) pairs in the map
+        """
+        return ItemsView(self)
+
+    def __iter__(self):
+        """
+        Enables hash map to iterate across itself, yielding HashEntry objects
+        decoded on the fly for each entry
+        """
+        for slot in self._slots():
+            yield HashEntry(self._read(slot[5], slot[1], slot[3]),
+                            self._read(slot[6], slot[2], slot[4]), slot[0])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    print("\nMapped - get / contains_key example 1")
+    print("-------------------------------------")
+    path = os.path.join(tempfile.mkdtemp(), 'table.mmap')
+    save_mapped(path, [(str(key), key * 42) for key in range(1, 1000, 20)],
+                hash_function_2)
+    with MappedHashMap(path) as m:
+        print(m.get_size(), m.get_capacity())
+        result = True
+        for key in range(1, 1000, 20):
+            # all inserted keys must be present
+            result &= m.contains_key(str(key)) and m.get(str(key)) == key * 42
+            # NOT inserted keys must be absent
+            result &= not m.contains_key(str(key + 1))
+        print(result)
+
+    print("\nMapped - get_keys_and_values example 1")
+    print("--------------------------------------")
+    save_mapped(path, [('1', 'one'), ('2', b'two'), ('3', 3.0), ('4', None)],
+                hash_function_1)
+    with MappedHashMap(path) as m:
+        print(m)
+        print(m.get_keys_and_values())
+    os.remove(path)
@@ -5,27 +5,156 @@
 # Due Date: 8/15/2023
 # Description: Implementation of OA hash map
 
+from array import array
+from functools import partial
+from time import perf_counter_ns
+
 from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+                        hash_function_1, hash_function_2, to_list)
+from hash_family import make_siphash
+from hash_functions import hash_many, mix64, mixed_hash
+from hash_map_snapshot import (SnapshotError, check_hashes,
+                               function_identity, pack_ints, read_snapshot,
+                               resolve_function, write_snapshot)
+from hash_map_stats import MapStats, histogram
+from hash_map_views import ItemsView, KeysView, ValuesView
+
+# shared tombstone left behind in the old table by incremental resizing
+_MOVED = HashEntry(None, None)
+_MOVED.is_tombstone = True
+
+# scan cursors keep the slot position in their low bits and the table
+# epoch they were issued for above them
+_CURSOR_BITS = 40
+_CURSOR_MASK = (1 << _CURSOR_BITS) - 1
+
+
+class HashMapIterator:
+    """
+    Iterator over the live entries of a HashMap. Each one keeps its own
+    cursor, so any number can walk the same map at once. Raises
+    RuntimeError if keys are added or removed, or the table is resized,
+    while it is in use
+    """
+
+    __slots__ = ('_map', '_buckets', '_index', '_version')
+
+    def __init__(self, hash_map: "HashMap") -> None:
+        """Initialize the iterator at the first slot of the map's table."""
+        # walk a single table; iteration is O(n) anyway
+        hash_map._finish_incremental_resize()
+        self._map = hash_map
+        self._buckets = hash_map._buckets
+        self._index = 0
+        self._version = hash_map._version
+
+    def __iter__(self) -> "HashMapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self) -> HashEntry:
+        """Obtain next live entry and advance iterator."""
+        if self._map._version != self._version:
+            raise RuntimeError("hash map changed during iteration")
+
+        buckets = self._buckets
+        while self._index < buckets.length():
+            slot = buckets.get_at_index(self._index)
+            self._index += 1
+            if slot is not None and not slot.is_tombstone:
+                return slot
+        raise StopIteration
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    # old table slots migrated per operation during an incremental resize
+    _REHASH_SLOTS = 8
+
+    def __init__(self, capacity: int, function,
+                 incremental_resize: bool = False,
+                 probing: str = 'quadratic',
+                 tombstone_threshold: float = 0.25,
+                 shrink_threshold: float = None,
+                 power_of_two: bool = False,
+                 stats: bool = False,
+                 keyed_hash: bool = False,
+                 flood_threshold: int = None) -> None:
         """
         Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        quadratic probing for collision resolution.
+        With incremental_resize, growing the table moves entries over a few
+        slots per operation instead of all at once inside put.
+        probing='robin_hood' selects linear Robin Hood probing, where
+        remove shifts later entries back instead of leaving tombstones.
+        Once tombstones fill tombstone_threshold of the table it is
+        compacted in place; None turns automatic compaction off.
+        With shrink_threshold, remove halves the table when the load drops
+        below it, never below the starting capacity. It must be under .25
+        so a shrunk table stays clear of the .5 growth threshold.
+        With power_of_two, capacities are powers of two instead of primes,
+        hashes go through a mixing finalizer and probing uses triangular
+        numbers, which visit every slot of a power of two table.
+        With stats, every operation records how many slots it examined;
+        see get_stats.
+        With keyed_hash, keys are hashed with SipHash-2-4 under a random
+        secret made for this map instead of function, so nobody can pick
+        keys that collide. With flood_threshold, the map starts with
+        function but switches to that keyed hash, rehashing every key,
+        the first time an insert probes more than flood_threshold slots
         """
+        if probing not in ('quadratic', 'robin_hood'):
+            raise ValueError(f"unknown probing strategy: {probing!r}")
+        if shrink_threshold is not None and not 0 < shrink_threshold < 0.25:
+            raise ValueError("shrink_threshold must be between 0 and .25")
+        if flood_threshold is not None and flood_threshold < 1:
+            raise ValueError("flood_threshold must be at least 1")
+
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two in that mode
+        self._power_of_two = power_of_two
+        if power_of_two:
+            self._capacity = self._next_power_of_two(capacity)
+        else:
+            self._capacity = self._next_prime(capacity)
+        # power of two tables index with hash & mask instead of hash % capacity
+        self._mask = self._capacity - 1
         for _ in range(self._capacity):
             self._buckets.append(None)
 
-        self._hash_function = function
+        # a keyed hash is only ever switched to once
+        self._keyed_hash = keyed_hash
+        self._flood_threshold = None if keyed_hash else flood_threshold
+        self._flooded = False
+        self._set_hash_function(make_siphash() if keyed_hash else function)
         self._size = 0
 
+        # bumped whenever keys are added or removed or the table is rebuilt,
+        # so iterators can tell the map changed under them
+        self._version = 0
+
+        # bumped whenever entries move to other slots, so scan can tell a
+        # cursor belongs to an earlier table
+        self._epoch = 0
+        self._robin_hood = probing == 'robin_hood'
+
+        # tombstones in the current table, counted apart from live entries
+        self._tombstones = 0
+        self._tombstone_threshold = tombstone_threshold
+
+        # shrinking never goes below the starting capacity
+        self._shrink_threshold = shrink_threshold
+        self._min_capacity = self._capacity
+
+        # old table and next slot to migrate while an incremental resize runs
+        self._incremental_resize = incremental_resize
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._rehash_index = 0
+
+        # operation counters, None unless statistics are on
+        self._stats = MapStats() if stats else None
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -69,6 +198,37 @@ class HashMap:
 
         return True
 
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Returns the smallest power of two that is at least capacity (and 2)
+        """
+        return 1 << max(capacity - 1, 1).bit_length()
+
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Rounds a requested capacity up to the next prime, or to the next
+        power of two in power_of_two mode
+        """
+        if self._power_of_two:
+            return self._next_power_of_two(capacity)
+        if self._is_prime(capacity):
+            return capacity
+        return self._next_prime(capacity)
+
+    def _set_hash_function(self, function) -> None:
+        """
+        Makes function the hash function for keys
+        """
+        self._hash_function = function
+
+        # power of two tables index with the low bits only, so key hashes
+        # are mixed first; the mixed hash is what entries cache
+        if self._power_of_two:
+            self._key_hash = partial(mixed_hash, function)
+        else:
+            self._key_hash = function
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -91,41 +251,288 @@ class HashMap:
         Updates key/value pair in hash  map. If given key already exists, its value must be replaced with the new value.
         Otherwise the value/key is added
         """
+        self._put(key, value, self._key_hash(key))
+        if self._stats is not None:
+            self._stats.record('put')
+
+    def _put(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Performs put using an already computed hash value for key
+        """
+        if self._old_buckets is not None:
+            self._rehash_step()
+
         # double capacity if load is greater than or equal to .5
         if self.table_load() >= 0.5:
-            self.resize_table(self._capacity * 2)
+            self._resize(self._capacity * 2)
+
+        # a key still waiting in the old table is updated where it is
+        if self._old_buckets is not None:
+            index = self._find_slot(self._old_buckets, self._old_capacity,
+                                    key, hash_value)
+            if index != -1:
+                self._old_buckets.get_at_index(index).value = value
+                return
+
+        self._insert(key, value, hash_value)
+        if self._flooded:
+            self._use_keyed_hash()
+
+    def _insert(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Places key/value in the table without checking the load factor
+        """
+        if self._robin_hood:
+            if self._insert_robin_hood(HashEntry(key, value, hash_value), True):
+                self._size += 1
+                self._version += 1
+            return
 
         # keep track of probe count
         probe_count = 0
 
-        # calculate hash value  for key
-        hash_value = self._hash_function(key)
+        # prime tables probe quadratically; power of two tables probe by
+        # triangular numbers, which visit every slot
+        capacity, mask = self._capacity, self._mask
+        triangular = (capacity & mask) == 0
 
         # initial slot for key
-        index = hash_value % self._capacity
+        index = hash_value & mask if triangular else hash_value % capacity
+
+        # first tombstone seen, reused if the key turns out to be absent
+        target = -1
 
         # enter loop to find empty slot or max probe reached
-        while probe_count < self._capacity:
+        while probe_count < capacity:
             slot = self._buckets.get_at_index(index)
 
-            # if slot is empty or a tombstone then key and value is placed here
+            # an empty slot ends the probe sequence, key is not present
             if slot is None:
-                self._buckets.set_at_index(index, HashEntry(key, value))
-                self._size += 1
-                return
+                if target == -1:
+                    target = index
+                break
 
+            # keep probing past tombstones, the key may still be further on
             elif slot.is_tombstone:
-                self._buckets.set_at_index(index, HashEntry(key, value))
-                return
+                if target == -1:
+                    target = index
 
             # if slot key matches given key, replace value in the slot
-            elif slot.key == key:
-                self._buckets.set_at_index(index, HashEntry(key, value))
+            # (cached hash is compared first to skip most key comparisons)
+            elif slot.hash == hash_value and slot.key == key:
+                self._buckets.set_at_index(index, HashEntry(key, value, hash_value))
+                if self._stats is not None:
+                    self._stats.add_probes(probe_count + 1)
                 return
 
-            # quadratic probing for collisions
+            # quadratic (or triangular) probing for collisions
             probe_count += 1
-            index = (hash_value + probe_count**2) % self._capacity
+            if triangular:
+                index = (index + probe_count) & mask
+            else:
+                index = (hash_value + probe_count**2) % capacity
+
+        if self._stats is not None:
+            self._stats.add_probes(min(probe_count + 1, capacity))
+
+        # a probe sequence this long suggests keys chosen to collide
+        if (self._flood_threshold is not None
+                and probe_count + 1 > self._flood_threshold):
+            self._flooded = True
+
+        if target != -1:
+            if self._buckets.get_at_index(target) is not None:
+                self._tombstones -= 1
+            self._buckets.set_at_index(target, HashEntry(key, value, hash_value))
+            self._size += 1
+            self._version += 1
+
+    def _insert_robin_hood(self, entry: HashEntry, check_existing: bool) -> bool:
+        """
+        Places entry by linear Robin Hood probing: an entry further from its
+        home slot takes the slot of one closer to home, which then moves on.
+        If check_existing, an entry already holding the key gets the new
+        value instead. Returns True if a new slot was filled
+        """
+        buckets, capacity, mask = self._buckets, self._capacity, self._mask
+        power_of_two = self._power_of_two
+        index = start = (entry.hash & mask if power_of_two
+                         else entry.hash % capacity)
+        distance = 0
+
+        while True:
+            slot = buckets.get_at_index(index)
+
+            if slot is None:
+                buckets.set_at_index(index, entry)
+                self._add_linear_probes(start, index)
+                return True
+
+            if (check_existing and slot.hash == entry.hash
+                    and slot.key == entry.key):
+                slot.value = entry.value
+                self._add_linear_probes(start, index)
+                return False
+
+            # steal the slot from an entry closer to its home and carry that
+            # entry on; the key can't be further along, so stop checking
+            slot_distance = index - slot.hash
+            slot_distance = (slot_distance & mask if power_of_two
+                             else slot_distance % capacity)
+            if slot_distance < distance:
+                buckets.set_at_index(index, entry)
+                entry, distance = slot, slot_distance
+                check_existing = False
+
+            distance += 1
+            index = (index + 1) & mask if power_of_two else (index + 1) % capacity
+
+    def _add_linear_probes(self, start: int, stop: int) -> None:
+        """
+        Counts the slots from start to stop, inclusive, of a linear probe
+        when stats are on, and checks them against flood_threshold
+        """
+        probes = (stop - start) % self._capacity + 1
+        if self._stats is not None:
+            self._stats.add_probes(probes)
+        if (self._flood_threshold is not None
+                and probes > self._flood_threshold):
+            self._flooded = True
+
+    def _backward_shift(self, index: int) -> None:
+        """
+        Empties slot at index by moving each following entry of the cluster
+        back one slot, stopping at an empty slot or an entry already at home
+        """
+        buckets, capacity, mask = self._buckets, self._capacity, self._mask
+        if self._power_of_two:
+            next_index = (index + 1) & mask
+            slot = buckets.get_at_index(next_index)
+            while slot is not None and (next_index - slot.hash) & mask:
+                buckets.set_at_index(index, slot)
+                index = next_index
+                next_index = (index + 1) & mask
+                slot = buckets.get_at_index(next_index)
+            buckets.set_at_index(index, None)
+            return
+
+        next_index = (index + 1) % capacity
+        slot = buckets.get_at_index(next_index)
+
+        while slot is not None and (next_index - slot.hash) % capacity != 0:
+            buckets.set_at_index(index, slot)
+            index = next_index
+            next_index = (index + 1) % capacity
+            slot = buckets.get_at_index(next_index)
+
+        buckets.set_at_index(index, None)
+
+    def _find_slot(self, buckets: DynamicArray, capacity: int, key: str,
+                   hash_value: int) -> int:
+        """
+        Returns index of the live slot holding key in buckets, or -1 if the
+        key is not there
+        """
+        if self._robin_hood:
+            return self._find_slot_robin_hood(buckets, capacity, key,
+                                              hash_value, self._stats)
+        return self._find_slot_quadratic(buckets, capacity, key, hash_value,
+                                         self._stats)
+
+    @staticmethod
+    def _find_slot_robin_hood(buckets: DynamicArray, capacity: int, key: str,
+                              hash_value: int, stats: MapStats = None) -> int:
+        """
+        Linear probe for key that stops at an empty slot, or as soon as it
+        reaches an entry closer to its home slot than key would be.
+        Slots examined are added to stats if given
+        """
+        # power of two capacities index with a mask
+        mask = capacity - 1
+        power_of_two = (capacity & mask) == 0
+        index = hash_value & mask if power_of_two else hash_value % capacity
+        distance = 0
+        slot = buckets.get_at_index(index)
+        found = -1
+
+        while slot is not None and distance < capacity:
+            # the old table of an incremental resize may hold tombstones
+            if not slot.is_tombstone:
+                if slot.hash == hash_value and slot.key == key:
+                    found = index
+                    break
+
+                # key would have displaced any entry closer to home
+                slot_distance = index - slot.hash
+                if (slot_distance & mask if power_of_two
+                        else slot_distance % capacity) < distance:
+                    break
+
+            distance += 1
+            index = (index + 1) & mask if power_of_two else (index + 1) % capacity
+            slot = buckets.get_at_index(index)
+
+        if stats is not None:
+            stats.add_probes(min(distance + 1, capacity))
+        return found
+
+    @staticmethod
+    def _find_slot_quadratic(buckets: DynamicArray, capacity: int, key: str,
+                             hash_value: int, stats: MapStats = None) -> int:
+        """
+        Quadratic probe for key that continues past tombstones and stops at
+        the first empty slot. Power of two tables probe by triangular
+        numbers instead. Slots examined are added to stats if given
+        """
+        probe_count = 0
+        mask = capacity - 1
+        triangular = (capacity & mask) == 0
+
+        # initial slot for key; power of two capacities index with a mask
+        index = hash_value & mask if triangular else hash_value % capacity
+        # retrieve slot at the calculated index in array
+        slot = buckets.get_at_index(index)
+
+        found = -1
+
+        # iterate through slots looking for key while we have not probed the entire table
+        while slot is not None and probe_count < capacity:
+            if (not slot.is_tombstone and slot.hash == hash_value
+                    and slot.key == key):
+                found = index
+                break
+
+            # quadratic (or triangular) probing
+            probe_count += 1
+            if triangular:
+                index = (index + probe_count) & mask
+            else:
+                index = (hash_value + probe_count ** 2) % capacity
+            slot = buckets.get_at_index(index)
+
+        if stats is not None:
+            stats.add_probes(min(probe_count + 1, capacity))
+        return found
+
+    def _find_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Returns live entry for key, looking in the old table as well while an
+        incremental resize is in progress. Returns None if not found
+        """
+        if self._old_buckets is not None:
+            self._rehash_step()
+
+        index = self._find_slot(self._buckets, self._capacity, key, hash_value)
+        if index != -1:
+            return self._buckets.get_at_index(index)
+
+        if self._old_buckets is not None:
+            index = self._find_slot(self._old_buckets, self._old_capacity,
+                                    key, hash_value)
+            if index != -1:
+                return self._old_buckets.get_at_index(index)
+
+        return None
 
     def table_load(self) -> float:
         """
@@ -135,24 +542,64 @@ class HashMap:
         load_factor = self._size / self._capacity
         return load_factor
 
+    def effective_load(self) -> float:
+        """
+        Returns load factor counting tombstones as occupied, which is what
+        lookups of missing keys actually probe through
+        """
+        return (self._size + self._tombstones) / self._capacity
+
+    def get_tombstone_count(self) -> int:
+        """
+        Returns number of tombstones in the hash table
+        """
+        return self._tombstones
+
     def empty_buckets(self) -> int:
         """
-        Returns number of empty buckets in the hash table
+        Returns number of empty buckets in the hash table; tombstones are
+        not empty
         """
-        return self._capacity - self._size
+        return self._capacity - self._size - self._tombstones
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at its current capacity, dropping all tombstones
+        """
+        self.resize_table(self._capacity)
 
     def resize_table(self, new_capacity: int) -> None:
         """
-        changes capacity of internal hash table while keeping existing key/value pairs
+        changes capacity of internal hash table while keeping existing key/value pairs.
+        Keys are not rehashed; each entry's cached hash is reused
         """
 
         # ends method if new capacity is less than or equal to 1 or new_capacity is less than size
         if new_capacity <= 1 or new_capacity < self._size:
             return
 
-        # check if prime, if not prime set next prime
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
+        if self._stats is None:
+            self._rebuild(new_capacity)
+            return
+
+        # pause stats so re-inserting entries isn't counted as operations
+        stats, self._stats = self._stats, None
+        start = perf_counter_ns()
+        try:
+            self._rebuild(new_capacity)
+        finally:
+            self._stats = stats
+        stats.record_resize(perf_counter_ns() - start)
+
+    def _rebuild(self, new_capacity: int) -> None:
+        """
+        Re-inserts every live entry into a new table of new_capacity
+        """
+        # an explicit resize always completes in this call
+        self._finish_incremental_resize()
+
+        # round up to the next prime, or power of two in that mode
+        new_capacity = self._round_capacity(new_capacity)
 
         old_buckets = self._buckets
 
@@ -161,107 +608,294 @@ class HashMap:
         for _ in range(new_capacity):
             self._buckets.append(None)
 
-        # reset map size
+        # reset map size; the new table has no tombstones
         self._size = 0
+        self._tombstones = 0
+        self._version += 1
+        self._epoch += 1
 
         # update capacity to new capacity
         self._capacity = new_capacity
+        self._mask = new_capacity - 1
+
+        # entries go back in under their cached hashes, so the hash function
+        # must not be switched part way through
+        threshold, self._flood_threshold = self._flood_threshold, None
+        flooded, self._flooded = self._flooded, False
 
         # iterate through each slot in old bucket
         for i in range(old_buckets.length()):
             slot = old_buckets[i]
-            # rehash and add key/value to new size
+            # add key/value to new table using its cached hash
             if slot is not None and not slot.is_tombstone:
-                self.put(slot.key, slot.value)
+                self._put(slot.key, slot.value, slot.hash)
 
+        self._flood_threshold = threshold
+        self._flooded = flooded
 
-    def get(self, key: str) -> object:
+    def _resize(self, new_capacity: int) -> None:
         """
-        Gets value of associated key. Returns None if value not found
+        Resizes for growth or shrinking, incrementally if that mode is on
         """
+        if self._incremental_resize:
+            self._start_incremental_resize(new_capacity)
+        else:
+            self.resize_table(new_capacity)
 
-        probe_count = 0
+    def shrink_to_fit(self) -> None:
+        """
+        Resizes the table to the smallest capacity that holds the current
+        entries below the .5 load threshold
+        """
+        self.resize_table(max(self._size * 2 + 1, 3))
 
-        # calculate hash value  for key
-        hash_value = self._hash_function(key)
+    def _start_incremental_resize(self, new_capacity: int) -> None:
+        """
+        Swaps in an empty table of new_capacity and keeps the current one as
+        the old table; its entries move over a few slots per operation
+        """
+        # only one migration runs at a time
+        self._finish_incremental_resize()
 
-        # initial slot for key
-        index = hash_value % self._capacity
-        # retrieve slot at the calculated index in array
-        slot = self._buckets.get_at_index(index)
+        # round up to the next prime, or power of two in that mode
+        new_capacity = self._round_capacity(new_capacity)
 
-        # iterate through slot looking for key while we have not probed the entire table
-        while slot is not None and not slot.is_tombstone:
-            if slot.key == key:
-                # return key if found
-                return slot.value
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._rehash_index = 0
 
-            # quadratic probing
-            probe_count += 1
-            index = (hash_value + probe_count**2) % self._capacity
-            slot = self._buckets.get_at_index(index)
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._mask = new_capacity - 1
+        self._tombstones = 0
+        self._version += 1
+        self._epoch += 1
 
-        return None
+        # the time goes to the steps that move the entries
+        if self._stats is not None:
+            self._stats.record_resize()
 
-    def contains_key(self, key: str) -> bool:
+    def _rehash_step(self, slots: int = None) -> None:
         """
-        Returns True if the given key is in the hash map, otherwise it returns False
+        Moves entries from the next slots of the old table into the new
+        table, dropping the old table once every slot has been visited
         """
-        # keep track of probe count
-        probe_count = 0
+        if slots is None:
+            slots = self._REHASH_SLOTS
+        if self._stats is not None:
+            start = perf_counter_ns()
 
-        # calculate hash value  for key
-        hash_value = self._hash_function(key)
+        old_buckets = self._old_buckets
+        stop = min(self._rehash_index + slots, self._old_capacity)
 
-        # initial slot for key
-        index = hash_value % self._capacity
-        # retrieve slot at the calculated index in array
+        for i in range(self._rehash_index, stop):
+            slot = old_buckets.get_at_index(i)
+            if slot is not None and not slot.is_tombstone:
+                self._place(slot)
+                # later old keys may probe past this slot, so leave a tombstone
+                old_buckets.set_at_index(i, _MOVED)
+
+        self._rehash_index = stop
+        if stop == self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+
+        if self._stats is not None:
+            self._stats.add_resize_time(perf_counter_ns() - start)
+
+    def _place(self, entry: HashEntry) -> None:
+        """
+        Moves an entry known to be absent from the table into the first free
+        slot of its probe sequence, without comparing keys
+        """
+        if self._robin_hood:
+            # migration isn't an operation of its own, so nothing is counted
+            stats, self._stats = self._stats, None
+            self._insert_robin_hood(entry, False)
+            self._stats = stats
+            return
+
+        hash_value = entry.hash
+        probe_count = 0
+        capacity, mask = self._capacity, self._mask
+        triangular = (capacity & mask) == 0
+        index = hash_value & mask if triangular else hash_value % capacity
         slot = self._buckets.get_at_index(index)
 
         while slot is not None and not slot.is_tombstone:
-            if slot.key == key:
-                return True
-
-            # increase probe count by one if current slot did not match
             probe_count += 1
-            index = (hash_value + probe_count ** 2) % self._capacity
-            # find next slot
+            if triangular:
+                index = (index + probe_count) & mask
+            else:
+                index = (hash_value + probe_count ** 2) % capacity
             slot = self._buckets.get_at_index(index)
 
-        # if loop completes without finding key, return false
-        return False
+        if slot is not None:
+            self._tombstones -= 1
+        self._buckets.set_at_index(index, entry)
+
+    def _finish_incremental_resize(self) -> None:
+        """
+        Completes any incremental resize in progress
+        """
+        if self._old_buckets is not None:
+            self._rehash_step(self._old_capacity)
+
+    def get(self, key: str) -> object:
+        """
+        Gets value of associated key. Returns None if value not found
+        """
+        return self._get(key, self._key_hash(key))
+
+    def _get(self, key: str, hash_value: int) -> object:
+        """
+        Performs get using an already computed hash value for key
+        """
+        entry = self._find_entry(key, hash_value)
+        if self._stats is not None:
+            self._stats.record('get')
+        if entry is None:
+            return None
+        return entry.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it returns False
+        """
+        entry = self._find_entry(key, self._key_hash(key))
+        if self._stats is not None:
+            self._stats.record('contains_key')
+        return entry is not None
 
     def remove(self, key: str) -> None:
         """
         Removes given key and associated value. Method does nothing if value not found.
         """
+        self._remove(key, self._key_hash(key))
 
-        probe_count = 0
-        # calculate hash value  for key
-        hash_value = self._hash_function(key)
+    def _remove(self, key: str, hash_value: int) -> None:
+        """
+        Performs remove using an already computed hash value for key
+        """
+        if self._old_buckets is not None:
+            self._rehash_step()
+
+        index = self._find_slot(self._buckets, self._capacity, key, hash_value)
+        old_index = -1
+        if index == -1 and self._old_buckets is not None:
+            old_index = self._find_slot(self._old_buckets, self._old_capacity,
+                                        key, hash_value)
+
+        if self._stats is not None:
+            self._stats.record('remove')
+
+        if index != -1:
+            if self._robin_hood:
+                # pull the rest of the cluster back instead of a tombstone
+                self._backward_shift(index)
+            else:
+                # slot becomes tombstone since value has been found
+                self._buckets.get_at_index(index).is_tombstone = True
+                self._tombstones += 1
+            self._size -= 1
+            self._version += 1
+            self._after_remove()
+
+        # entries not yet migrated always become tombstones, since shifting
+        # them could move one behind the migration cursor
+        elif old_index != -1:
+            self._old_buckets.get_at_index(old_index).is_tombstone = True
+            self._size -= 1
+            self._version += 1
+            self._after_remove()
+
+    def _after_remove(self) -> None:
+        """
+        Shrinks the table if the load fell below the shrink threshold, or
+        otherwise compacts it if tombstones crowd out empty slots
+        """
+        # no new resize starts while an incremental one is still running
+        if self._old_buckets is not None:
+            return
 
-        # initial slot for key
-        index = hash_value % self._capacity
+        if (self._shrink_threshold is not None
+                and self._capacity // 2 >= self._min_capacity
+                and self.table_load() < self._shrink_threshold):
+            self._resize(self._capacity // 2)
 
-        # quadratic probe until empty lot or key is found
-        while probe_count < self._capacity:
-            slot = self._buckets.get_at_index(index)
+        # rehash in place once tombstones crowd out empty slots
+        elif (self._tombstone_threshold is not None and self._tombstones
+                >= self._tombstone_threshold * self._capacity):
+            self._resize(self._capacity)
 
-            # if slot is none then key doesn't exist, method ends
-            if slot is None:
-                return
+    def put_many(self, pairs) -> None:
+        """
+        Updates every (key, value) pair in pairs, as put would. All keys are
+        hashed in one batch and the table is resized at most once up front,
+        so no load factor check happens per pair
+        """
+        self._finish_incremental_resize()
 
-            # if slot isn't a tombstone and slot contains key being searched
-            if not slot.is_tombstone and slot.key == key:
-                # slot becomes tombstone since value has been found
-                slot.is_tombstone = True
-                self._size -= 1
+        pairs = to_list(pairs)
+        hashes = self._hash_keys([pair[0] for pair in pairs])
+
+        # size for the worst case where every pair is a new key
+        needed = self._size + len(pairs)
+        if needed / self._capacity >= 0.5:
+            self.resize_table(needed * 2 + 1)
+
+        for i, ((key, value), hash_value) in enumerate(zip(pairs, hashes)):
+            self._insert(key, value, hash_value)
+            if self._stats is not None:
+                self._stats.record('put')
+
+            # the remaining pairs have to be hashed again with the new hash
+            if self._flooded:
+                self._use_keyed_hash()
+                self.put_many(pairs[i + 1:])
                 return
 
-            # quadratic probing
-            probe_count += 1
-            index = (hash_value + probe_count ** 2) % self._capacity
+    def _use_keyed_hash(self) -> None:
+        """
+        Switches to SipHash-2-4 under a random secret made for this map and
+        rehashes every key with it, at the current capacity
+        """
+        self._flooded = False
+        self._flood_threshold = None
+        self._keyed_hash = True
+        self._set_hash_function(make_siphash())
+
+        pairs = self.get_keys_and_values()
+
+        # pause stats so re-inserting entries isn't counted as operations
+        stats, self._stats = self._stats, None
+        start = perf_counter_ns()
+        try:
+            self.clear()
+            self.put_many(pairs)
+        finally:
+            self._stats = stats
+        if stats is not None:
+            stats.record_resize(perf_counter_ns() - start)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns dynamic array with the value of each key in keys, in input
+        order. Missing keys give None
+        """
+        keys = to_list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, self._hash_keys(keys)):
+            values.append(self._get(key, hash_value))
+        return values
 
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys. Keys not in the map are ignored
+        """
+        keys = to_list(keys)
+        for key, hash_value in zip(keys, self._hash_keys(keys)):
+            self._remove(key, hash_value)
 
     def clear(self) -> None:
         """
@@ -275,6 +909,13 @@ class HashMap:
 
         # reset size to zero
         self._size = 0
+        self._tombstones = 0
+        self._version += 1
+        self._epoch += 1
+
+        # abandon any incremental resize in progress
+        self._old_buckets = None
+        self._old_capacity = 0
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -282,37 +923,296 @@ class HashMap:
         """
         array = DynamicArray()
 
-        # iterates through buckets
-        for i in range(self._buckets.length()):
-            slot = self._buckets.get_at_index(i)
+        # iterates through buckets, including the old table during a resize
+        for buckets in (self._buckets, self._old_buckets):
+            if buckets is None:
+                continue
 
-            # appends each slot to new array
-            # check to make sure not none and not tombstone
-            if slot is not None and not slot.is_tombstone:
-                array.append((slot.key, slot.value))
+            for i in range(buckets.length()):
+                slot = buckets.get_at_index(i)
+
+                # appends each slot to new array
+                # check to make sure not none and not tombstone
+                if slot is not None and not slot.is_tombstone:
+                    array.append((slot.key, slot.value))
 
         return array
 
-    def __iter__(self):
+    def keys(self) -> KeysView:
         """
-        Enables hash map to iterate across itself
+        Returns a live view of the keys in the map
         """
-        self._index = 0
-        return self
+        return KeysView(self)
 
-    def __next__(self):
+    def values(self) -> ValuesView:
         """
-        Returns next item in hash map based on current location of iterator
+        Returns a live view of the values in the map
         """
+        return ValuesView(self)
 
-        # iterate through buckets startings from current index
-        while self._index < self._buckets.length():
-            slot = self._buckets.get_at_index(self._index)
-            self._index += 1
-            if slot is not None and not slot.is_tombstone:
-                # return slot if not none and not tombstone
-                return slot
-        raise StopIteration
+    def items(self) -> ItemsView:
+        """
+        Returns a live view of the (key, value) pairs in the map
+        """
+        return ItemsView(self)
+
+    def scan(self, cursor: int = 0, count: int = 10) -> tuple[int, DynamicArray]:
+        """
+        Walks the map a few slots per call, like Redis SCAN. Returns the
+        next cursor and a dynamic array of (key, value) tuples from the
+        count slots after cursor. Start with cursor 0 and pass each
+        returned cursor back in until it comes back as 0. Every key present
+        for the whole scan is returned once; if the table is resized
+        between calls the scan starts over, so keys may come back twice
+        """
+        if cursor < 0:
+            raise ValueError("cursor must not be negative")
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        # a cursor can't follow entries across two tables
+        self._finish_incremental_resize()
+
+        start = cursor & _CURSOR_MASK
+        if cursor >> _CURSOR_BITS != self._epoch:
+            start = 0
+        elif start > self._capacity:
+            raise ValueError("cursor is past the end of the table")
+
+        stop = min(start + count, self._capacity)
+        items = DynamicArray()
+        if self._robin_hood:
+            self._scan_homes(start, stop, items)
+        else:
+            # entries never change slots between rebuilds
+            for i in range(start, stop):
+                slot = self._buckets.get_at_index(i)
+                if slot is not None and not slot.is_tombstone:
+                    items.append((slot.key, slot.value))
+
+        if stop == self._capacity:
+            return 0, items
+        return self._epoch << _CURSOR_BITS | stop, items
+
+    def _scan_homes(self, start: int, stop: int, items: DynamicArray) -> None:
+        """
+        Appends every entry whose home slot is in [start, stop) to items.
+        Robin Hood inserts and removes move entries between slots, but never
+        change their home, and keep each cluster ordered by home slot
+        """
+        buckets, capacity = self._buckets, self._capacity
+        span = stop - start
+        offset = 0
+
+        while offset < capacity:
+            index = (start + offset) % capacity
+            slot = buckets.get_at_index(index)
+
+            if slot is None:
+                # past the range, an empty slot ends the run
+                if offset >= span:
+                    break
+            else:
+                # home slot of the entry, counted from start
+                home = offset - (index - slot.hash) % capacity
+                if home >= span:
+                    break
+                if home >= 0:
+                    items.append((slot.key, slot.value))
+
+            offset += 1
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dict describing the table: size, capacity, load, slot
+        occupancy (live, tombstone, empty) and the histogram of probe
+        lengths, the slots a lookup of each stored key examines. With stats
+        on it also holds the operation counters: per operation count and
+        slots examined, the histogram of slots examined, and resize count
+        and time
+        """
+        lengths = []
+        # slot states of the current table
+        occupancy = {'live': 0, 'tombstone': 0, 'empty': 0}
+
+        for buckets, capacity in ((self._buckets, self._capacity),
+                                  (self._old_buckets, self._old_capacity)):
+            if buckets is None:
+                continue
+            for i in range(capacity):
+                slot = buckets.get_at_index(i)
+                if slot is None:
+                    state = 'empty'
+                elif slot.is_tombstone:
+                    state = 'tombstone'
+                else:
+                    state = 'live'
+                    lengths.append(self._probe_length(slot.hash, i, capacity))
+                if buckets is self._buckets:
+                    occupancy[state] += 1
+
+        report = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'load': self.table_load(),
+            'effective_load': self.effective_load(),
+            'resizing': self._old_buckets is not None,
+            'keyed_hash': self._keyed_hash,
+            'tombstones': self._tombstones,
+            'occupancy': occupancy,
+            'probe_length_histogram': histogram(lengths),
+            'max_probe_length': max(lengths, default=0),
+            'mean_probe_length': sum(lengths) / len(lengths) if lengths else 0.0,
+        }
+        if self._stats is not None:
+            report.update(self._stats.as_dict())
+        return report
+
+    def _probe_length(self, hash_value: int, index: int, capacity: int) -> int:
+        """
+        Returns how many slots a lookup of hash_value examines to reach the
+        entry stored at index
+        """
+        if self._robin_hood:
+            return (index - hash_value) % capacity + 1
+
+        triangular = (capacity & (capacity - 1)) == 0
+        probe = hash_value % capacity
+        probe_count = 0
+        while probe != index and probe_count < capacity:
+            probe_count += 1
+            if triangular:
+                probe = (probe + probe_count) % capacity
+            else:
+                probe = (hash_value + probe_count ** 2) % capacity
+        return probe_count + 1
+
+    def reset_stats(self) -> None:
+        """
+        Sets the operation counters back to zero
+        """
+        if self._stats is not None:
+            self._stats.reset()
+
+    def save(self, path: str) -> None:
+        """
+        Writes the map to a snapshot file at path: options, capacity, hash
+        function, every live entry with its cached hash and slot, and the
+        tombstone slots that keep probe sequences intact. The hash function
+        must be importable by name
+        """
+        # a snapshot holds a single table
+        self._finish_incremental_resize()
+
+        slots, hashes, keys, values, tombstones = [], [], [], [], []
+        for i in range(self._capacity):
+            slot = self._buckets.get_at_index(i)
+            if slot is None:
+                continue
+            if slot.is_tombstone:
+                tombstones.append(i)
+            else:
+                slots.append(i)
+                hashes.append(slot.hash)
+                keys.append(slot.key)
+                values.append(slot.value)
+
+        metadata = {
+            'map': 'oa',
+            'capacity': self._capacity,
+            'size': self._size,
+            'function': function_identity(self._hash_function),
+            'keyed_hash': self._keyed_hash,
+            'min_capacity': self._min_capacity,
+            'options': {
+                'incremental_resize': self._incremental_resize,
+                'probing': 'robin_hood' if self._robin_hood else 'quadratic',
+                'tombstone_threshold': self._tombstone_threshold,
+                'shrink_threshold': self._shrink_threshold,
+                'power_of_two': self._power_of_two,
+                'flood_threshold': self._flood_threshold,
+            },
+        }
+        write_snapshot(path, metadata, (array('q', slots), pack_ints(hashes),
+                                        keys, values, array('q', tombstones)))
+
+    @classmethod
+    def load(cls, path: str, stats: bool = False,
+             function: callable = None) -> "HashMap":
+        """
+        Returns the map saved at path. Entries go straight back into their
+        slots; the hash function is only called on a few keys to check it
+        still gives the same hashes. A map saved with a keyed function, such
+        as make_siphash(secret), needs that function passed back in. One
+        with keyed_hash on gets a new random key instead, and its keys are
+        hashed again and placed in a table of the saved capacity. Raises
+        SnapshotError if the file is corrupt or doesn't match
+        """
+        metadata, (slots, hashes, keys, values, tombstones) = \
+            read_snapshot(path, 'oa')
+        if not (len(slots) == len(hashes) == len(keys) == len(values)
+                == metadata['size']):
+            raise SnapshotError("snapshot columns don't match its size")
+
+        # the key of a keyed hash isn't in the snapshot: a map that made
+        # its own key gets a new one, any other needs its function back
+        rekey = metadata['keyed_hash'] and function is None
+        if rekey:
+            function = make_siphash()
+        else:
+            function = resolve_function(metadata['function'], function)
+
+        # start from the smallest table; the saved one replaces it below
+        hash_map = cls(1, function, stats=stats, **metadata['options'])
+        capacity = metadata['capacity']
+        if hash_map._round_capacity(capacity) != capacity:
+            raise SnapshotError("snapshot capacity is not a valid table size")
+
+        hash_map._keyed_hash = metadata['keyed_hash']
+        hash_map._min_capacity = metadata['min_capacity']
+        if rekey:
+            # the saved slots belong to the old key
+            hash_map._buckets = DynamicArray([None] * capacity)
+            hash_map._capacity = capacity
+            hash_map._mask = capacity - 1
+            for key, value, hash_value in zip(keys, values,
+                                              hash_map._hash_keys(keys)):
+                hash_map._insert(key, value, hash_value)
+            return hash_map
+        check_hashes(hash_map._key_hash, keys, hashes)
+
+        table = [None] * capacity
+        try:
+            for i in range(len(slots)):
+                table[slots[i]] = HashEntry(keys[i], values[i], hashes[i])
+            for i in tombstones:
+                tombstone = table[i] = HashEntry(None, None)
+                tombstone.is_tombstone = True
+        except IndexError:
+            raise SnapshotError("snapshot slot is outside the table") from None
+
+        hash_map._buckets = DynamicArray(table)
+        hash_map._capacity = capacity
+        hash_map._mask = capacity - 1
+        hash_map._size = len(slots)
+        hash_map._tombstones = len(tombstones)
+        return hash_map
+
+    def _hash_keys(self, keys) -> list:
+        """
+        Returns hash values for a sequence of keys, in order, using the
+        vectorized version of the hash function when one is available
+        """
+        hashes = hash_many(self._hash_function, keys)
+        if self._power_of_two:
+            return list(map(mix64, hashes))
+        return hashes
+
+    def __iter__(self) -> HashMapIterator:
+        """
+        Returns a new iterator over the live entries of the map
+        """
+        return HashMapIterator(self)
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -523,3 +1423,123 @@ if __name__ == "__main__":
     print(m)
     for item in m:
         print('K:', item.key, 'V:', item.value)
+
+    print("\nincremental resize example 1")
+    print("----------------------------")
+    m = HashMap(11, hash_function_2, incremental_resize=True)
+    for i in range(100):
+        m.put('key' + str(i), i)
+        if i % 20 == 19:
+            print(m.get_size(), m.get_capacity(), m._old_buckets is not None)
+    print(all(m.get('key' + str(i)) == i for i in range(100)))
+
+    print("\nrobin hood probing example 1")
+    print("----------------------------")
+    m = HashMap(11, hash_function_1, probing='robin_hood')
+    for i in range(50):
+        m.put('key' + str(i), i)
+    for i in range(0, 50, 2):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.get_capacity(), m.empty_buckets())
+    print(all(m.get('key' + str(i)) == (i if i % 2 else None) for i in range(50)))
+
+    print("\ntombstone accounting example 1")
+    print("------------------------------")
+    m = HashMap(53, hash_function_1, tombstone_threshold=0.1)
+    for i in range(20):
+        m.put('key' + str(i), i)
+    for i in range(8):
+        m.remove('key' + str(i))
+        print(m.get_size(), m.get_tombstone_count(), m.empty_buckets(), round(m.effective_load(), 2))
+
+    print("\nshrink policy example 1")
+    print("-----------------------")
+    m = HashMap(11, hash_function_2, shrink_threshold=0.1)
+    for i in range(200):
+        m.put('key' + str(i), i)
+    print(m.get_size(), m.get_capacity())
+    for i in range(195):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.get_capacity())
+    m.shrink_to_fit()
+    print(m.get_size(), m.get_capacity(), m.get('key199'))
+
+    print("\npower of two example 1")
+    print("----------------------")
+    m = HashMap(20, hash_function_2, power_of_two=True)
+    for i in range(100):
+        m.put('key' + str(i), i)
+    print(m.get_size(), m.get_capacity(), m.empty_buckets())
+    print(all(m.get('key' + str(i)) == i for i in range(100)))
+
+    print("\nstats example 1")
+    print("---------------")
+    m = HashMap(11, hash_function_1, stats=True)
+    for i in range(100):
+        m.put('key' + str(i), i)
+    for i in range(0, 100, 2):
+        m.remove('key' + str(i))
+    stats = m.get_stats()
+    print(stats['resizes'], stats['occupancy'], stats['max_probe_length'])
+    print(stats['operations']['remove'])
+
+    print("\nflood example 1")
+    print("---------------")
+    # every key has the same character sum, so hash_function_1 collides
+    keys = ['abcdef', 'fedcba', 'badcfe', 'cfbead', 'edafcb', 'dbfcae',
+            'afbecd', 'dcbafe', 'ecafdb', 'fbdace', 'cadbef', 'bedfac']
+    m = HashMap(11, hash_function_1, flood_threshold=4)
+    for i, key in enumerate(keys):
+        m.put(key, i)
+    print(m.get_size(), m.get_stats()['keyed_hash'],
+          all(m.get(key) == i for i, key in enumerate(keys)))
+
+    print("\nviews example 1")
+    print("---------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), i * 10)
+    keys, values = m.keys(), m.values()
+    print(len(keys), '3' in keys, 30 in values, ('3', 30) in m.items())
+    m.remove('3')
+    # views are live, not copies
+    print(len(keys), '3' in keys, sorted(values))
+    try:
+        for key in keys:
+            m.put(key + '!', 0)
+    except RuntimeError as error:
+        print(error)
+
+    print("\niterator / scan example 1")
+    print("-------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), i * 10)
+    # iterators are independent, so loops can nest
+    print(sum(1 for a in m for b in m))
+    cursor, scanned = 0, []
+    while True:
+        cursor, items = m.scan(cursor, 4)
+        scanned += [items[i] for i in range(items.length())]
+        # writers may keep going between calls
+        m.put('new' + str(len(scanned)), 0)
+        if cursor == 0:
+            break
+    # every original key is seen, though a resize can repeat some
+    print(sorted(item for item in set(scanned) if item[1]))
+
+    print("\nsnapshot example 1")
+    print("------------------")
+    import os
+    import tempfile
+    m = HashMap(11, hash_function_2)
+    for i in range(50):
+        m.put('key' + str(i), i)
+    m.remove('key7')
+    path = os.path.join(tempfile.mkdtemp(), 'map.snap')
+    m.save(path)
+    loaded = HashMap.load(path)
+    print(loaded.get_size(), loaded.get_capacity(),
+          sorted(loaded.items()) == sorted(m.items()),
+          loaded.get('key42'), loaded.contains_key('key7'))
+    os.remove(path)
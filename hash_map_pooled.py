@@ -0,0 +1,347 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Separate chaining hash map whose entries live in one pooled
+#              set of parallel arrays (hashes, keys, values, next index)
+#              instead of one SLNode object per entry. Each bucket is the
+#              index of its first entry; chains are linked by integer next
+#              indexes, so resizing relinks entries in place.
+
+from array import array
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2,
+                        is_prime, next_prime, to_list)
+from hash_functions import hash_many
+
+
+# hashes are stored as unsigned 64 bit values
+_MASK_64 = (1 << 64) - 1
+
+# end of a chain, and of the free list
+_NONE = -1
+
+# key of a pool slot whose entry was removed
+_FREE = object()
+
+
+class PooledHashMap:
+    def __init__(self, capacity: int = 11, function=hash_function_1) -> None:
+        """
+        Initialize new HashMap that uses separate chaining for collision
+        resolution, with every entry stored in shared pool arrays and
+        chains linked by index
+        """
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._heads = array('q', [_NONE]) * self._capacity
+
+        self._hash_function = function
+        self._size = 0
+        self._allocate_pool()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            chain = []
+            slot = self._heads[i]
+            while slot != _NONE:
+                chain.append(f"({self._keys[slot]}: {self._values[slot]})")
+                slot = self._next[slot]
+            out += str(i) + ': SLL [' + ' -> '.join(chain) + ']\n'
+        return out
+
+    def _allocate_pool(self) -> None:
+        """
+        Create a fresh, empty entry pool
+        """
+        self._hashes = array('Q')
+        self._next = array('q')
+        self._keys = []
+        self._values = []
+
+        # removed slots are reused, linked through _next
+        self._free = _NONE
+        self._free_count = 0
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _hash(self, key: str) -> int:
+        """
+        Returns the stored (64 bit) hash of key
+        """
+        return self._hash_function(key) & _MASK_64
+
+    def _find(self, key: str, hash_value: int) -> int:
+        """
+        Returns pool slot holding key, or -1 if key is not in the map
+        """
+        hashes, keys, next_slots = self._hashes, self._keys, self._next
+        slot = self._heads[hash_value % self._capacity]
+
+        # compare cached hash first so most mismatches skip key ==
+        while slot != _NONE:
+            if hashes[slot] == hash_value and keys[slot] == key:
+                return slot
+            slot = next_slots[slot]
+
+        return _NONE
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pair in hash map. If given key already exists, its
+        value is replaced with the new value. Otherwise the key/value is added
+        """
+        self._put(key, value, self._hash(key))
+
+        # double capacity if load is greater than 1
+        if self._size > self._capacity:
+            self.resize_table(self._capacity * 2)
+
+    def _put(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Performs put using an already computed hash value for key, without
+        checking the load factor
+        """
+        slot = self._find(key, hash_value)
+        if slot != _NONE:
+            self._values[slot] = value
+            return
+
+        # reuse a removed slot, or grow the pool by one
+        if self._free != _NONE:
+            slot = self._free
+            self._free = self._next[slot]
+            self._free_count -= 1
+            self._hashes[slot] = hash_value
+            self._keys[slot] = key
+            self._values[slot] = value
+        else:
+            slot = len(self._keys)
+            self._hashes.append(hash_value)
+            self._next.append(_NONE)
+            self._keys.append(key)
+            self._values.append(value)
+
+        # link new entry at the front of its chain
+        index = hash_value % self._capacity
+        self._next[slot] = self._heads[index]
+        self._heads[index] = slot
+        self._size += 1
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in the hash table
+        """
+        return self._heads.count(_NONE)
+
+    def table_load(self) -> float:
+        """
+        Returns current hash table load factor
+        """
+        return self._size / self._capacity
+
+    def clear(self) -> None:
+        """
+        Clears contents of hash map while retaining underlying hash table
+        capacity
+        """
+        self._heads = array('q', [_NONE]) * self._capacity
+        self._size = 0
+        self._allocate_pool()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        changes capacity of internal hash table while keeping existing
+        key/value pairs. Entries stay where they are in the pool and are
+        only relinked into the new chains, reusing their stored hashes
+        """
+        # ends method if new capacity is less than 1
+        if new_capacity < 1:
+            return
+
+        # check if prime, if not prime set next prime
+        if not is_prime(new_capacity):
+            new_capacity = next_prime(new_capacity)
+
+        # squeeze out removed slots while every link is rebuilt anyway
+        if self._free_count:
+            self._compact_pool()
+
+        heads = array('q', [_NONE]) * new_capacity
+        hashes, next_slots = self._hashes, self._next
+
+        for slot in range(len(hashes)):
+            index = hashes[slot] % new_capacity
+            next_slots[slot] = heads[index]
+            heads[index] = slot
+
+        self._heads = heads
+        self._capacity = new_capacity
+
+    def _compact_pool(self) -> None:
+        """
+        Moves live entries to the front of the pool, dropping removed slots.
+        Chain links are left stale for resize_table to rebuild
+        """
+        live = [slot for slot, key in enumerate(self._keys) if key is not _FREE]
+
+        hashes = array('Q', (self._hashes[slot] for slot in live))
+        keys = [self._keys[slot] for slot in live]
+        values = [self._values[slot] for slot in live]
+
+        self._allocate_pool()
+        self._hashes, self._keys, self._values = hashes, keys, values
+        self._next = array('q', [_NONE]) * len(live)
+
+    def get(self, key: str) -> object:
+        """
+        Gets value of associated key. Returns None if value not found
+        """
+        slot = self._find(key, self._hash(key))
+        if slot == _NONE:
+            return None
+        return self._values[slot]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it
+        returns False
+        """
+        return self._find(key, self._hash(key)) != _NONE
+
+    def remove(self, key: str) -> None:
+        """
+        Removes given key and associated value. Method does nothing if value
+        not found.
+        """
+        self._remove(key, self._hash(key))
+
+    def _remove(self, key: str, hash_value: int) -> None:
+        """
+        Performs remove using an already computed hash value for key
+        """
+        hashes, keys, next_slots = self._hashes, self._keys, self._next
+        index = hash_value % self._capacity
+        previous, slot = _NONE, self._heads[index]
+
+        while slot != _NONE:
+            if hashes[slot] == hash_value and keys[slot] == key:
+                break
+            previous, slot = slot, next_slots[slot]
+        else:
+            return
+
+        # unlink from the chain
+        if previous == _NONE:
+            self._heads[index] = next_slots[slot]
+        else:
+            next_slots[previous] = next_slots[slot]
+
+        # drop references and put the slot on the free list
+        keys[slot] = _FREE
+        self._values[slot] = None
+        next_slots[slot] = self._free
+        self._free = slot
+        self._free_count += 1
+        self._size -= 1
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every (key, value) pair in pairs, as put would. All keys are
+        hashed in one batch and the table is resized at most once up front
+        """
+        pairs = to_list(pairs)
+        hashes = hash_many(self._hash_function, [pair[0] for pair in pairs])
+
+        # size for the worst case where every pair is a new key
+        needed = self._size + len(pairs)
+        if needed > self._capacity:
+            self.resize_table(needed)
+
+        for (key, value), hash_value in zip(pairs, hashes):
+            self._put(key, value, hash_value & _MASK_64)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns dynamic array with the value of each key in keys, in input
+        order. Missing keys give None
+        """
+        keys = to_list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, hash_many(self._hash_function, keys)):
+            slot = self._find(key, hash_value & _MASK_64)
+            values.append(None if slot == _NONE else self._values[slot])
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys. Keys not in the map are ignored
+        """
+        keys = to_list(keys)
+        for key, hash_value in zip(keys, hash_many(self._hash_function, keys)):
+            self._remove(key, hash_value & _MASK_64)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        returns dynamic array where each index contains a tuple of a
+        key/value pair
+        """
+        result = DynamicArray()
+        for key, value in zip(self._keys, self._values):
+            if key is not _FREE:
+                result.append((key, value))
+        return result
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPooled - put example 1")
+    print("----------------------")
+    m = PooledHashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPooled - contains_key / remove example 1")
+    print("----------------------------------------")
+    m = PooledHashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+    result = True
+    for key in keys:
+        # all inserted keys must be present
+        result &= m.contains_key(str(key))
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result)
+    for key in keys[::2]:
+        m.remove(str(key))
+    print(m.get_size(), all(m.get(str(key)) == key * 42 for key in keys[1::2]))
+
+    print("\nPooled - get_keys_and_values example 1")
+    print("--------------------------------------")
+    m = PooledHashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+    m.resize_table(2)
+    print(m.get_keys_and_values())
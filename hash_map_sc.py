@@ -6,29 +6,157 @@
 # Description: Implementation of SC hash map
 
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+from functools import partial
+from time import perf_counter_ns
+
+from a6_include import (DynamicArray, LinkedList, SLNode,
+                        hash_function_1, hash_function_2, to_list)
+from hash_family import make_siphash
+from hash_functions import hash_many, mix64, mixed_hash
+from hash_map_snapshot import (SnapshotError, check_hashes,
+                               function_identity, pack_ints, read_snapshot,
+                               resolve_function, write_snapshot)
+from hash_map_stats import MapStats, histogram
+from hash_map_views import ItemsView, KeysView, ValuesView
+from tree_bucket import TreeBucket
+
+# scan cursors keep the bucket position in their low bits and the table
+# epoch they were issued for above them
+_CURSOR_BITS = 40
+_CURSOR_MASK = (1 << _CURSOR_BITS) - 1
+
+
+class HashMapIterator:
+    """
+    Iterator over the nodes of a HashMap. Each one keeps its own cursor,
+    so any number can walk the same map at once. Raises RuntimeError if
+    keys are added or removed, or the table is resized, while it is in use
+    """
+
+    __slots__ = ('_map', '_buckets', '_index', '_node', '_version')
+
+    def __init__(self, hash_map: "HashMap") -> None:
+        """Initialize the iterator before the first bucket of the map."""
+        # walk a single table; iteration is O(n) anyway
+        hash_map._finish_incremental_resize()
+        self._map = hash_map
+        self._buckets = hash_map._buckets
+        self._index = 0
+        self._node = None
+        self._version = hash_map._version
+
+    def __iter__(self) -> "HashMapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self) -> SLNode:
+        """Obtain next node and advance iterator."""
+        if self._map._version != self._version:
+            raise RuntimeError("hash map changed during iteration")
+
+        # move on to the next non-empty bucket once a chain runs out
+        node = self._node
+        while node is None:
+            if self._index == self._buckets.length():
+                raise StopIteration
+            node = self._buckets.get_at_index(self._index)._head
+            self._index += 1
+
+        self._node = node.next
+        return node
 
 
 class HashMap:
+    # old table buckets migrated per operation during an incremental resize
+    _REHASH_BUCKETS = 4
+
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 incremental_resize: bool = False,
+                 shrink_threshold: float = None,
+                 power_of_two: bool = False,
+                 stats: bool = False,
+                 keyed_hash: bool = False,
+                 flood_threshold: int = None,
+                 treeify_threshold: int = None) -> None:
         """
         Initialize new HashMap that uses
-        separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        separate chaining for collision resolution.
+        With incremental_resize, growing the table moves entries over a few
+        buckets per operation instead of all at once inside put.
+        With shrink_threshold, remove halves the table when the load drops
+        below it, never below the starting capacity. It must be under .5
+        so a shrunk table stays clear of the 1.0 growth threshold.
+        With power_of_two, capacities are powers of two instead of primes
+        and hashes go through a mixing finalizer before indexing.
+        With stats, every operation records how many chain nodes it
+        examined; see get_stats.
+        With keyed_hash, keys are hashed with SipHash-2-4 under a random
+        secret made for this map instead of function, so nobody can pick
+        keys that collide. With flood_threshold, the map starts with
+        function but switches to that keyed hash, rehashing every key,
+        the first time an insert walks more than flood_threshold nodes.
+        With treeify_threshold, a chain longer than that becomes a sorted
+        TreeBucket searched by bisect, and turns back into a linked list
+        once it is down to three quarters of the threshold
         """
+        if shrink_threshold is not None and not 0 < shrink_threshold < 0.5:
+            raise ValueError("shrink_threshold must be between 0 and .5")
+        if flood_threshold is not None and flood_threshold < 1:
+            raise ValueError("flood_threshold must be at least 1")
+        if treeify_threshold is not None and treeify_threshold < 2:
+            raise ValueError("treeify_threshold must be at least 2")
+
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two in that mode
+        self._power_of_two = power_of_two
+        if power_of_two:
+            self._capacity = self._next_power_of_two(capacity)
+        else:
+            self._capacity = self._next_prime(capacity)
+        # power of two tables index with hash & mask instead of hash % capacity
+        self._mask = self._capacity - 1
         for _ in range(self._capacity):
             self._buckets.append(LinkedList())
 
-        self._hash_function = function
+        # a keyed hash is only ever switched to once
+        self._keyed_hash = keyed_hash
+        self._flood_threshold = None if keyed_hash else flood_threshold
+        self._flooded = False
+        self._set_hash_function(make_siphash() if keyed_hash else function)
         self._size = 0
 
+        # bumped whenever keys are added or removed or the table is rebuilt,
+        # so iterators can tell the map changed under them
+        self._version = 0
+
+        # bumped whenever entries move to other buckets, so scan can tell a
+        # cursor belongs to an earlier table
+        self._epoch = 0
+
+        # shrinking never goes below the starting capacity
+        self._shrink_threshold = shrink_threshold
+        self._min_capacity = self._capacity
+
+        # old table and next bucket to migrate while an incremental resize
+        # runs; new table buckets past _fill_index are created lazily
+        self._incremental_resize = incremental_resize
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._old_mask = 0
+        self._rehash_index = 0
+        self._fill_index = 0
+
+        # operation counters, None unless statistics are on
+        self._stats = MapStats() if stats else None
+
+        # chain lengths at which buckets become sorted and go back again
+        self._treeify_threshold = treeify_threshold
+        if treeify_threshold is not None:
+            self._untreeify_threshold = treeify_threshold * 3 // 4
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -72,6 +200,37 @@ class HashMap:
 
         return True
 
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Returns the smallest power of two that is at least capacity (and 2)
+        """
+        return 1 << max(capacity - 1, 1).bit_length()
+
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Rounds a requested capacity up to the next prime, or to the next
+        power of two in power_of_two mode
+        """
+        if self._power_of_two:
+            return self._next_power_of_two(capacity)
+        if self._is_prime(capacity):
+            return capacity
+        return self._next_prime(capacity)
+
+    def _set_hash_function(self, function) -> None:
+        """
+        Makes function the hash function for keys
+        """
+        self._hash_function = function
+
+        # power of two tables index with the low bits only, so key hashes
+        # are mixed first; the mixed hash is what entries cache
+        if self._power_of_two:
+            self._key_hash = partial(mixed_hash, function)
+        else:
+            self._key_hash = function
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -93,29 +252,92 @@ class HashMap:
         Updates key/value pair in hash  map. If given key already exists, its value must be replaced with the new value.
         Otherwise the value is added
         """
-        # finds hash value for key
-        hash = self._hash_function(key)
-        # finds index of new key
-        index = hash % self._capacity
+        self._put(key, value, self._key_hash(key))
+        if self._stats is not None:
+            self._stats.record('put')
 
-        bucket = self._buckets[index]
-        node = bucket._head
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Performs put using an already computed hash value for key
+        """
+        if self._old_buckets is not None:
+            self._rehash_step()
 
-        # check to see if there's a key that matches current key
-        while node is not None:
-            if node.key == key:
-                # updates node's value
+        # a key still waiting in the old table is updated where it is
+        if self._old_buckets is not None:
+            node = self._find_old_node(key, hash)
+            if node is not None:
                 node.value = value
                 return
-            node = node.next
 
-        # attach key, value to bucket
-        bucket.insert(key, value)
-        self._size += 1
+        self._insert(key, value, hash)
+        if self._flooded:
+            self._use_keyed_hash()
 
         # double capacity if load is greater than 1
         if self.table_load() > 1.0:
-            self.resize_table(self._capacity * 2)
+            self._resize(self._capacity * 2)
+
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Places key/value in its bucket without checking the load factor
+        """
+        # finds index of new key
+        if self._power_of_two:
+            index = hash & self._mask
+        else:
+            index = hash % self._capacity
+
+        bucket = self._buckets[index]
+        if bucket is None:
+            bucket = self._new_bucket(index)
+
+        if type(bucket) is TreeBucket:
+            node = bucket.contains(key, hash)
+            probes = bucket.search_cost()
+            if node is not None:
+                node.value = value
+        else:
+            node = bucket._head
+            probes = 0
+
+            # check to see if there's a key that matches current key,
+            # comparing cached hashes first to skip most key comparisons
+            while node is not None:
+                probes += 1
+                if node.hash == hash and node.key == key:
+                    # updates node's value
+                    node.value = value
+                    break
+                node = node.next
+
+        if self._stats is not None:
+            self._stats.add_probes(probes)
+        if node is not None:
+            return
+
+        # a chain this long suggests keys chosen to collide
+        if (self._flood_threshold is not None
+                and probes > self._flood_threshold):
+            self._flooded = True
+
+        # attach key, value and hash to bucket
+        bucket.insert(key, value, hash)
+        self._size += 1
+        self._version += 1
+
+        if self._treeify_threshold is not None:
+            self._treeify(self._buckets, index)
+
+    def _treeify(self, buckets: DynamicArray, index: int) -> None:
+        """
+        Converts the linked list at index to a TreeBucket if it has grown
+        longer than the treeify threshold
+        """
+        bucket = buckets.get_at_index(index)
+        if (type(bucket) is not TreeBucket
+                and bucket.length() > self._treeify_threshold):
+            buckets.set_at_index(index, TreeBucket(bucket))
 
     def empty_buckets(self) -> int:
         """
@@ -126,7 +348,7 @@ class HashMap:
         # counts one for every empty bucket
         for i in range(self._buckets.length()):
             bucket = self._buckets[i]
-            if bucket._head is None:
+            if bucket is None or bucket._head is None:
                 count += 1
 
         return count
@@ -153,19 +375,46 @@ class HashMap:
 
         # reset size to zero
         self._size = 0
+        self._version += 1
+        self._epoch += 1
+
+        # abandon any incremental resize in progress
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._old_mask = 0
 
     def resize_table(self, new_capacity: int) -> None:
         """
-        changes capacity of internal hash table while keeping existing key/value pairs
+        changes capacity of internal hash table while keeping existing key/value pairs.
+        Keys are not rehashed; each node's cached hash is reused
         """
 
         # ends method if new capacity is less than 1
         if new_capacity < 1:
             return
 
-        # check if prime, if not prime set next prime
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
+        if self._stats is None:
+            self._rebuild(new_capacity)
+            return
+
+        # pause stats so moving entries isn't counted as operations
+        stats, self._stats = self._stats, None
+        start = perf_counter_ns()
+        try:
+            self._rebuild(new_capacity)
+        finally:
+            self._stats = stats
+        stats.record_resize(perf_counter_ns() - start)
+
+    def _rebuild(self, new_capacity: int) -> None:
+        """
+        Moves every node into a new table of new_capacity
+        """
+        # an explicit resize always completes in this call
+        self._finish_incremental_resize()
+
+        # round up to the next prime, or power of two in that mode
+        new_capacity = self._round_capacity(new_capacity)
 
         # create new buckets with new capacity
         new_buckets = DynamicArray()
@@ -173,6 +422,7 @@ class HashMap:
             new_buckets.append(LinkedList())
 
         old_buckets = self._buckets
+        power_of_two, mask = self._power_of_two, new_capacity - 1
 
         # rehash keys and values into new buckets
         for i in range(old_buckets.length()):
@@ -180,65 +430,374 @@ class HashMap:
             node = bucket._head
 
             while node is not None:
-                # find hash and index for resized table
-                hash = self._hash_function(node.key)
-                index = hash % new_capacity
+                # find index for resized table from the cached hash
+                if power_of_two:
+                    index = node.hash & mask
+                else:
+                    index = node.hash % new_capacity
                 new_bucket = new_buckets[index]
-                # put key, value into bucket
-                new_bucket.insert(node.key, node.value)
+                # put key, value and hash into bucket
+                new_bucket.insert(node.key, node.value, node.hash)
 
                 node = node.next
 
+        # sort the chains that came out long
+        if self._treeify_threshold is not None:
+            for index in range(new_capacity):
+                self._treeify(new_buckets, index)
+
         # update buckets and capacity
         self._buckets = new_buckets
         self._capacity = new_capacity
+        self._mask = mask
+        self._version += 1
+        self._epoch += 1
 
+    def _resize(self, new_capacity: int) -> None:
+        """
+        Resizes for growth or shrinking, incrementally if that mode is on
+        """
+        if self._incremental_resize:
+            self._start_incremental_resize(new_capacity)
+        else:
+            self.resize_table(new_capacity)
 
-    def get(self, key: str):
+    def shrink_to_fit(self) -> None:
         """
-        Gets value of associated key. Returns None if value not found
+        Resizes the table to the smallest capacity that holds the current
+        entries at a load of at most 1.0
         """
-        # calculates index
-        index = self._hash_function(key) % self._capacity
-        # retrieves bucket at calculated index
-        bucket = self._buckets.get_at_index(index)
+        self.resize_table(max(self._size, 1))
 
-        node = bucket._head
+    def _start_incremental_resize(self, new_capacity: int) -> None:
+        """
+        Swaps in an empty table of new_capacity and keeps the current one as
+        the old table; its buckets move over a few at a time per operation.
+        The new table starts out as None slots so no linked lists are
+        allocated up front
+        """
+        # only one migration runs at a time
+        self._finish_incremental_resize()
+
+        # round up to the next prime, or power of two in that mode
+        new_capacity = self._round_capacity(new_capacity)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._old_mask = self._mask
+        self._rehash_index = 0
+        self._fill_index = 0
 
-        # iterate through nodes looking for key
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._mask = new_capacity - 1
+        self._version += 1
+        self._epoch += 1
+
+        # the time goes to the steps that move the buckets
+        if self._stats is not None:
+            self._stats.record_resize()
+
+    def _rehash_step(self, buckets: int = None) -> None:
+        """
+        Moves the next buckets of the old table into the new table, dropping
+        the old table once every bucket has been moved
+        """
+        if buckets is None:
+            buckets = self._REHASH_BUCKETS
+        if self._stats is not None:
+            start = perf_counter_ns()
+
+        old_buckets = self._old_buckets
+        stop = min(self._rehash_index + buckets, self._old_capacity)
+        power_of_two, mask = self._power_of_two, self._mask
+
+        for i in range(self._rehash_index, stop):
+            node = old_buckets.get_at_index(i)._head
+
+            while node is not None:
+                if power_of_two:
+                    index = node.hash & mask
+                else:
+                    index = node.hash % self._capacity
+                new_bucket = self._buckets.get_at_index(index)
+                if new_bucket is None:
+                    new_bucket = self._new_bucket(index)
+                new_bucket.insert(node.key, node.value, node.hash)
+                if self._treeify_threshold is not None:
+                    self._treeify(self._buckets, index)
+                node = node.next
+
+            # buckets before _rehash_index are never read again
+            old_buckets.set_at_index(i, None)
+
+        # create the new table's remaining empty buckets at the same pace,
+        # so every bucket exists once migration finishes
+        fill_stop = self._capacity * stop // self._old_capacity
+        for i in range(self._fill_index, fill_stop):
+            if self._buckets.get_at_index(i) is None:
+                self._buckets.set_at_index(i, LinkedList())
+        self._fill_index = fill_stop
+
+        self._rehash_index = stop
+        if stop == self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+            self._old_mask = 0
+
+        if self._stats is not None:
+            self._stats.add_resize_time(perf_counter_ns() - start)
+
+    def _finish_incremental_resize(self) -> None:
+        """
+        Completes any incremental resize in progress
+        """
+        if self._old_buckets is not None:
+            self._rehash_step(self._old_capacity)
+
+    def _new_bucket(self, index: int) -> LinkedList:
+        """
+        Creates the not yet allocated bucket at index in the new table
+        """
+        bucket = LinkedList()
+        self._buckets.set_at_index(index, bucket)
+        return bucket
+
+    def _find_old_node(self, key: str, hash: int):
+        """
+        Returns node for key from the part of the old table not yet migrated,
+        or None if it isn't there
+        """
+        if self._power_of_two:
+            index = hash & self._old_mask
+        else:
+            index = hash % self._old_capacity
+        if index < self._rehash_index:
+            return None
+        return self._search_bucket(self._old_buckets.get_at_index(index),
+                                   key, hash)
+
+    def _search_bucket(self, bucket: LinkedList, key: str, hash: int):
+        """
+        Returns node for key in bucket (which may be None), or None if it
+        isn't there. With stats on, the nodes examined are counted
+        """
+        if bucket is None:
+            return None
+        if self._stats is None:
+            return bucket.contains(key, hash)
+        if type(bucket) is TreeBucket:
+            self._stats.add_probes(bucket.search_cost())
+            return bucket.contains(key, hash)
+
+        probes = 0
+        node = bucket._head
         while node is not None:
-            if node.key == key:
-                # return key if found
-                return node.value
+            probes += 1
+            if node.hash == hash and node.key == key:
+                break
             node = node.next
-        return None
+
+        self._stats.add_probes(probes)
+        return node
+
+    def _find_node(self, key: str, hash: int):
+        """
+        Returns node for key, looking in the old table as well while an
+        incremental resize is in progress. Returns None if not found
+        """
+        if self._old_buckets is not None:
+            self._rehash_step()
+
+        if self._power_of_two:
+            bucket = self._buckets.get_at_index(hash & self._mask)
+        else:
+            bucket = self._buckets.get_at_index(hash % self._capacity)
+        node = self._search_bucket(bucket, key, hash)
+        if node is None and self._old_buckets is not None:
+            node = self._find_old_node(key, hash)
+        return node
+
+    def get(self, key: str):
+        """
+        Gets value of associated key. Returns None if value not found
+        """
+        return self._get(key, self._key_hash(key))
+
+    def _get(self, key: str, hash: int):
+        """
+        Performs get using an already computed hash value for key
+        """
+        node = self._find_node(key, hash)
+        if self._stats is not None:
+            self._stats.record('get')
+        if node is None:
+            return None
+        return node.value
 
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the given key is in the hash map, otherwise it returns False
         """
-        # calculates index
-        index = self._hash_function(key) % self._capacity
-        # retrieves bucket at calculated index
-        bucket = self._buckets.get_at_index(index)
-
-        node = bucket.contains(key)
+        node = self._find_node(key, self._key_hash(key))
+        if self._stats is not None:
+            self._stats.record('contains_key')
         return node is not None
 
     def remove(self, key: str) -> None:
         """
         Removes given key and associated value. Method does nothing if value not found.
         """
+        self._remove(key, self._key_hash(key))
+
+    def _remove(self, key: str, hash: int) -> None:
+        """
+        Performs remove using an already computed hash value for key
+        """
+        if self._old_buckets is not None:
+            self._rehash_step()
+
         # calculates index
-        index = self._hash_function(key) % self._capacity
-        # retrieves bucket at calculated index
-        bucket = self._buckets.get_at_index(index)
+        if self._power_of_two:
+            index = hash & self._mask
+        else:
+            index = hash % self._capacity
+        removed = self._remove_from_bucket(self._buckets, index, key, hash)
+
+        # a key not yet migrated is removed from the old table instead
+        if not removed and self._old_buckets is not None:
+            if self._power_of_two:
+                index = hash & self._old_mask
+            else:
+                index = hash % self._old_capacity
+            if index >= self._rehash_index:
+                removed = self._remove_from_bucket(self._old_buckets, index,
+                                                   key, hash)
+
+        if self._stats is not None:
+            self._stats.record('remove')
 
         # if keys exist, remove key
-        if bucket.contains(key):
-            bucket.remove(key)
+        if removed:
             # hash map size decreases by 1
             self._size -= 1
+            self._version += 1
+
+            # halve the table once load drops below the shrink threshold,
+            # but never start a resize while an incremental one is running
+            if (self._shrink_threshold is not None
+                    and self._old_buckets is None
+                    and self._capacity // 2 >= self._min_capacity
+                    and self.table_load() < self._shrink_threshold):
+                self._resize(self._capacity // 2)
+
+    def _remove_from_bucket(self, buckets: DynamicArray, index: int,
+                            key: str, hash: int) -> bool:
+        """
+        Unlinks the node for key from the bucket at index, walking the
+        chain once. Returns True if the key was there
+        """
+        bucket = buckets.get_at_index(index)
+        if bucket is None:
+            return False
+
+        if type(bucket) is TreeBucket:
+            if self._stats is not None:
+                self._stats.add_probes(bucket.search_cost())
+            if not bucket.remove(key, hash):
+                return False
+            if bucket.length() <= self._untreeify_threshold:
+                buckets.set_at_index(index, bucket.to_linked_list())
+            return True
+
+        previous, node = None, bucket._head
+        probes = 0
+        while node is not None:
+            probes += 1
+            if node.hash == hash and node.key == key:
+                break
+            previous, node = node, node.next
+
+        if self._stats is not None:
+            self._stats.add_probes(probes)
+        if node is None:
+            return False
+
+        if previous is None:
+            bucket._head = node.next
+        else:
+            previous.next = node.next
+        bucket._size -= 1
+        return True
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every (key, value) pair in pairs, as put would. All keys are
+        hashed in one batch and the table is resized at most once up front,
+        so no load factor check happens per pair
+        """
+        self._finish_incremental_resize()
+
+        pairs = to_list(pairs)
+        hashes = self._hash_keys([pair[0] for pair in pairs])
+
+        # size for the worst case where every pair is a new key
+        needed = self._size + len(pairs)
+        if needed > self._capacity:
+            self.resize_table(needed)
+
+        for i, ((key, value), hash) in enumerate(zip(pairs, hashes)):
+            self._insert(key, value, hash)
+            if self._stats is not None:
+                self._stats.record('put')
+
+            # the remaining pairs have to be hashed again with the new hash
+            if self._flooded:
+                self._use_keyed_hash()
+                self.put_many(pairs[i + 1:])
+                return
+
+    def _use_keyed_hash(self) -> None:
+        """
+        Switches to SipHash-2-4 under a random secret made for this map and
+        rehashes every key with it, at the current capacity
+        """
+        self._flooded = False
+        self._flood_threshold = None
+        self._keyed_hash = True
+        self._set_hash_function(make_siphash())
+
+        pairs = self.get_keys_and_values()
+
+        # pause stats so re-inserting entries isn't counted as operations
+        stats, self._stats = self._stats, None
+        start = perf_counter_ns()
+        try:
+            self.clear()
+            self.put_many(pairs)
+        finally:
+            self._stats = stats
+        if stats is not None:
+            stats.record_resize(perf_counter_ns() - start)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns dynamic array with the value of each key in keys, in input
+        order. Missing keys give None
+        """
+        keys = to_list(keys)
+        values = DynamicArray()
+        for key, hash in zip(keys, self._hash_keys(keys)):
+            values.append(self._get(key, hash))
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys. Keys not in the map are ignored
+        """
+        keys = to_list(keys)
+        for key, hash in zip(keys, self._hash_keys(keys)):
+            self._remove(key, hash)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -246,17 +805,233 @@ class HashMap:
         """
         array = DynamicArray()
 
-        # iterates through buckets
-        for i in range(self._buckets.length()):
-            bucket = self._buckets.get_at_index(i)
-            node = bucket._head
+        # iterates through buckets, including the old table during a resize
+        for buckets in (self._buckets, self._old_buckets):
+            if buckets is None:
+                continue
+
+            for i in range(buckets.length()):
+                bucket = buckets.get_at_index(i)
+                # migrated old buckets are None
+                if bucket is None:
+                    continue
+                node = bucket._head
+
+                # appends each node to new array
+                while node is not None:
+                    array.append((node.key, node.value))
+                    node = node.next
 
-            # appends each node to new array
+        return array
+
+    def keys(self) -> KeysView:
+        """
+        Returns a live view of the keys in the map
+        """
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """
+        Returns a live view of the values in the map
+        """
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Returns a live view of the (key, value) pairs in the map
+        """
+        return ItemsView(self)
+
+    def __iter__(self) -> HashMapIterator:
+        """
+        Returns a new iterator over the nodes of the map
+        """
+        return HashMapIterator(self)
+
+    def scan(self, cursor: int = 0, count: int = 10) -> tuple[int, DynamicArray]:
+        """
+        Walks the map a few buckets per call, like Redis SCAN. Returns the
+        next cursor and a dynamic array of (key, value) tuples from the
+        count buckets after cursor. Start with cursor 0 and pass each
+        returned cursor back in until it comes back as 0. Every key present
+        for the whole scan is returned once; if the table is resized
+        between calls the scan starts over, so keys may come back twice
+        """
+        if cursor < 0:
+            raise ValueError("cursor must not be negative")
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        # a cursor can't follow entries across two tables
+        self._finish_incremental_resize()
+
+        start = cursor & _CURSOR_MASK
+        if cursor >> _CURSOR_BITS != self._epoch:
+            start = 0
+        elif start > self._capacity:
+            raise ValueError("cursor is past the end of the table")
+
+        # nodes never change buckets between rebuilds
+        stop = min(start + count, self._capacity)
+        items = DynamicArray()
+        for i in range(start, stop):
+            node = self._buckets.get_at_index(i)._head
             while node is not None:
-                array.append((node.key, node.value))
+                items.append((node.key, node.value))
                 node = node.next
 
-        return array
+        if stop == self._capacity:
+            return 0, items
+        return self._epoch << _CURSOR_BITS | stop, items
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dict describing the table: size, capacity, load, the
+        histogram of chain lengths (bucket occupancy) and the number of
+        treeified buckets. With stats on it also
+        holds the operation counters: per operation count and chain nodes
+        examined, the histogram of nodes examined, and resize count and time
+        """
+        lengths = []
+        tree_buckets = 0
+        for buckets in (self._buckets, self._old_buckets):
+            if buckets is None:
+                continue
+            for i in range(buckets.length()):
+                bucket = buckets.get_at_index(i)
+                # lazily created and migrated buckets are empty
+                lengths.append(0 if bucket is None else bucket.length())
+                tree_buckets += type(bucket) is TreeBucket
+
+        chains = [length for length in lengths if length]
+        report = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'load': self.table_load(),
+            'resizing': self._old_buckets is not None,
+            'keyed_hash': self._keyed_hash,
+            'tree_buckets': tree_buckets,
+            'chain_length_histogram': histogram(lengths),
+            'max_chain_length': max(chains, default=0),
+            'mean_chain_length': sum(chains) / len(chains) if chains else 0.0,
+        }
+        if self._stats is not None:
+            report.update(self._stats.as_dict())
+        return report
+
+    def reset_stats(self) -> None:
+        """
+        Sets the operation counters back to zero
+        """
+        if self._stats is not None:
+            self._stats.reset()
+
+    def save(self, path: str) -> None:
+        """
+        Writes the map to a snapshot file at path: options, capacity, hash
+        function and every entry with its cached hash, bucket by bucket in
+        chain order. The hash function must be importable by name
+        """
+        # a snapshot holds a single table
+        self._finish_incremental_resize()
+
+        hashes, keys, values = [], [], []
+        for i in range(self._capacity):
+            node = self._buckets.get_at_index(i)._head
+            while node is not None:
+                hashes.append(node.hash)
+                keys.append(node.key)
+                values.append(node.value)
+                node = node.next
+
+        metadata = {
+            'map': 'sc',
+            'capacity': self._capacity,
+            'size': self._size,
+            'function': function_identity(self._hash_function),
+            'keyed_hash': self._keyed_hash,
+            'min_capacity': self._min_capacity,
+            'options': {
+                'incremental_resize': self._incremental_resize,
+                'shrink_threshold': self._shrink_threshold,
+                'power_of_two': self._power_of_two,
+                'flood_threshold': self._flood_threshold,
+                'treeify_threshold': self._treeify_threshold,
+            },
+        }
+        write_snapshot(path, metadata, (pack_ints(hashes), keys, values))
+
+    @classmethod
+    def load(cls, path: str, stats: bool = False,
+             function: callable = None) -> "HashMap":
+        """
+        Returns the map saved at path. Entries go straight back into their
+        buckets under their stored hashes; the hash function is only called
+        on a few keys to check it still gives the same hashes. A map saved
+        with a keyed function, such as make_siphash(secret), needs that
+        function passed back in. One with keyed_hash on gets a new random
+        key instead, and its keys are hashed again. Raises SnapshotError if
+        the file is corrupt or doesn't match
+        """
+        metadata, (hashes, keys, values) = read_snapshot(path, 'sc')
+        if not len(hashes) == len(keys) == len(values) == metadata['size']:
+            raise SnapshotError("snapshot columns don't match its size")
+
+        # the key of a keyed hash isn't in the snapshot: a map that made
+        # its own key gets a new one, any other needs its function back
+        rekey = metadata['keyed_hash'] and function is None
+        if rekey:
+            function = make_siphash()
+        else:
+            function = resolve_function(metadata['function'], function)
+
+        # start from the smallest table; the saved one replaces it below
+        hash_map = cls(1, function, stats=stats, **metadata['options'])
+        capacity = metadata['capacity']
+        if hash_map._round_capacity(capacity) != capacity:
+            raise SnapshotError("snapshot capacity is not a valid table size")
+
+        hash_map._keyed_hash = metadata['keyed_hash']
+        hash_map._min_capacity = metadata['min_capacity']
+        if rekey:
+            hashes = hash_map._hash_keys(keys)
+        else:
+            check_hashes(hash_map._key_hash, keys, hashes)
+
+        # link nodes at the front in reverse to rebuild each chain in order
+        heads = [None] * capacity
+        lengths = [0] * capacity
+        for i in range(len(keys) - 1, -1, -1):
+            index = hashes[i] % capacity
+            heads[index] = SLNode(keys[i], values[i], heads[index], hashes[i])
+            lengths[index] += 1
+
+        buckets = []
+        for head, length in zip(heads, lengths):
+            bucket = LinkedList()
+            bucket._head, bucket._size = head, length
+            buckets.append(bucket)
+
+        hash_map._buckets = DynamicArray(buckets)
+        hash_map._capacity = capacity
+        hash_map._mask = capacity - 1
+        hash_map._size = len(keys)
+
+        if hash_map._treeify_threshold is not None:
+            for i in range(capacity):
+                hash_map._treeify(hash_map._buckets, i)
+        return hash_map
+
+    def _hash_keys(self, keys) -> list:
+        """
+        Returns hash values for a sequence of keys, in order, using the
+        vectorized version of the hash function when one is available
+        """
+        hashes = hash_many(self._hash_function, keys)
+        if self._power_of_two:
+            return list(map(mix64, hashes))
+        return hashes
+
 
 def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     """
@@ -267,25 +1042,26 @@ def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     length = da.length()
     map = HashMap()
 
+    # hash every element in one batch up front
+    numbers = [da.get_at_index(i) for i in range(length)]
+    hashes = map._hash_keys(numbers)
+
     # loop through dynamic array, add it with a frequency of 1
     # if already added to map add 1 to frequency
     for i in range(length):
-        number = da.get_at_index(i)
-        if map.contains_key(number):
-            map.put(number, map.get(number) + 1)
+        number, hash = numbers[i], hashes[i]
+        frequency = map._get(number, hash)
+        if frequency is not None:
+            map._put(number, frequency + 1, hash)
         else:
-            map.put(number, 1)
-
-    # get key / values from map
-    key_value = map.get_keys_and_values()
+            map._put(number, 1, hash)
 
     mode = DynamicArray()
     mode_frequency = 0
 
     # loop over key/value to find the mode, if the value being looped over is > than mode_frequency
-    # value becomes new mode_frequency
-    for i in range(key_value.length()):
-        key, value = key_value.get_at_index(i)
+    # value becomes new mode_frequency; items are streamed, not copied
+    for key, value in map.items():
         if value > mode_frequency:
             mode_frequency = value
             mode = DynamicArray()
@@ -497,3 +1273,118 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nincremental resize example 1")
+    print("----------------------------")
+    m = HashMap(11, hash_function_2, incremental_resize=True)
+    for i in range(100):
+        m.put('key' + str(i), i)
+        if i % 20 == 19:
+            print(m.get_size(), m.get_capacity(), m._old_buckets is not None)
+    print(all(m.get('key' + str(i)) == i for i in range(100)))
+
+    print("\nshrink policy example 1")
+    print("-----------------------")
+    m = HashMap(11, hash_function_2, shrink_threshold=0.2)
+    for i in range(200):
+        m.put('key' + str(i), i)
+    print(m.get_size(), m.get_capacity())
+    for i in range(195):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.get_capacity())
+    m.shrink_to_fit()
+    print(m.get_size(), m.get_capacity(), m.get('key199'))
+
+    print("\npower of two example 1")
+    print("----------------------")
+    m = HashMap(20, hash_function_2, power_of_two=True)
+    for i in range(100):
+        m.put('key' + str(i), i)
+    print(m.get_size(), m.get_capacity(), m.empty_buckets())
+    print(all(m.get('key' + str(i)) == i for i in range(100)))
+
+    print("\nstats example 1")
+    print("---------------")
+    m = HashMap(11, hash_function_1, stats=True)
+    for i in range(100):
+        m.put('key' + str(i), i)
+    for i in range(100):
+        m.get('key' + str(i))
+    stats = m.get_stats()
+    print(stats['resizes'], stats['max_chain_length'],
+          stats['operations']['get'])
+    print(stats['chain_length_histogram'])
+
+    print("\nflood example 1")
+    print("---------------")
+    # every key has the same character sum, so hash_function_1 collides
+    keys = ['abcdef', 'fedcba', 'badcfe', 'cfbead', 'edafcb', 'dbfcae',
+            'afbecd', 'dcbafe', 'ecafdb', 'fbdace', 'cadbef', 'bedfac']
+    m = HashMap(11, hash_function_1, flood_threshold=4)
+    for i, key in enumerate(keys):
+        m.put(key, i)
+    print(m.get_size(), m.get_stats()['keyed_hash'],
+          all(m.get(key) == i for i, key in enumerate(keys)))
+
+    print("\ntreeify example 1")
+    print("-----------------")
+    # anagrams all share one hash_function_1 value, so one chain grows
+    m = HashMap(11, hash_function_1, treeify_threshold=8)
+    keys = ['abcd', 'abdc', 'acbd', 'acdb', 'adbc', 'adcb',
+            'bacd', 'badc', 'bcad', 'bcda', 'bdac', 'bdca']
+    for i, key in enumerate(keys):
+        m.put(key, i)
+    print(m.get_stats()['tree_buckets'], m.get('bcad'), m.contains_key('dcba'))
+    for key in keys[:6]:
+        m.remove(key)
+    print(m.get_stats()['tree_buckets'], m.get_size(), m.get('bcad'))
+
+    print("\nviews example 1")
+    print("---------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), i * 10)
+    keys, values = m.keys(), m.values()
+    print(len(keys), '3' in keys, 30 in values, ('3', 30) in m.items())
+    m.remove('3')
+    # views are live, not copies
+    print(len(keys), '3' in keys, sorted(values))
+    try:
+        for key in keys:
+            m.put(key + '!', 0)
+    except RuntimeError as error:
+        print(error)
+
+    print("\niterator / scan example 1")
+    print("-------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), i * 10)
+    # iterators are independent, so loops can nest
+    print(sum(1 for a in m for b in m))
+    cursor, scanned = 0, []
+    while True:
+        cursor, items = m.scan(cursor, 4)
+        scanned += [items[i] for i in range(items.length())]
+        # writers may keep going between calls
+        m.put('new' + str(len(scanned)), 0)
+        if cursor == 0:
+            break
+    # every original key is seen, though a resize can repeat some
+    print(sorted(item for item in set(scanned) if item[1]))
+
+    print("\nsnapshot example 1")
+    print("------------------")
+    import os
+    import tempfile
+    m = HashMap(11, hash_function_2)
+    for i in range(50):
+        m.put('key' + str(i), i)
+    m.remove('key7')
+    path = os.path.join(tempfile.mkdtemp(), 'map.snap')
+    m.save(path)
+    loaded = HashMap.load(path)
+    print(loaded.get_size(), loaded.get_capacity(),
+          sorted(loaded.items()) == sorted(m.items()),
+          loaded.get('key42'), loaded.contains_key('key7'))
+    os.remove(path)
@@ -0,0 +1,385 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hash map sharded across worker processes, so the pure Python
+#              hashing and probing of hash_map_oa / hash_map_sc run on
+#              several cores instead of one. Each worker owns one shard, an
+#              ordinary HashMap, and the parent routes every key to a shard
+#              by its builtin hash, which is cheap and only ever computed
+#              in the parent.
+#
+#              The parent talks to each worker over a pipe in batches: a
+#              message is a list of commands and the reply a list of their
+#              results. put_many / get_many / remove_many split their keys
+#              by shard, send every shard its batch and only then wait, so
+#              the shards work through their batches in parallel. Single
+#              put and remove calls are queued per shard and go out with
+#              the next message to that shard (or on flush), so they don't
+#              cost a round trip each; reads send the queued writes first,
+#              in the same message, so they always see them.
+#
+#              Keys, values, the hash function and options are pickled to
+#              reach the workers, so they have to be picklable; hash
+#              functions should be module level functions.
+
+import multiprocessing
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, to_list
+
+
+# shard kind -> map class
+KINDS = {
+    'oa': hash_map_oa.HashMap,
+    'sc': hash_map_sc.HashMap,
+}
+
+
+def _get_many(hash_map, keys: list) -> list:
+    values = hash_map.get_many(keys)
+    return [values.get_at_index(i) for i in range(values.length())]
+
+
+def _get_keys_and_values(hash_map) -> list:
+    pairs = hash_map.get_keys_and_values()
+    return [pairs.get_at_index(i) for i in range(pairs.length())]
+
+
+# command name -> function run on the shard; results must be picklable
+_COMMANDS = {
+    'put': lambda hash_map, key, value: hash_map.put(key, value),
+    'get': lambda hash_map, key: hash_map.get(key),
+    'contains_key': lambda hash_map, key: hash_map.contains_key(key),
+    'remove': lambda hash_map, key: hash_map.remove(key),
+    'put_many': lambda hash_map, pairs: hash_map.put_many(pairs),
+    'get_many': _get_many,
+    'remove_many': lambda hash_map, keys: hash_map.remove_many(keys),
+    'clear': lambda hash_map: hash_map.clear(),
+    'resize_table': lambda hash_map, capacity: hash_map.resize_table(capacity),
+    'get_size': lambda hash_map: hash_map.get_size(),
+    'get_capacity': lambda hash_map: hash_map.get_capacity(),
+    'empty_buckets': lambda hash_map: hash_map.empty_buckets(),
+    'get_keys_and_values': _get_keys_and_values,
+}
+
+
+def _serve(connection, kind: str, capacity: int, function,
+           options: dict) -> None:
+    """
+    Worker process: builds a shard and answers batches of commands until
+    it receives None. A reply is (True, results) or, if a command raised,
+    (False, exception); commands after the failing one are not run
+    """
+    hash_map = KINDS[kind](capacity, function, **options)
+    while True:
+        commands = connection.recv()
+        if commands is None:
+            break
+        try:
+            results = [_COMMANDS[name](hash_map, *args)
+                       for name, args in commands]
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, results))
+    connection.close()
+
+
+class ShardedHashMap:
+    def __init__(self, capacity: int = 11, function=hash_function_1,
+                 shards: int = None, kind: str = 'oa',
+                 batch_size: int = 1024, **options) -> None:
+        """
+        Starts shards worker processes (one per CPU by default), each owning
+        a KINDS[kind](capacity // shards, function, **options) shard.
+        Single puts and removes are queued until batch_size of them are
+        waiting for a shard. Call close(), or use the map in a with block,
+        to stop the workers
+        """
+        if shards is None:
+            shards = multiprocessing.cpu_count()
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        if kind not in KINDS:
+            raise ValueError(f"unknown shard kind: {kind!r}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self._batch_size = batch_size
+        self._pending = [[] for _ in range(shards)]
+        self._connections = []
+        self._processes = []
+
+        share = max(capacity // shards, 1)
+        for _ in range(shards):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve, daemon=True,
+                args=(worker_connection, kind, share, function, options))
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def _shard(self, key: str) -> int:
+        """
+        Returns the index of the shard that holds key
+        """
+        return hash(key) % len(self._connections)
+
+    def _group(self, keys: list) -> dict:
+        """
+        Returns {shard index: [positions in keys]} for keys
+        """
+        groups = {}
+        shards = len(self._connections)
+        for position, key in enumerate(keys):
+            groups.setdefault(hash(key) % shards, []).append(position)
+        return groups
+
+    def _send(self, shard: int, commands: list) -> None:
+        """
+        Sends commands to a shard behind the writes queued for it
+        """
+        pending = self._pending[shard]
+        self._pending[shard] = []
+        self._connections[shard].send(pending + commands)
+
+    def _receive(self, shard: int) -> list:
+        """
+        Waits for a shard's reply and returns the results of every command
+        in the message, queued writes first. Raises what a command raised
+        in the worker
+        """
+        ok, results = self._connections[shard].recv()
+        if not ok:
+            raise results
+        return results
+
+    def _receive_all(self, shards) -> dict:
+        """
+        Waits for the reply of every shard in shards and returns {shard:
+        results}. Every reply is read before a worker's exception is
+        raised, so no pipe is left holding a stale reply
+        """
+        results, error = {}, None
+        for shard in shards:
+            ok, reply = self._connections[shard].recv()
+            if ok:
+                results[shard] = reply
+            elif error is None:
+                error = reply
+        if error is not None:
+            raise error
+        return results
+
+    def _call(self, shard: int, name: str, *args) -> object:
+        """
+        Runs one command on a shard and returns its result
+        """
+        self._send(shard, [(name, args)])
+        return self._receive(shard)[-1]
+
+    def _call_all(self, name: str, *args) -> list:
+        """
+        Runs one command on every shard at once and returns their results
+        in shard order
+        """
+        shards = range(len(self._connections))
+        for shard in shards:
+            self._send(shard, [(name, args)])
+        results = self._receive_all(shards)
+        return [results[shard][-1] for shard in shards]
+
+    def _queue(self, shard: int, name: str, *args) -> None:
+        """
+        Queues a write for a shard, sending the queue once it is full
+        """
+        pending = self._pending[shard]
+        pending.append((name, args))
+        if len(pending) >= self._batch_size:
+            self._send(shard, [])
+            self._receive(shard)
+
+    def flush(self) -> None:
+        """
+        Sends every queued write to its shard and waits for them all, so
+        any error they raise surfaces here
+        """
+        shards = [shard for shard in range(len(self._connections))
+                  if self._pending[shard]]
+        for shard in shards:
+            self._send(shard, [])
+        self._receive_all(shards)
+
+    def close(self) -> None:
+        """
+        Sends queued writes, then stops the worker processes. The shards
+        and everything in them are gone afterwards
+        """
+        if not self._processes:
+            return
+        try:
+            self.flush()
+        finally:
+            for connection in self._connections:
+                connection.send(None)
+                connection.close()
+            for process in self._processes:
+                process.join()
+            self._processes = []
+
+    def __enter__(self) -> "ShardedHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------ #
+
+    def get_shard_count(self) -> int:
+        """
+        Returns the number of shards
+        """
+        return len(self._connections)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pair in hash map. The write is queued and reaches
+        the shard with its next message
+        """
+        self._queue(self._shard(key), 'put', key, value)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes given key and associated value. Method does nothing if value
+        not found. The write is queued like put
+        """
+        self._queue(self._shard(key), 'remove', key)
+
+    def get(self, key: str) -> object:
+        """
+        Gets value of associated key. Returns None if value not found
+        """
+        return self._call(self._shard(key), 'get', key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it
+        returns False
+        """
+        return self._call(self._shard(key), 'contains_key', key)
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every (key, value) pair in pairs. Every shard gets its
+        pairs in one message and they all run at once
+        """
+        pairs = to_list(pairs)
+        groups = self._group([pair[0] for pair in pairs])
+        for shard, positions in groups.items():
+            self._send(shard, [('put_many',
+                                ([pairs[position] for position in positions],))])
+        self._receive_all(groups)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns dynamic array with the value of each key in keys, in input
+        order. Missing keys give None. Every shard gets its keys in one
+        message and they all run at once
+        """
+        keys = to_list(keys)
+        groups = self._group(keys)
+        for shard, positions in groups.items():
+            self._send(shard, [('get_many',
+                                ([keys[position] for position in positions],))])
+
+        results = self._receive_all(groups)
+        values = [None] * len(keys)
+        for shard, positions in groups.items():
+            for position, value in zip(positions, results[shard][-1]):
+                values[position] = value
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys, fanned out like put_many. Keys not in the
+        map are ignored
+        """
+        keys = to_list(keys)
+        groups = self._group(keys)
+        for shard, positions in groups.items():
+            self._send(shard, [('remove_many',
+                                ([keys[position] for position in positions],))])
+        self._receive_all(groups)
+
+    def clear(self) -> None:
+        """
+        Clears contents of every shard
+        """
+        self._call_all('clear')
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the map to about new_capacity by resizing
+        every shard to its share of it
+        """
+        share = max(-(-new_capacity // len(self._connections)), 1)
+        self._call_all('resize_table', share)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._call_all('get_size'))
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the total over all shards
+        """
+        return sum(self._call_all('get_capacity'))
+
+    def table_load(self) -> float:
+        """
+        Returns current hash table load factor over all shards
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets over all shards
+        """
+        return sum(self._call_all('empty_buckets'))
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        returns dynamic array where each index contains a tuple of a
+        key/value pair, shard by shard
+        """
+        result = DynamicArray()
+        for pairs in self._call_all('get_keys_and_values'):
+            for pair in pairs:
+                result.append(pair)
+        return result
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nSharded - put / get example 1")
+    print("-----------------------------")
+    with ShardedHashMap(11, hash_function_1, shards=4) as m:
+        for i in range(100):
+            m.put('key' + str(i), i)
+        m.remove('key42')
+        print(m.get_size(), m.get('key10'), m.get('key42'),
+              m.contains_key('key99'), m.get_shard_count())
+
+    print("\nSharded - fan-out example 1")
+    print("---------------------------")
+    with ShardedHashMap(11, hash_function_1, shards=3, kind='sc') as m:
+        m.put_many([('key' + str(i), i * 10) for i in range(1000)])
+        print(m.get_size(), m.get_many(['key5', 'nope', 'key999']))
+        m.remove_many(['key' + str(i) for i in range(500)])
+        print(m.get_size(), m.get_keys_and_values().length(), m.get('key500'))
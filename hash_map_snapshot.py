@@ -0,0 +1,169 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Binary snapshot format shared by HashMap.save / HashMap.load
+#              in the SC and OA maps. A snapshot stores the table layout and
+#              the cached hash of every entry, so loading puts entries
+#              straight back where they were without calling the hash
+#              function or probing.
+#
+# Layout (little endian):
+#   8 bytes   magic b'HASHMAP\0'
+#   u16       format version
+#   u32       metadata length
+#   u64       payload length
+#   u32       CRC-32 of metadata followed by payload
+#   metadata  UTF-8 JSON: map kind, capacity, size, hash function identity,
+#             constructor options
+#   payload   pickled tuple of columns (hashes, keys, values, ...) laid out
+#             by the map that wrote it
+#
+# Values are pickled, so only load snapshots from a trusted source. The
+# hash function is stored by name only: the secret of a keyed hash such as
+# make_siphash(secret) never reaches the file, so it must be passed back in
+# to load.
+
+import importlib
+import json
+import pickle
+import struct
+import zlib
+from array import array
+from functools import partial
+
+
+MAGIC = b'HASHMAP\0'
+FORMAT_VERSION = 2
+
+_HEADER = struct.Struct('<8sHIQI')
+
+# hashes recomputed on load to confirm the hash function still matches
+_HASH_CHECKS = 8
+
+# read and write in chunks this large
+_CHUNK_SIZE = 1 << 20
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def function_identity(function) -> dict:
+    """
+    Returns a JSON-able description of function by module and qualified
+    name. A functools.partial binding only keyword arguments (a keyed
+    SipHash, say) is marked keyed; its keywords may be a secret key, so
+    they are left out
+    """
+    keyed = False
+    if isinstance(function, partial) and not function.args:
+        keyed = bool(function.keywords)
+        function = function.func
+
+    module = getattr(function, '__module__', None)
+    name = getattr(function, '__qualname__', '')
+    if module is None or '<' in name:
+        raise ValueError(f"hash function {function!r} has no importable name")
+
+    return {'name': f'{module}:{name}', 'keyed': keyed}
+
+
+def resolve_function(identity: dict, function=None):
+    """
+    Returns the function described by function_identity. A keyed function
+    can't be rebuilt from its name, so it must be given as function; a
+    function given for any snapshot must match the identity. Raises
+    SnapshotError otherwise
+    """
+    if function is not None:
+        if function_identity(function) != identity:
+            raise SnapshotError(f"snapshot was saved with hash function "
+                                f"{identity['name']}, not {function!r}")
+        return function
+    if identity['keyed']:
+        raise SnapshotError(f"hash function {identity['name']} is keyed and "
+                            f"its key isn't stored; pass the function in")
+
+    module_name, _, name = identity['name'].partition(':')
+    try:
+        function = importlib.import_module(module_name)
+        for part in name.split('.'):
+            function = getattr(function, part)
+    except (ImportError, AttributeError) as error:
+        raise SnapshotError(f"cannot find hash function {identity['name']}") from error
+    return function
+
+
+def pack_ints(values: list):
+    """
+    Returns values as a signed or unsigned 64 bit array if they fit, so
+    they pickle as one block of bytes, otherwise as the list itself
+    """
+    for typecode in ('q', 'Q'):
+        try:
+            return array(typecode, values)
+        except OverflowError:
+            pass
+    return values
+
+
+def check_hashes(key_hash, keys: list, hashes) -> None:
+    """
+    Recomputes the hashes of a few keys spread over the snapshot. Raises
+    SnapshotError if key_hash no longer gives the stored values, as with
+    the per-process seeded builtin hash of str
+    """
+    step = max(len(keys) // _HASH_CHECKS, 1)
+    for i in range(0, len(keys), step):
+        if key_hash(keys[i]) != hashes[i]:
+            raise SnapshotError(
+                "hash function does not reproduce the stored hashes")
+
+
+def write_snapshot(path: str, metadata: dict, columns: tuple) -> None:
+    """
+    Writes metadata and columns to a snapshot file at path
+    """
+    encoded = json.dumps(metadata).encode('utf-8')
+    payload = pickle.dumps(columns, protocol=pickle.HIGHEST_PROTOCOL)
+    checksum = zlib.crc32(payload, zlib.crc32(encoded))
+
+    with open(path, 'wb', buffering=_CHUNK_SIZE) as snapshot:
+        snapshot.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded),
+                                    len(payload), checksum))
+        snapshot.write(encoded)
+        snapshot.write(payload)
+
+
+def read_snapshot(path: str, kind: str) -> tuple:
+    """
+    Reads a snapshot file written by a map of the given kind and returns
+    (metadata, columns). Raises SnapshotError if the file is not a
+    snapshot, is of another format version or kind, or fails its checksum
+    """
+    with open(path, 'rb', buffering=_CHUNK_SIZE) as snapshot:
+        header = snapshot.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise SnapshotError("snapshot is truncated")
+
+        magic, version, metadata_length, payload_length, checksum = \
+            _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise SnapshotError("not a hash map snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+
+        encoded = snapshot.read(metadata_length)
+        payload = snapshot.read(payload_length)
+        if len(encoded) != metadata_length or len(payload) != payload_length:
+            raise SnapshotError("snapshot is truncated")
+        if snapshot.read(1):
+            raise SnapshotError("snapshot has trailing data")
+
+    if zlib.crc32(payload, zlib.crc32(encoded)) != checksum:
+        raise SnapshotError("snapshot checksum mismatch")
+
+    metadata = json.loads(encoded)
+    if metadata.get('map') != kind:
+        raise SnapshotError(f"snapshot holds a {metadata.get('map')} map, "
+                            f"not {kind}")
+    return metadata, pickle.loads(payload)
@@ -0,0 +1,105 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Opt-in operation statistics shared by the SC and OA hash
+#              maps. Maps created with stats=True feed a MapStats the
+#              number of slots or chain nodes each operation examined and
+#              the time spent resizing; get_stats() on the map adds the
+#              current table shape and exports everything as a dict.
+
+
+class MapStats:
+    """
+    Counters for one hash map. Recording is a few integer updates per
+    operation, so it is cheap enough to leave on
+    """
+
+    # probe counts at or above this share the last histogram bucket
+    HISTOGRAM_SIZE = 32
+
+    def __init__(self) -> None:
+        """
+        Initialize empty counters
+        """
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Sets every counter back to zero
+        """
+        # probes examined by the operation currently in progress
+        self._pending = 0
+
+        # operation name -> [count, total probes, max probes]
+        self._operations = {}
+        self._histogram = [0] * self.HISTOGRAM_SIZE
+
+        self._resizes = 0
+        self._resize_ns = 0
+
+    def add_probes(self, probes: int) -> None:
+        """
+        Adds probes examined by a lookup to the current operation
+        """
+        self._pending += probes
+
+    def record(self, operation: str) -> None:
+        """
+        Ends the current operation, charging it the probes added since the
+        previous record
+        """
+        probes = self._pending
+        self._pending = 0
+
+        counters = self._operations.get(operation)
+        if counters is None:
+            counters = self._operations[operation] = [0, 0, 0]
+        counters[0] += 1
+        counters[1] += probes
+        if probes > counters[2]:
+            counters[2] = probes
+
+        self._histogram[min(probes, self.HISTOGRAM_SIZE - 1)] += 1
+
+    def record_resize(self, elapsed_ns: int = 0) -> None:
+        """
+        Counts one resize that took elapsed_ns
+        """
+        self._resizes += 1
+        self._resize_ns += elapsed_ns
+
+    def add_resize_time(self, elapsed_ns: int) -> None:
+        """
+        Adds time spent on a resize already counted, such as one step of
+        an incremental resize
+        """
+        self._resize_ns += elapsed_ns
+
+    def as_dict(self) -> dict:
+        """
+        Returns the counters as a dict of plain values
+        """
+        operations = {}
+        for name, (count, probes, max_probes) in self._operations.items():
+            operations[name] = {
+                'count': count,
+                'probes': probes,
+                'mean_probes': probes / count,
+                'max_probes': max_probes,
+            }
+
+        return {
+            'operations': operations,
+            'probe_histogram': list(self._histogram),
+            'resizes': self._resizes,
+            'resize_time_s': self._resize_ns / 1e9,
+        }
+
+
+def histogram(lengths) -> dict:
+    """
+    Returns {length: number of times it occurs} in ascending length order
+    """
+    counts = {}
+    for length in lengths:
+        counts[length] = counts.get(length, 0) + 1
+    return dict(sorted(counts.items()))
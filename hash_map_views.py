@@ -0,0 +1,80 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Dict style keys(), values() and items() views for the SC and
+#              OA hash maps. A view holds only a reference to its map: len()
+#              asks the map for its size, membership tests are ordinary
+#              lookups, and iteration streams entries straight out of the
+#              table through the map's own iterator, so nothing is copied.
+#              Iterating raises RuntimeError if the map gains or loses keys
+#              or is resized part way through.
+
+from collections import abc
+
+
+class KeysView(abc.KeysView):
+    """
+    Live view of a hash map's keys; supports len(), in, iteration and the
+    set operations of collections.abc.KeysView
+    """
+
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        return self._mapping.get_size()
+
+    def __iter__(self):
+        for entry in self._mapping:
+            yield entry.key
+
+    def __contains__(self, key: object) -> bool:
+        return self._mapping.contains_key(key)
+
+
+class ValuesView(abc.ValuesView):
+    """
+    Live view of a hash map's values; supports len(), in and iteration.
+    Membership tests walk the values, as they do for a dict
+    """
+
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        return self._mapping.get_size()
+
+    def __iter__(self):
+        for entry in self._mapping:
+            yield entry.value
+
+    def __contains__(self, value: object) -> bool:
+        for found in self:
+            if found is value or found == value:
+                return True
+        return False
+
+
+class ItemsView(abc.ItemsView):
+    """
+    Live view of a hash map's (key, value) pairs; supports len(), in,
+    iteration and the set operations of collections.abc.ItemsView
+    """
+
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        return self._mapping.get_size()
+
+    def __iter__(self):
+        for entry in self._mapping:
+            yield entry.key, entry.value
+
+    def __contains__(self, item: object) -> bool:
+        # as with dict items, anything but a 2-tuple is simply absent
+        if not isinstance(item, tuple) or len(item) != 2:
+            return False
+        key, value = item
+
+        # get alone can't tell a missing key from one stored with None
+        if not self._mapping.contains_key(key):
+            return False
+        found = self._mapping.get(key)
+        return found is value or found == value
@@ -0,0 +1,437 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Durable SC hash map for use as a small embedded key/value
+#              store. Every mutation that succeeds is appended to a
+#              write-ahead log; appends are buffered and fsynced in
+#              groups (group commit), so a put costs a few microseconds
+#              instead of a disk flush. Opening the store loads the last
+#              checkpoint snapshot and replays the log over it. Once the log
+#              grows past checkpoint_bytes the map is saved as a new
+#              snapshot and the log starts over.
+#
+# Files in the store directory:
+#   map.snap  last checkpoint, in the hash_map_snapshot format
+#   map.wal   records since then: CRC-32, payload length, operation code,
+#             pickled payload. Replay stops at the first torn or corrupt
+#             record, which is where a crash cut the log off.
+#
+# Records are idempotent (put, remove, clear), so a crash between writing
+# a checkpoint and emptying the log only replays operations the snapshot
+# already holds.
+
+import os
+import pickle
+import struct
+import threading
+import time
+import warnings
+import zlib
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2, to_list
+from hash_map_sc import HashMap
+from hash_map_snapshot import function_identity
+
+
+SNAPSHOT_NAME = 'map.snap'
+LOG_NAME = 'map.wal'
+
+# CRC-32 of operation code and payload, payload length, operation code
+_RECORD = struct.Struct('<IIB')
+
+# operation codes
+_PUT = 1
+_REMOVE = 2
+_CLEAR = 3
+_PUT_MANY = 4
+_REMOVE_MANY = 5
+
+# records are handed to the file in chunks of about this size
+_WRITE_BUFFER = 1 << 16
+
+
+def _fsync_directory(directory: str) -> None:
+    """
+    Flushes directory entries (new, renamed files) to disk where the
+    platform allows it
+    """
+    if os.name != 'posix':
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class DurableHashMap:
+    def __init__(self, directory: str, capacity: int = 11,
+                 function=None,
+                 commit_records: int = 1024,
+                 commit_interval: float = 0.01,
+                 checkpoint_bytes: int = 64 << 20,
+                 **options) -> None:
+        """
+        Opens the store in directory, creating it if needed. A new store
+        starts as HashMap(capacity, function, **options), with
+        hash_function_1 by default; an existing one comes back from its
+        snapshot and log, with the hash function and options it was created
+        with. Snapshots don't store the key of a keyed hash function such
+        as make_siphash(secret), so reopening that store needs the function
+        passed again.
+        Group commit: the log is fsynced once commit_records operations
+        are pending, and a background thread fsyncs whatever is pending
+        every commit_interval seconds, so a crash loses at most the
+        operations of about the last commit_interval seconds, even when
+        the map goes idle after a burst. With commit_interval 0 every
+        operation is fsynced. sync() forces one. Once the log reaches
+        checkpoint_bytes the map is checkpointed and the log emptied.
+        Call close(), or use the map in a with block, to stop the thread
+        """
+        if commit_records < 1:
+            raise ValueError("commit_records must be at least 1")
+        if commit_interval < 0:
+            raise ValueError("commit_interval must not be negative")
+        if checkpoint_bytes < 1:
+            raise ValueError("checkpoint_bytes must be at least 1")
+
+        # checkpoints are snapshots, which name the hash function
+        if function is not None:
+            function_identity(function)
+
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self._log_path = os.path.join(directory, LOG_NAME)
+
+        self._commit_records = commit_records
+        self._commit_interval = commit_interval
+        self._checkpoint_bytes = checkpoint_bytes
+
+        # records not yet written to the file, and ones not yet fsynced;
+        # the lock keeps the flusher thread out while an operation runs
+        self._buffer = bytearray()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+        if os.path.exists(self._snapshot_path):
+            self._map = HashMap.load(self._snapshot_path, function=function)
+            log_size = self._replay()
+        else:
+            # a new store checkpoints at once, so its hash function and
+            # options are on disk before anything is logged against them
+            if function is None:
+                function = hash_function_1
+            self._map = HashMap(capacity, function, **options)
+            log_size = 0
+
+        # cut the log back to its last whole record before appending to it
+        self._log = open(self._log_path, 'ab')
+        self._log.truncate(log_size)
+        self._log_size = log_size
+        if not os.path.exists(self._snapshot_path):
+            self._checkpoint()
+
+        self._closing = threading.Event()
+        self._flusher = None
+        if commit_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop,
+                                             daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        """
+        Flusher thread: fsyncs pending records every commit_interval
+        seconds until the map is closed
+        """
+        while not self._closing.wait(self._commit_interval):
+            with self._lock:
+                if (self._pending and time.monotonic() - self._last_sync
+                        >= self._commit_interval):
+                    self._sync()
+
+    def _replay(self) -> int:
+        """
+        Applies every whole record in the log to the map. Returns the size
+        of the log up to the end of the last good record
+        """
+        if not os.path.exists(self._log_path):
+            return 0
+        with open(self._log_path, 'rb') as log:
+            data = log.read()
+
+        offset = 0
+        while offset + _RECORD.size <= len(data):
+            checksum, length, operation = _RECORD.unpack_from(data, offset)
+            start = offset + _RECORD.size
+            payload = data[start:start + length]
+
+            # a torn or corrupt record ends the log
+            if (len(payload) != length or checksum
+                    != zlib.crc32(payload, zlib.crc32(bytes((operation,))))):
+                break
+
+            # so does one that can't be applied; the log is cut back to it
+            try:
+                self._apply(operation, pickle.loads(payload))
+            except Exception as error:
+                warnings.warn(f"{self._log_path}: record at offset {offset} "
+                              f"can't be replayed ({error!r}); the log ends "
+                              f"there", RuntimeWarning)
+                break
+            offset = start + length
+
+        return offset
+
+    def _apply(self, operation: int, payload: object) -> None:
+        """
+        Applies one logged operation to the map. put_many and remove_many
+        hash every key before changing anything, so a batch with a key the
+        hash function rejects leaves the map as it was
+        """
+        if operation == _PUT:
+            self._map.put(*payload)
+        elif operation == _REMOVE:
+            self._map.remove(payload)
+        elif operation == _CLEAR:
+            self._map.clear()
+        elif operation == _PUT_MANY:
+            self._map.put_many(payload)
+        elif operation == _REMOVE_MANY:
+            self._map.remove_many(payload)
+        else:
+            raise ValueError(f"unknown log operation {operation}")
+
+    def _append(self, operation: int, payload: object) -> None:
+        """
+        Applies one operation to the map and logs it, then writes, fsyncs
+        and checkpoints as group commit and the log size call for. An
+        operation that raises, because its payload can't be pickled or the
+        map rejects it, is not logged, so replay never meets it
+        """
+        encoded = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        checksum = zlib.crc32(encoded, zlib.crc32(bytes((operation,))))
+
+        with self._lock:
+            self._apply(operation, payload)
+            self._buffer += _RECORD.pack(checksum, len(encoded), operation)
+            self._buffer += encoded
+            self._pending += 1
+
+            if len(self._buffer) >= _WRITE_BUFFER:
+                self._write()
+
+            if (self._pending >= self._commit_records or time.monotonic()
+                    - self._last_sync >= self._commit_interval):
+                self._sync()
+
+            if self._log_size + len(self._buffer) >= self._checkpoint_bytes:
+                self._checkpoint()
+
+    def _write(self) -> None:
+        """
+        Hands buffered records to the log file
+        """
+        self._log.write(self._buffer)
+        self._log_size += len(self._buffer)
+        self._buffer.clear()
+
+    def sync(self) -> None:
+        """
+        Writes and fsyncs every logged operation, making it durable
+        """
+        with self._lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        """
+        sync, for callers already holding the lock
+        """
+        if self._buffer:
+            self._write()
+        if self._pending:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def checkpoint(self) -> None:
+        """
+        Saves the map as the new snapshot and empties the log
+        """
+        with self._lock:
+            self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        """
+        checkpoint, for callers already holding the lock
+        """
+        self._sync()
+
+        # write aside and rename, so a crash leaves the old snapshot whole
+        temporary = self._snapshot_path + '.tmp'
+        self._map.save(temporary)
+        with open(temporary, 'rb') as snapshot:
+            os.fsync(snapshot.fileno())
+        os.replace(temporary, self._snapshot_path)
+        _fsync_directory(self._directory)
+
+        self._log.truncate(0)
+        os.fsync(self._log.fileno())
+        self._log_size = 0
+
+    def close(self) -> None:
+        """
+        Stops the flusher thread, makes every logged operation durable and
+        closes the log
+        """
+        if self._log.closed:
+            return
+        self._closing.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            self._sync()
+            self._log.close()
+
+    def __enter__(self) -> "DurableHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pair in hash map and logs it
+        """
+        self._append(_PUT, (key, value))
+
+    def remove(self, key: str) -> None:
+        """
+        Removes given key and associated value and logs it. Method
+        does nothing if value not found
+        """
+        self._append(_REMOVE, key)
+
+    def clear(self) -> None:
+        """
+        Clears contents of hash map and logs it
+        """
+        self._append(_CLEAR, None)
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates every (key, value) pair in pairs as one log record
+        """
+        self._append(_PUT_MANY, to_list(pairs))
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys as one log record
+        """
+        self._append(_REMOVE_MANY, to_list(keys))
+
+    def get(self, key: str) -> object:
+        """
+        Gets value of associated key. Returns None if value not found
+        """
+        return self._map.get(key)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns dynamic array with the value of each key in keys
+        """
+        return self._map.get_many(keys)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it
+        returns False
+        """
+        return self._map.contains_key(key)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Returns current hash table load factor
+        """
+        return self._map.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns number of empty buckets in the hash table
+        """
+        return self._map.empty_buckets()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        returns dynamic array where each index contains a tuple of a
+        key/value pair
+        """
+        return self._map.get_keys_and_values()
+
+    def keys(self):
+        """
+        Returns a live view of the keys in the map
+        """
+        return self._map.keys()
+
+    def values(self):
+        """
+        Returns a live view of the values in the map
+        """
+        return self._map.values()
+
+    def items(self):
+        """
+        Returns a live view of the (key, value) pairs in the map
+        """
+        return self._map.items()
+
+    def __iter__(self):
+        """
+        Returns a new iterator over the nodes of the map
+        """
+        return iter(self._map)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import shutil
+    import tempfile
+
+    print("\nDurable - reopen example 1")
+    print("--------------------------")
+    directory = tempfile.mkdtemp()
+    with DurableHashMap(directory, 11, hash_function_2) as m:
+        for i in range(100):
+            m.put('key' + str(i), i)
+        for i in range(0, 100, 3):
+            m.remove('key' + str(i))
+    with DurableHashMap(directory) as m:
+        print(m.get_size(), m.get('key10'), m.contains_key('key9'))
+
+    print("\nDurable - checkpoint example 1")
+    print("------------------------------")
+    with DurableHashMap(directory, checkpoint_bytes=4096) as m:
+        for i in range(500):
+            m.put('key' + str(i), i * 2)
+        print(os.path.getsize(os.path.join(directory, LOG_NAME)) < 4096)
+    with DurableHashMap(directory) as m:
+        print(m.get_size(), m.get('key499'))
+    shutil.rmtree(directory)
@@ -0,0 +1,226 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Scores candidate hash functions against a sample of real
+#              keys. For each function, keys are placed into an SC and an
+#              OA HashMap of the target capacity, so bucket indexes, prime
+#              or power of two rounding, hash mixing and probing are exactly
+#              what the maps do. Reports collision rates, chi-square
+#              uniformity of bucket indexes, chain and probe lengths (for
+#              missing keys in both maps, measured by looking up keys not
+#              in the sample), and hashing throughput.
+#
+# Usage:       python hash_quality.py keys.txt --capacity 4096
+#              python hash_quality.py keys.txt --power-of-two --json
+
+import argparse
+import json
+import sys
+import time
+from math import sqrt
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1, hash_function_2
+from hash_family import fnv1a_64, make_siphash, xxh64
+from hash_functions import hash_many
+
+
+# candidate name -> hash function scored when none are chosen. Every one
+# gives the same hashes in every run; the builtin hash is left out because
+# string hashes change with PYTHONHASHSEED
+CANDIDATES = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a_64': fnv1a_64,
+    'xxh64': xxh64,
+    # fixed secret so runs are reproducible
+    'siphash24': make_siphash(bytes(range(16))),
+}
+
+
+def load_keys(path: str) -> list:
+    """
+    Returns the keys in a text file, one per line, without line endings
+    """
+    with open(path, encoding='utf-8') as key_file:
+        return [line.rstrip('\n') for line in key_file]
+
+
+def _throughput(function, keys: list) -> float:
+    """
+    Returns keys hashed per second calling function once per key
+    """
+    start = time.perf_counter()
+    for key in keys:
+        function(key)
+    elapsed = time.perf_counter() - start
+    return len(keys) / elapsed if elapsed else 0.0
+
+
+def _bulk_throughput(function, keys: list) -> float:
+    """
+    Returns keys hashed per second through hash_many
+    """
+    start = time.perf_counter()
+    hash_many(function, keys)
+    elapsed = time.perf_counter() - start
+    return len(keys) / elapsed if elapsed else 0.0
+
+
+def score(function, keys: list, capacity: int,
+          power_of_two: bool = False) -> dict:
+    """
+    Returns quality measures of function over a list of distinct keys at
+    the given capacity (rounded the way the maps round it). The capacity
+    must be at least twice the number of keys, so neither map grows
+    """
+    sc_map = hash_map_sc.HashMap(capacity, function, power_of_two=power_of_two,
+                                 stats=True)
+    oa_map = hash_map_oa.HashMap(capacity, function, power_of_two=power_of_two,
+                                 stats=True)
+    capacity = sc_map.get_capacity()
+    count = len(keys)
+
+    # an OA map grows once it is half full, and would then score another
+    # capacity; an SC map only grows past a load of 1
+    if count * 2 > capacity:
+        raise ValueError(f"capacity {capacity} holds at most {capacity // 2} "
+                         f"keys without growing, not {count}")
+
+    for key in keys:
+        sc_map.put(key, None)
+        oa_map.put(key, None)
+
+    # every bucket index and how many keys it got, from the chain lengths
+    sc_stats = sc_map.get_stats()
+    chains = sc_stats['chain_length_histogram']
+    expected = count / capacity
+    chi_square = sum((length - expected) ** 2 * buckets
+                     for length, buckets in chains.items()) / expected
+    occupied = capacity - chains.get(0, 0)
+
+    # a uniform hash still collides; this is how many buckets it would be
+    # expected to fill with the same number of keys
+    expected_occupied = capacity * (1 - (1 - 1 / capacity) ** count)
+
+    distinct_hashes = len(set(map(function, keys)))
+
+    # a chain of length c costs 1 + 2 + ... + c node visits to find all of
+    # its keys
+    chain_cost = sum(length * (length + 1) // 2 * buckets
+                     for length, buckets in chains.items())
+
+    # a missing key walks its whole chain, or probes up to a free slot;
+    # look up keys that aren't there and count the nodes or slots examined
+    present = set(keys)
+    missing = [key + '\0' for key in keys if key + '\0' not in present]
+    sc_map.reset_stats()
+    oa_map.reset_stats()
+    for key in missing:
+        sc_map.contains_key(key)
+        oa_map.contains_key(key)
+    sc_lookups = sc_map.get_stats()['operations'].get('contains_key')
+    oa_stats = oa_map.get_stats()
+    oa_lookups = oa_stats['operations'].get('contains_key')
+
+    result = {
+        'capacity': capacity,
+        'keys': count,
+        'load': count / capacity,
+        'distinct_hashes': distinct_hashes,
+        'hash_collision_rate': 1 - distinct_hashes / count,
+        'bucket_collision_rate': (count - occupied) / count,
+        'expected_bucket_collision_rate': (count - expected_occupied) / count,
+        'chi_square': chi_square,
+        'chi_square_per_df': chi_square / (capacity - 1),
+        'chi_square_z': (chi_square - (capacity - 1)) / sqrt(2 * (capacity - 1)),
+        'sc_max_chain_length': sc_stats['max_chain_length'],
+        'sc_hit_chain_length': chain_cost / count,
+        'sc_miss_chain_length':
+            sc_lookups['mean_probes'] if sc_lookups else None,
+        'oa_max_probe_length': oa_stats['max_probe_length'],
+        'oa_hit_probe_length': oa_stats['mean_probe_length'],
+        'oa_miss_probe_length':
+            oa_lookups['mean_probes'] if oa_lookups else None,
+        'hashes_per_s': _throughput(function, keys),
+        'bulk_hashes_per_s': _bulk_throughput(function, keys),
+    }
+    return result
+
+
+def analyze(keys, functions: dict = None, capacity: int = None,
+            power_of_two: bool = False) -> dict:
+    """
+    Scores every {name: function} in functions (CANDIDATES by default)
+    against the distinct keys of an iterable. capacity defaults to twice
+    the number of keys, the least an OA map holds them in without growing.
+    Returns {name: measures}
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        raise ValueError("key sample is empty")
+    if functions is None:
+        functions = CANDIDATES
+    if capacity is None:
+        capacity = len(keys) * 2
+    if capacity < 2:
+        raise ValueError("capacity must be at least 2")
+
+    return {name: score(function, keys, capacity, power_of_two)
+            for name, function in functions.items()}
+
+
+def _print_table(results: dict) -> None:
+    """
+    Prints the main measures of each function, one row per function
+    """
+    columns = (('hash_collision_rate', 'hash coll', '.4f'),
+               ('bucket_collision_rate', 'bucket coll', '.4f'),
+               ('expected_bucket_collision_rate', 'uniform', '.4f'),
+               ('chi_square_per_df', 'chi2/df', '.2f'),
+               ('sc_hit_chain_length', 'sc chain', '.2f'),
+               ('sc_miss_chain_length', 'sc miss', '.2f'),
+               ('sc_max_chain_length', 'sc max', 'd'),
+               ('oa_hit_probe_length', 'oa probe', '.2f'),
+               ('oa_miss_probe_length', 'oa miss', '.2f'),
+               ('oa_max_probe_length', 'oa max', 'd'),
+               ('hashes_per_s', 'hash/s', ',.0f'))
+
+    print(f'{"function":18}' + ''.join(f'{title:>13}' for _, title, _ in columns))
+    for name, result in results.items():
+        row = f'{name:18}'
+        for field, _, spec in columns:
+            value = result[field]
+            row += f'{"-":>13}' if value is None else f'{value:>13{spec}}'
+        print(row)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='score hash functions against a key sample')
+    parser.add_argument('keys', help='text file with one key per line')
+    parser.add_argument('--functions', nargs='+', choices=list(CANDIDATES),
+                        default=list(CANDIDATES))
+    parser.add_argument('--capacity', type=int,
+                        help='table capacity, at least twice the key count '
+                             '(default: twice the key count)')
+    parser.add_argument('--power-of-two', action='store_true',
+                        help='index the way power_of_two maps do')
+    parser.add_argument('--json', action='store_true',
+                        help='print JSON instead of a table')
+    args = parser.parse_args(argv)
+
+    functions = {name: CANDIDATES[name] for name in args.functions}
+    results = analyze(load_keys(args.keys), functions, args.capacity,
+                      args.power_of_two)
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Memory footprint report for the HashMap implementations.
+#              Fills each map with the same pre-built keys and values under
+#              tracemalloc, so only memory the map itself allocates (table,
+#              chains, entries, pools) is counted, and reports it per entry.
+#              Also lists the instance size of the shared node and entry
+#              types from a6_include next to plain __dict__ copies of the
+#              same classes, so the saving from __slots__ is shown.
+#
+# Usage:       python memory_report.py --size 100000
+#              python memory_report.py --maps sc sc_pooled oa --json
+
+import argparse
+import json
+import sys
+import tracemalloc
+
+from a6_include import DynamicArray, HashEntry, LinkedList, SLNode
+from benchmark import MAPS
+
+
+# ------------- Baselines: the a6_include types without __slots__ ------------- #
+
+class _DictDynamicArray:
+    def __init__(self, arr=None) -> None:
+        self._data = arr.copy() if arr else []
+
+
+class _DictSLNode:
+    def __init__(self, key: str, value: object, next=None,
+                 hash: int = None) -> None:
+        self.key = key
+        self.value = value
+        self.next = next
+        self.hash = hash
+
+
+class _DictLinkedList:
+    def __init__(self) -> None:
+        self._head = None
+        self._size = 0
+
+
+class _DictHashEntry:
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        self.key = key
+        self.value = value
+        self.hash = hash
+        self.is_tombstone = False
+
+
+def instance_size(make, count: int = 10000) -> float:
+    """
+    Returns mean bytes allocated by calling make() count times; the objects
+    themselves only, as attribute values are created once outside tracing
+    """
+    tracemalloc.start()
+    try:
+        objects = [make() for _ in range(count)]
+        current = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    # don't charge the instances for the list that holds them
+    return (current - sys.getsizeof(objects)) / count
+
+
+def type_sizes() -> dict:
+    """
+    Returns {type name: {'dict': bytes, 'slots': bytes, 'saving': bytes}}
+    for the a6_include types every map allocates per entry or per bucket,
+    measured against an unslotted copy with the same fields
+    """
+    makers = {
+        'SLNode': (lambda: _DictSLNode('key', None, None, 0),
+                   lambda: SLNode('key', None, None, 0)),
+        'HashEntry': (lambda: _DictHashEntry('key', None, 0),
+                      lambda: HashEntry('key', None, 0)),
+        'LinkedList': (_DictLinkedList, LinkedList),
+        'DynamicArray': (_DictDynamicArray, DynamicArray),
+    }
+    sizes = {}
+    for name, (baseline, slotted) in makers.items():
+        before, after = instance_size(baseline), instance_size(slotted)
+        sizes[name] = {'dict': before, 'slots': after,
+                       'saving': before - after}
+    return sizes
+
+
+def measure(factory, size: int, function=hash) -> dict:
+    """
+    Returns bytes allocated by a map from factory(capacity, function) while
+    putting size distinct keys, in total and per entry
+    """
+    if size < 1:
+        raise ValueError("size must be at least 1")
+
+    # keys and values exist before tracing starts, so they aren't counted
+    keys = ['key' + str(i) for i in range(size)]
+    values = [object() for _ in range(size)]
+
+    tracemalloc.start()
+    try:
+        hash_map = factory(11, function)
+        for key, value in zip(keys, values):
+            hash_map.put(key, value)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'entries': size,
+        'capacity': hash_map.get_capacity(),
+        'bytes': current,
+        'bytes_per_entry': current / size,
+        'peak_bytes_per_entry': peak / size,
+    }
+
+
+def report(maps: list = None, size: int = 100000) -> dict:
+    """
+    Measures every map name in maps (all of benchmark.MAPS by default).
+    Returns {'types': type_sizes(), 'maps': {name: measures}}
+    """
+    if maps is None:
+        maps = list(MAPS)
+    return {
+        'types': type_sizes(),
+        'maps': {name: measure(MAPS[name], size) for name in maps},
+    }
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='report memory used per entry by each HashMap')
+    parser.add_argument('--maps', nargs='+', default=list(MAPS),
+                        choices=list(MAPS))
+    parser.add_argument('--size', type=int, default=100000,
+                        help='number of entries to put (default: 100000)')
+    parser.add_argument('--json', action='store_true',
+                        help='print JSON instead of a table')
+    args = parser.parse_args(argv)
+
+    result = report(args.maps, args.size)
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f'{"type":14}{"__dict__":>12}{"__slots__":>12}{"saving":>12}')
+    for name, sizes in result['types'].items():
+        print(f'{name:14}{sizes["dict"]:>12.0f}{sizes["slots"]:>12.0f}'
+              f'{sizes["saving"]:>12.0f}')
+    print()
+    print(f'{"map":14}{"capacity":>12}{"bytes/entry":>14}{"peak/entry":>14}')
+    for name, measures in result['maps'].items():
+        print(f'{name:14}{measures["capacity"]:>12}'
+              f'{measures["bytes_per_entry"]:>14.1f}'
+              f'{measures["peak_bytes_per_entry"]:>14.1f}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Tests of the benchmark harness on a tiny run: the report layout, seeded
+workloads and the regression count of compare.
+"""
+
+import copy
+import random
+
+import benchmark
+
+
+def small_report() -> dict:
+    return benchmark.run(['sc', 'oa'], ['hash_function_2'],
+                         ['uniform', 'collision'], [50], seed=1, repeat=2,
+                         collect_garbage=True)
+
+
+def test_report_layout():
+    report = small_report()
+    assert report['meta']['seed'] == 1
+    assert len(report['results']) == 2 * 2 * 2
+    result = report['results'][0]
+    assert set(result['operations']) == {'put', 'get', 'contains_key',
+                                         'iterate', 'resize', 'remove',
+                                         'final_capacity'}
+    assert result['operations']['put']['ops'] == 50
+
+
+def test_workloads_are_seeded():
+    for workload in benchmark.WORKLOADS.values():
+        assert workload(random.Random(1), 100) == \
+            workload(random.Random(1), 100)
+
+
+def test_compare_counts_regressions():
+    report = small_report()
+    assert benchmark.compare(report, report, 0.1) == 0
+
+    slower = copy.deepcopy(report)
+    for result in slower['results']:
+        if result['map'] == 'oa':
+            result['operations']['get']['ops_per_s'] /= 2
+    # one regression per (map, hash function, workload, size, operation)
+    assert benchmark.compare(report, slower, 0.1) == 2
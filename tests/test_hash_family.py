@@ -0,0 +1,44 @@
+"""
+Tests of hash_family: the published test vectors, and bulk forms that give
+the scalar forms' exact integers.
+"""
+
+import pytest
+
+import hash_family
+from hash_family import fnv1a_64, make_siphash, siphash24, xxh64
+from hash_functions import hash_many
+
+
+# the SipHash paper's key 00 01 ... 0f
+SECRET = bytes(range(16))
+K0 = int.from_bytes(SECRET[:8], 'little')
+K1 = int.from_bytes(SECRET[8:], 'little')
+
+KEYS = ['', 'a', 'abcdefgh', 'a longer key than one block', 'ünïcödé',
+        'x' * 100] + ['k' + str(i) for i in range(300)]
+
+
+def test_reference_vectors():
+    assert fnv1a_64('') == 0xcbf29ce484222325
+    assert fnv1a_64('a') == 0xaf63dc4c8601ec8c
+    assert xxh64('') == 0xef46db3751d8e999
+    assert xxh64('a') == 0xd24ec4f1a98c6e5b
+    assert siphash24(bytes(range(15)), K0, K1) == 0xa129ca6149be45e5
+    assert make_siphash(SECRET)(bytes(range(15))) == 0xa129ca6149be45e5
+
+
+def test_make_siphash_secret():
+    assert make_siphash()('key') != make_siphash()('key')
+    with pytest.raises(ValueError):
+        make_siphash(b'short')
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'python'])
+@pytest.mark.parametrize('function', [fnv1a_64, xxh64, make_siphash(SECRET)])
+def test_bulk_matches_scalar(backend, function, monkeypatch):
+    if backend == 'python':
+        monkeypatch.setattr(hash_family, 'np', None)
+    elif hash_family.np is None:
+        pytest.skip('numpy is not installed')
+    assert hash_many(function, KEYS) == [function(key) for key in KEYS]
@@ -0,0 +1,90 @@
+"""
+Tests of bulk hashing: hash_many gives the scalar hash functions' exact
+integers, and the maps' batch operations hash through _hash_keys.
+"""
+
+import pytest
+
+import hash_functions
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1, hash_function_2
+from hash_family import xxh64
+from hash_functions import hash_many
+
+
+KEYS = ['', 'a', 'key1', 'a longer key', 'ünïcödé', '\U0001f600x',
+        'str' * 50] + ['k' + str(i) for i in range(500)]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        if hash_functions.np is None:
+            pytest.skip('numpy is not installed')
+        # small chunks so batches split, long keys included
+        monkeypatch.setattr(hash_functions, '_CHUNK_CHARS', 64)
+    else:
+        monkeypatch.setattr(hash_functions, 'np', None)
+    return request.param
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2, xxh64])
+def test_bulk_matches_scalar(backend, function):
+    assert hash_many(function, KEYS) == [function(key) for key in KEYS]
+    assert hash_many(function, iter(KEYS)) == [function(key) for key in KEYS]
+    assert hash_many(function, []) == []
+
+
+class Key(str):
+    pass
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_bulk_falls_back_for_other_keys(backend, function):
+    keys = ['a', Key('bc'), 'def']
+    assert hash_many(function, keys) == [function(key) for key in keys]
+    with pytest.raises(TypeError):
+        hash_many(function, ['a', 5])
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+@pytest.mark.parametrize('options', [{}, {'power_of_two': True},
+                                     {'keyed_hash': True}])
+def test_hash_keys_matches_key_hash(cls, options):
+    hash_map = cls(11, hash_function_2, **options)
+    assert hash_map._hash_keys(KEYS) == [hash_map._key_hash(key)
+                                          for key in KEYS]
+
+
+@pytest.mark.parametrize('cls, options', [
+    (hash_map_sc.HashMap, {}),
+    (hash_map_sc.HashMap, {'power_of_two': True}),
+    (hash_map_oa.HashMap, {}),
+    (hash_map_oa.HashMap, {'power_of_two': True}),
+    (hash_map_oa.HashMap, {'probing': 'robin_hood'}),
+])
+def test_batch_operations_hash_through_hash_keys(cls, options):
+    hash_map = cls(11, hash_function_2, **options)
+    batches = []
+    hash_keys = hash_map._hash_keys
+
+    def counting(keys):
+        batches.append(len(keys))
+        return hash_keys(keys)
+
+    def scalar(key):
+        raise AssertionError('a batch operation hashed one key at a time')
+
+    hash_map._hash_keys = counting
+    hash_map._key_hash = scalar
+
+    hash_map.put_many((key, i) for i, key in enumerate(KEYS))
+    values = hash_map.get_many(KEYS)
+    assert [values.get_at_index(i) for i in range(values.length())] == \
+        list(range(len(KEYS)))
+    hash_map.remove_many(KEYS[:100])
+    assert hash_map.get_size() == len(KEYS) - 100
+
+    # one call per batch, not per key
+    assert batches == [len(KEYS), len(KEYS), 100]
@@ -0,0 +1,368 @@
+"""
+Tests of the SC and OA HashMap classes: every option combination against a
+dict, plus resizing, removal, iteration and views.
+"""
+
+import random
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1, hash_function_2
+
+
+SC_OPTIONS = [
+    {},
+    {'incremental_resize': True},
+    {'power_of_two': True},
+    {'shrink_threshold': 0.1},
+    {'treeify_threshold': 2},
+    {'flood_threshold': 4},
+    {'keyed_hash': True},
+    {'stats': True},
+    {'incremental_resize': True, 'power_of_two': True,
+     'shrink_threshold': 0.2, 'treeify_threshold': 3},
+]
+
+OA_OPTIONS = [
+    {},
+    {'probing': 'robin_hood'},
+    {'incremental_resize': True},
+    {'power_of_two': True},
+    {'power_of_two': True, 'probing': 'robin_hood'},
+    {'shrink_threshold': 0.1},
+    {'tombstone_threshold': None},
+    {'flood_threshold': 4},
+    {'keyed_hash': True},
+    {'stats': True},
+    {'incremental_resize': True, 'power_of_two': True,
+     'shrink_threshold': 0.2},
+]
+
+MAPS = ([(hash_map_sc.HashMap, options) for options in SC_OPTIONS]
+        + [(hash_map_oa.HashMap, options) for options in OA_OPTIONS])
+MAP_IDS = [f'{cls.__module__}-{options}' for cls, options in MAPS]
+
+
+def pairs(hash_map) -> list:
+    """Returns the map's (key, value) pairs, sorted."""
+    array = hash_map.get_keys_and_values()
+    return sorted(array.get_at_index(i) for i in range(array.length()))
+
+
+def assert_matches(hash_map, expected: dict) -> None:
+    assert hash_map.get_size() == len(expected)
+    assert pairs(hash_map) == sorted(expected.items())
+
+
+def constant(key: str) -> int:
+    """Sends every key to the same bucket."""
+    return 0
+
+
+@pytest.mark.parametrize('cls, options', MAPS, ids=MAP_IDS)
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_matches_dict(cls, options, function):
+    rng = random.Random(261)
+    hash_map = cls(7, function, **options)
+    expected = {}
+
+    for step in range(4000):
+        key = 'k' + str(rng.randrange(300))
+        roll = rng.random()
+        if roll < 0.4:
+            hash_map.put(key, step)
+            expected[key] = step
+        elif roll < 0.45:
+            batch = [('k' + str(rng.randrange(300)), step + i)
+                     for i in range(rng.randrange(20))]
+            hash_map.put_many(batch)
+            expected.update(batch)
+        elif roll < 0.5:
+            keys = ['k' + str(rng.randrange(350)) for _ in range(20)]
+            values = hash_map.get_many(keys)
+            assert ([values.get_at_index(i) for i in range(values.length())]
+                    == [expected.get(k) for k in keys])
+        elif roll < 0.53:
+            keys = ['k' + str(rng.randrange(350)) for _ in range(20)]
+            hash_map.remove_many(keys)
+            for k in keys:
+                expected.pop(k, None)
+        elif roll < 0.75:
+            hash_map.remove(key)
+            expected.pop(key, None)
+        else:
+            assert hash_map.get(key) == expected.get(key)
+            assert hash_map.contains_key(key) == (key in expected)
+
+        if step % 1000 == 999:
+            hash_map.resize_table(rng.randrange(1, 1000))
+            assert_matches(hash_map, expected)
+
+    assert_matches(hash_map, expected)
+
+
+@pytest.mark.parametrize('cls, options', MAPS, ids=MAP_IDS)
+def test_put_replaces_value(cls, options):
+    hash_map = cls(11, hash_function_1, **options)
+    hash_map.put('key', 1)
+    hash_map.put('key', 2)
+    assert hash_map.get_size() == 1
+    assert hash_map.get('key') == 2
+
+
+@pytest.mark.parametrize('cls, options', MAPS, ids=MAP_IDS)
+def test_growth_keeps_load_bounded(cls, options):
+    hash_map = cls(11, hash_function_2, **options)
+    for i in range(1000):
+        hash_map.put('key' + str(i), i)
+    limit = 1.0 if cls is hash_map_sc.HashMap else 0.5
+    assert hash_map.table_load() <= limit
+    assert all(hash_map.get('key' + str(i)) == i for i in range(1000))
+
+
+@pytest.mark.parametrize('cls, options', MAPS, ids=MAP_IDS)
+def test_resize_table_keeps_entries(cls, options):
+    hash_map = cls(11, hash_function_2, **options)
+    expected = {'key' + str(i): i for i in range(100)}
+    hash_map.put_many(expected.items())
+
+    hash_map.resize_table(500)
+    assert hash_map.get_capacity() >= 500
+    assert_matches(hash_map, expected)
+
+    # a capacity below 1 is ignored
+    capacity = hash_map.get_capacity()
+    hash_map.resize_table(0)
+    assert hash_map.get_capacity() == capacity
+    assert_matches(hash_map, expected)
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_resize_reuses_cached_hashes(cls):
+    calls = []
+
+    def counting(key: str) -> int:
+        calls.append(key)
+        return hash_function_2(key)
+
+    hash_map = cls(11, counting)
+    for i in range(100):
+        hash_map.put('key' + str(i), i)
+    # growing along the way hashed nothing again
+    assert len(calls) == 100
+
+    calls.clear()
+    hash_map.resize_table(500)
+    assert calls == []
+    assert hash_map.get('key7') == 7
+
+
+def test_resize_table_rounds_capacity():
+    assert hash_map_sc.HashMap(11, hash_function_1).get_capacity() == 11
+    hash_map = hash_map_oa.HashMap(11, hash_function_1)
+    hash_map.resize_table(30)
+    assert hash_map.get_capacity() == 31
+
+    hash_map = hash_map_oa.HashMap(11, hash_function_1, power_of_two=True)
+    assert hash_map.get_capacity() == 16
+    hash_map.resize_table(100)
+    assert hash_map.get_capacity() == 128
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+@pytest.mark.parametrize('incremental', [False, True])
+def test_power_of_two_mask_follows_capacity(tmp_path, cls, incremental):
+    hash_map = cls(11, hash_function_2, power_of_two=True,
+                   incremental_resize=incremental, shrink_threshold=0.2)
+    for i in range(500):
+        hash_map.put('key' + str(i), i)
+        assert hash_map._mask == hash_map.get_capacity() - 1
+    for i in range(450):
+        hash_map.remove('key' + str(i))
+        assert hash_map._mask == hash_map.get_capacity() - 1
+    hash_map.resize_table(1000)
+    assert hash_map._mask == hash_map.get_capacity() - 1 == 1023
+
+    path = str(tmp_path / 'map.snap')
+    hash_map.save(path)
+    loaded = cls.load(path)
+    assert loaded._mask == loaded.get_capacity() - 1
+    assert all(loaded.get('key' + str(i)) == i for i in range(450, 500))
+
+
+def test_oa_resize_below_size_is_ignored():
+    hash_map = hash_map_oa.HashMap(11, hash_function_1)
+    for i in range(20):
+        hash_map.put('key' + str(i), i)
+    capacity = hash_map.get_capacity()
+    hash_map.resize_table(10)
+    assert hash_map.get_capacity() == capacity
+    assert hash_map.get_size() == 20
+
+
+@pytest.mark.parametrize('cls, options', MAPS, ids=MAP_IDS)
+def test_remove(cls, options):
+    hash_map = cls(11, hash_function_1, **options)
+    for i in range(50):
+        hash_map.put('key' + str(i), i)
+
+    hash_map.remove('missing')
+    assert hash_map.get_size() == 50
+
+    for i in range(0, 50, 2):
+        hash_map.remove('key' + str(i))
+    assert hash_map.get_size() == 25
+    assert hash_map.get('key0') is None
+    assert not hash_map.contains_key('key0')
+    assert hash_map.get('key1') == 1
+
+    # a removed key can come back
+    hash_map.put('key0', 'again')
+    assert hash_map.get('key0') == 'again'
+    assert hash_map.get_size() == 26
+
+
+def test_oa_remove_leaves_tombstones_until_compacted():
+    hash_map = hash_map_oa.HashMap(101, hash_function_1,
+                                   tombstone_threshold=None)
+    for i in range(20):
+        hash_map.put('key' + str(i), i)
+    for i in range(10):
+        hash_map.remove('key' + str(i))
+    assert hash_map.get_tombstone_count() == 10
+
+    hash_map.compact()
+    assert hash_map.get_tombstone_count() == 0
+    assert hash_map.get_size() == 10
+    assert hash_map.get('key15') == 15
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_shrink_threshold_never_goes_below_starting_capacity(cls):
+    hash_map = cls(11, hash_function_2, shrink_threshold=0.1)
+    for i in range(500):
+        hash_map.put('key' + str(i), i)
+    grown = hash_map.get_capacity()
+    for i in range(500):
+        hash_map.remove('key' + str(i))
+
+    # halving stops once another halving would pass the starting capacity
+    assert 11 <= hash_map.get_capacity() < 22 < grown
+
+
+@pytest.mark.parametrize('cls, options', MAPS, ids=MAP_IDS)
+def test_clear(cls, options):
+    hash_map = cls(11, hash_function_1, **options)
+    for i in range(100):
+        hash_map.put('key' + str(i), i)
+    capacity = hash_map.get_capacity()
+    hash_map.clear()
+    assert hash_map.get_size() == 0
+    assert hash_map.get_capacity() == capacity
+    assert hash_map.get('key1') is None
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_stats_count_operations(cls):
+    hash_map = cls(11, hash_function_2, stats=True)
+    for i in range(100):
+        hash_map.put('key' + str(i), i)
+    for i in range(50):
+        hash_map.get('key' + str(i))
+    hash_map.contains_key('missing')
+
+    stats = hash_map.get_stats()
+    assert stats['size'] == 100
+    assert {name: counters['count'] for name, counters
+            in stats['operations'].items()} == \
+        {'put': 100, 'get': 50, 'contains_key': 1}
+    assert stats['resizes'] > 0
+    assert sum(stats['probe_histogram']) == 151
+
+    hash_map.reset_stats()
+    assert hash_map.get_stats()['operations'] == {}
+
+    # without stats only the table is described
+    assert 'operations' not in cls(11, hash_function_2).get_stats()
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_flood_switches_to_keyed_hash(cls):
+    hash_map = cls(11, constant, flood_threshold=4)
+    assert not hash_map.get_stats()['keyed_hash']
+    for i in range(100):
+        hash_map.put('key' + str(i), i)
+
+    assert hash_map.get_stats()['keyed_hash']
+    assert hash_map.get_size() == 100
+    assert all(hash_map.get('key' + str(i)) == i for i in range(100))
+
+
+def test_treeify_colliding_chain():
+    hash_map = hash_map_sc.HashMap(11, constant, treeify_threshold=4)
+    for i in range(50):
+        hash_map.put('key' + str(i), i)
+    assert hash_map.get_stats()['tree_buckets'] == 1
+    assert all(hash_map.get('key' + str(i)) == i for i in range(50))
+
+    for i in range(40):
+        hash_map.remove('key' + str(i))
+    assert hash_map.get_size() == 10
+    assert hash_map.get('key5') is None
+    assert hash_map.get('key45') == 45
+
+
+@pytest.mark.parametrize('cls, options', MAPS, ids=MAP_IDS)
+def test_iteration_and_views(cls, options):
+    hash_map = cls(11, hash_function_1, **options)
+    expected = {'key' + str(i): i for i in range(40)}
+    hash_map.put_many(expected.items())
+
+    assert sorted((entry.key, entry.value) for entry in hash_map) == \
+        sorted(expected.items())
+    assert len(hash_map.keys()) == 40
+    assert set(hash_map.keys()) == set(expected)
+    assert sorted(hash_map.values()) == sorted(expected.values())
+    assert ('key3', 3) in hash_map.items()
+    assert ('key3', 4) not in hash_map.items()
+    assert 5 not in hash_map.items()
+    assert ('key3', 3, 3) not in hash_map.items()
+    assert ['key3', 3] not in hash_map.items()
+    assert 'key3' in hash_map.keys()
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_iteration_fails_fast(cls):
+    hash_map = cls(11, hash_function_1)
+    for i in range(10):
+        hash_map.put('key' + str(i), i)
+
+    with pytest.raises(RuntimeError):
+        for entry in hash_map:
+            hash_map.put('new' + entry.key, 0)
+
+    # updating a value in place is not a change to the key set
+    for entry in hash_map:
+        hash_map.put(entry.key, 'updated')
+    assert hash_map.get('key1') == 'updated'
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        hash_map_oa.HashMap(11, hash_function_1, probing='cuckoo')
+    with pytest.raises(ValueError):
+        hash_map_oa.HashMap(11, hash_function_1, shrink_threshold=0.3)
+    with pytest.raises(ValueError):
+        hash_map_sc.HashMap(11, hash_function_1, shrink_threshold=0.6)
+
+
+def test_find_mode():
+    from a6_include import DynamicArray
+
+    mode, frequency = hash_map_sc.find_mode(
+        DynamicArray(['apple', 'apple', 'grape', 'melon', 'grape', 'peach']))
+    assert sorted(mode.get_at_index(i) for i in range(mode.length())) == \
+        ['apple', 'grape']
+    assert frequency == 2
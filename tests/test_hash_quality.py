@@ -0,0 +1,57 @@
+"""
+Tests of hash_quality.score and analyze: measures come from maps that keep
+the scored capacity, and misses are measured rather than estimated.
+"""
+
+import pytest
+
+from a6_include import hash_function_2
+from hash_family import xxh64
+from hash_quality import CANDIDATES, analyze, score
+
+
+def constant(key: str) -> int:
+    return 7
+
+
+KEYS = ['key' + str(i) for i in range(200)]
+
+
+def test_one_bucket_for_every_key():
+    result = score(constant, KEYS, 400)
+    assert result['capacity'] == 401
+    assert result['bucket_collision_rate'] == (200 - 1) / 200
+    assert result['sc_max_chain_length'] == 200
+    # a missing key walks the whole chain, a present one half of it
+    assert result['sc_miss_chain_length'] == 200
+    assert result['sc_hit_chain_length'] == 201 / 2
+    assert result['oa_max_probe_length'] == 200
+    # an OA miss probes every occupied slot, then the free one after them
+    assert result['oa_miss_probe_length'] == 201
+
+
+@pytest.mark.parametrize('power_of_two', [False, True])
+def test_uniform_hash(power_of_two):
+    result = score(xxh64, KEYS, 400, power_of_two)
+    assert result['hash_collision_rate'] == 0
+    assert result['sc_miss_chain_length'] < 1
+    assert 1 <= result['oa_miss_probe_length'] < 4
+    assert abs(result['chi_square_z']) < 4
+
+
+def test_capacity_must_hold_keys_without_growing():
+    with pytest.raises(ValueError):
+        score(xxh64, KEYS, 300)
+
+
+def test_analyze():
+    with pytest.raises(ValueError):
+        analyze([])
+    results = analyze(KEYS + KEYS, {'hash_function_2': hash_function_2})
+    assert set(results) == {'hash_function_2'}
+    assert results['hash_function_2']['keys'] == 200
+
+
+def test_candidates_are_reproducible():
+    # str hashes from the builtin hash change with PYTHONHASHSEED
+    assert hash not in CANDIDATES.values()
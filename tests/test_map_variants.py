@@ -0,0 +1,179 @@
+"""
+Tests of the alternative map implementations (flat, pooled, compact,
+concurrent and sharded) against a dict.
+"""
+
+import random
+import threading
+
+import pytest
+
+from a6_include import hash_function_1, hash_function_2, is_prime, next_prime
+from hash_map_compact import CompactHashMap
+from hash_map_concurrent import ConcurrentHashMap
+from hash_map_flat import FlatHashMap
+from hash_map_pooled import PooledHashMap
+from hash_map_sharded import ShardedHashMap
+
+
+def pairs(hash_map) -> list:
+    array = hash_map.get_keys_and_values()
+    return sorted(array.get_at_index(i) for i in range(array.length()))
+
+
+def run_against_dict(hash_map, steps: int = 3000, batches: bool = True):
+    """Applies random operations to hash_map and a dict; they must agree."""
+    rng = random.Random(261)
+    expected = {}
+    for step in range(steps):
+        key = 'k' + str(rng.randrange(300))
+        roll = rng.random()
+        if roll < 0.45:
+            hash_map.put(key, step)
+            expected[key] = step
+        elif roll < 0.7:
+            hash_map.remove(key)
+            expected.pop(key, None)
+        elif batches and roll < 0.75:
+            batch = [('k' + str(rng.randrange(300)), step + i)
+                     for i in range(rng.randrange(20))]
+            hash_map.put_many(batch)
+            expected.update(batch)
+        elif batches and roll < 0.8:
+            keys = ['k' + str(rng.randrange(350)) for _ in range(20)]
+            values = hash_map.get_many(keys)
+            assert ([values.get_at_index(i) for i in range(values.length())]
+                    == [expected.get(k) for k in keys])
+        elif batches and roll < 0.82:
+            keys = ['k' + str(rng.randrange(350)) for _ in range(20)]
+            hash_map.remove_many(keys)
+            for k in keys:
+                expected.pop(k, None)
+        else:
+            assert hash_map.get(key) == expected.get(key)
+            assert hash_map.contains_key(key) == (key in expected)
+
+        if step % 1000 == 999:
+            hash_map.resize_table(rng.randrange(1, 1000))
+
+    assert hash_map.get_size() == len(expected)
+    assert pairs(hash_map) == sorted(expected.items())
+
+
+def test_prime_capacities():
+    primes = [n for n in range(2, 600) if all(n % f for f in range(2, n))]
+    assert [n for n in range(600) if is_prime(n)] == primes
+    for capacity in range(500):
+        assert next_prime(capacity) == min(p for p in primes
+                                           if p >= capacity and p > 2)
+
+    for cls in (FlatHashMap, PooledHashMap, CompactHashMap):
+        hash_map = cls(30, hash_function_1)
+        assert hash_map.get_capacity() == 31
+        hash_map.resize_table(90)
+        assert hash_map.get_capacity() == 97
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_flat_map(function):
+    run_against_dict(FlatHashMap(7, function), batches=False)
+
+
+def test_flat_resize_never_enlarges_the_request():
+    hash_map = FlatHashMap(11, hash_function_1)
+    for i in range(20):
+        hash_map.put('key' + str(i), i)
+    capacity = hash_map.get_capacity()
+
+    # below the size, or too small to keep the load at .5, is ignored
+    for too_small in (10, 25, 37):
+        hash_map.resize_table(too_small)
+        assert hash_map.get_capacity() == capacity
+    hash_map.resize_table(40)
+    assert hash_map.get_capacity() == 41
+    assert all(hash_map.get('key' + str(i)) == i for i in range(20))
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_pooled_map(function):
+    run_against_dict(PooledHashMap(7, function))
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_compact_map(function):
+    run_against_dict(CompactHashMap(7, function))
+
+
+def test_compact_map_keeps_insertion_order():
+    hash_map = CompactHashMap(7, hash_function_1)
+    for key in ('c', 'a', 'b', 'd'):
+        hash_map.put(key, key)
+    hash_map.remove('a')
+    hash_map.put('a', 'again')
+    hash_map.put('c', 'updated')
+
+    array = hash_map.get_keys_and_values()
+    assert [array.get_at_index(i) for i in range(array.length())] == \
+        [('c', 'updated'), ('b', 'b'), ('d', 'd'), ('a', 'again')]
+
+
+@pytest.mark.parametrize('options', [{}, {'probing': 'robin_hood'},
+                                     {'power_of_two': True}])
+def test_concurrent_map(options):
+    run_against_dict(ConcurrentHashMap(7, hash_function_2, segments=4,
+                                       **options))
+
+
+def test_concurrent_map_under_threads():
+    hash_map = ConcurrentHashMap(11, hash_function_2, segments=4)
+    errors = []
+
+    def writer(start: int) -> None:
+        for i in range(start, start + 2000):
+            hash_map.put('key' + str(i), i)
+            if i % 3 == 0:
+                hash_map.remove('key' + str(i))
+
+    def reader() -> None:
+        for i in range(4000):
+            value = hash_map.get('key' + str(i))
+            if value not in (None, i):
+                errors.append((i, value))
+
+    threads = ([threading.Thread(target=writer, args=(i * 2000,))
+                for i in range(2)]
+               + [threading.Thread(target=reader) for _ in range(2)])
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert hash_map.get_size() == sum(1 for i in range(4000) if i % 3)
+
+
+def test_concurrent_map_rejects_unsafe_options():
+    with pytest.raises(ValueError):
+        ConcurrentHashMap(segments=3)
+    with pytest.raises(ValueError):
+        ConcurrentHashMap(incremental_resize=True)
+    with pytest.raises(ValueError):
+        ConcurrentHashMap(stats=True)
+
+
+@pytest.mark.parametrize('kind', ['oa', 'sc'])
+def test_sharded_map(kind):
+    with ShardedHashMap(7, hash_function_2, shards=3, kind=kind,
+                        batch_size=5) as hash_map:
+        run_against_dict(hash_map, steps=1500)
+
+
+def test_sharded_map_survives_worker_error():
+    with ShardedHashMap(11, hash_function_1, shards=2) as hash_map:
+        hash_map.put_many([('a', 1), ('b', 2)])
+        with pytest.raises(TypeError):
+            hash_map.put_many([('x', 1), (5, 2)])
+
+        # every pipe is still in step after the error
+        assert hash_map.get('a') == 1
+        assert hash_map.get_many(['b', 'a']).get_at_index(0) == 2
@@ -0,0 +1,31 @@
+"""
+Tests of the memory report: the shared types are slotted, and maps are
+measured per entry.
+"""
+
+import memory_report
+from a6_include import DynamicArray, HashEntry, LinkedList, SLNode
+
+
+def test_shared_types_have_no_instance_dict():
+    for instance in (SLNode('key', None), HashEntry('key', None),
+                     LinkedList(), DynamicArray()):
+        assert not hasattr(instance, '__dict__')
+
+
+def test_report():
+    report = memory_report.report(['sc', 'oa'], 200)
+    assert set(report['types']) == {'SLNode', 'HashEntry', 'LinkedList',
+                                    'DynamicArray'}
+    for name in ('sc', 'oa'):
+        measures = report['maps'][name]
+        assert measures['entries'] == 200
+        assert 0 < measures['bytes_per_entry'] <= \
+            measures['peak_bytes_per_entry']
+
+
+def test_slots_are_measured_against_a_dict_baseline():
+    for sizes in memory_report.type_sizes().values():
+        assert sizes['saving'] == sizes['dict'] - sizes['slots']
+        # one instance __dict__ at least
+        assert sizes['saving'] > 0
@@ -0,0 +1,96 @@
+"""
+Tests of HashMap.scan: cursors cover every key, once when the table is not
+resized, and restart cleanly when it is.
+"""
+
+import random
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1, hash_function_2
+
+
+CONFIGS = [
+    (hash_map_sc.HashMap, {}),
+    (hash_map_sc.HashMap, {'treeify_threshold': 2}),
+    (hash_map_sc.HashMap, {'incremental_resize': True, 'power_of_two': True}),
+    (hash_map_oa.HashMap, {}),
+    (hash_map_oa.HashMap, {'probing': 'robin_hood'}),
+    (hash_map_oa.HashMap, {'power_of_two': True, 'probing': 'robin_hood'}),
+    (hash_map_oa.HashMap, {'incremental_resize': True}),
+]
+CONFIG_IDS = [f'{cls.__module__}-{options}' for cls, options in CONFIGS]
+
+
+def scan_all(hash_map, count: int, between=None) -> list:
+    """Runs a whole scan and returns the keys it returned, in order."""
+    keys, cursor = [], 0
+    while True:
+        cursor, items = hash_map.scan(cursor, count)
+        keys += [items.get_at_index(i)[0] for i in range(items.length())]
+        if between is not None:
+            between()
+        if cursor == 0:
+            return keys
+
+
+@pytest.mark.parametrize('cls, options', CONFIGS, ids=CONFIG_IDS)
+@pytest.mark.parametrize('count', [1, 3, 50])
+def test_scan_returns_every_key_once(cls, options, count):
+    hash_map = cls(11, hash_function_2, **options)
+    expected = {'key' + str(i) for i in range(300)}
+    for key in expected:
+        hash_map.put(key, 0)
+
+    keys = scan_all(hash_map, count)
+    assert sorted(keys) == sorted(expected)
+
+
+@pytest.mark.parametrize('cls, options', CONFIGS, ids=CONFIG_IDS)
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2])
+def test_scan_misses_nothing_under_writes(cls, options, function):
+    rng = random.Random(5)
+    for trial in range(10):
+        hash_map = cls(11, function, **options)
+        stable = {'key' + str(i) for i in range(rng.randrange(1, 400))}
+        for key in stable:
+            hash_map.put(key, 0)
+
+        # pre-grown tables don't resize during the scan
+        grown = trial % 2 == 0
+        if grown:
+            hash_map.resize_table(hash_map.get_capacity() * 4)
+
+        def write():
+            for _ in range(rng.randrange(3)):
+                key = 'new' + str(rng.randrange(200))
+                if rng.random() < 0.5:
+                    hash_map.put(key, 0)
+                else:
+                    hash_map.remove(key)
+
+        keys = scan_all(hash_map, rng.randrange(1, 9), write)
+        assert stable <= set(keys)
+        if grown:
+            assert all(keys.count(key) == 1 for key in stable)
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_scan_of_empty_map(cls):
+    assert scan_all(cls(11, hash_function_1), 10) == []
+    cursor, items = cls(11, hash_function_1).scan(0, 11)
+    assert cursor == 0
+    assert items.length() == 0
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_scan_rejects_bad_arguments(cls):
+    hash_map = cls(11, hash_function_1)
+    with pytest.raises(ValueError):
+        hash_map.scan(-1)
+    with pytest.raises(ValueError):
+        hash_map.scan(0, 0)
+    with pytest.raises(ValueError):
+        hash_map.scan(10 ** 6)
@@ -0,0 +1,196 @@
+"""
+Tests of HashMap.save / HashMap.load and of the memory-mapped table:
+round trips keep every entry and the table layout, and damaged or
+mismatched files are refused.
+"""
+
+import random
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1, hash_function_2
+from hash_family import make_siphash, xxh64
+from hash_map_mmap import MappedHashMap, save_mapped
+from hash_map_snapshot import SnapshotError
+
+
+CONFIGS = [
+    (hash_map_sc.HashMap, {}),
+    (hash_map_sc.HashMap, {'treeify_threshold': 2}),
+    (hash_map_sc.HashMap, {'incremental_resize': True, 'power_of_two': True}),
+    (hash_map_sc.HashMap, {'keyed_hash': True}),
+    (hash_map_sc.HashMap, {'flood_threshold': 2}),
+    (hash_map_oa.HashMap, {}),
+    (hash_map_oa.HashMap, {'probing': 'robin_hood'}),
+    (hash_map_oa.HashMap, {'power_of_two': True}),
+    (hash_map_oa.HashMap, {'incremental_resize': True, 'keyed_hash': True}),
+    (hash_map_oa.HashMap, {'flood_threshold': 2, 'tombstone_threshold': None}),
+]
+CONFIG_IDS = [f'{cls.__module__}-{options}' for cls, options in CONFIGS]
+
+
+def pairs(hash_map) -> list:
+    array = hash_map.get_keys_and_values()
+    return sorted(array.get_at_index(i) for i in range(array.length()))
+
+
+def filled(cls, options: dict, function=hash_function_2):
+    """Returns a map and the dict it should match after puts and removes."""
+    rng = random.Random(1)
+    hash_map = cls(7, function, **options)
+    expected = {}
+    for i in range(2000):
+        key = 'k' + str(rng.randrange(1000))
+        if rng.random() < 0.7:
+            hash_map.put(key, [i])
+            expected[key] = [i]
+        else:
+            hash_map.remove(key)
+            expected.pop(key, None)
+    return hash_map, expected
+
+
+@pytest.mark.parametrize('cls, options', CONFIGS, ids=CONFIG_IDS)
+@pytest.mark.parametrize('function', [hash_function_1, xxh64])
+def test_round_trip(tmp_path, cls, options, function):
+    hash_map, expected = filled(cls, options, function)
+    path = tmp_path / 'map.snap'
+    hash_map.save(str(path))
+    loaded = cls.load(str(path))
+
+    assert loaded.get_capacity() == hash_map.get_capacity()
+    assert pairs(loaded) == sorted(expected.items())
+    for i in range(1100):
+        assert loaded.get('k' + str(i)) == expected.get('k' + str(i))
+
+    # the loaded map keeps working, growing included
+    for i in range(1000):
+        loaded.put('new' + str(i), i)
+        expected['new' + str(i)] = i
+    assert pairs(loaded) == sorted(expected.items())
+
+
+def test_sc_round_trip_keeps_chain_layout(tmp_path):
+    hash_map, _ = filled(hash_map_sc.HashMap, {})
+    path = str(tmp_path / 'map.snap')
+    hash_map.save(path)
+    assert str(hash_map_sc.HashMap.load(path)) == str(hash_map)
+
+
+def test_corrupt_snapshot_is_refused(tmp_path):
+    hash_map, _ = filled(hash_map_sc.HashMap, {})
+    path = tmp_path / 'map.snap'
+    hash_map.save(str(path))
+
+    data = bytearray(path.read_bytes())
+    data[-5] ^= 1
+    path.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError, match='checksum'):
+        hash_map_sc.HashMap.load(str(path))
+
+    hash_map.save(str(path))
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(SnapshotError, match='truncated'):
+        hash_map_sc.HashMap.load(str(path))
+
+    path.write_bytes(b'not a snapshot at all, just some bytes')
+    with pytest.raises(SnapshotError):
+        hash_map_sc.HashMap.load(str(path))
+
+
+def test_snapshot_of_other_kind_is_refused(tmp_path):
+    hash_map, _ = filled(hash_map_sc.HashMap, {})
+    path = str(tmp_path / 'map.snap')
+    hash_map.save(path)
+    with pytest.raises(SnapshotError, match='sc map'):
+        hash_map_oa.HashMap.load(path)
+
+
+def test_unnamed_hash_function_cannot_be_saved(tmp_path):
+    hash_map = hash_map_sc.HashMap(11, lambda key: 1)
+    with pytest.raises(ValueError):
+        hash_map.save(str(tmp_path / 'map.snap'))
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_keyed_function_needs_passing_back(tmp_path, cls):
+    function = make_siphash(bytes(range(16)))
+    hash_map, expected = filled(cls, {}, function)
+    path = tmp_path / 'map.snap'
+    hash_map.save(str(path))
+
+    # the key stays out of the file
+    data = path.read_bytes()
+    assert str(function.keywords['k0']).encode() not in data
+    assert str(function.keywords['k1']).encode() not in data
+
+    with pytest.raises(SnapshotError, match='keyed'):
+        cls.load(str(path))
+    with pytest.raises(SnapshotError, match='reproduce'):
+        cls.load(str(path), function=make_siphash(bytes(16)))
+    with pytest.raises(SnapshotError, match='saved with'):
+        cls.load(str(path), function=xxh64)
+    assert pairs(cls.load(str(path), function=function)) == \
+        sorted(expected.items())
+
+
+@pytest.mark.parametrize('cls', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_keyed_hash_map_loads_with_new_key(tmp_path, cls):
+    hash_map, expected = filled(cls, {'keyed_hash': True})
+    key = hash_map._hash_function.keywords['k0']
+    path = tmp_path / 'map.snap'
+    hash_map.save(str(path))
+    assert str(key).encode() not in path.read_bytes()
+
+    loaded = cls.load(str(path))
+    assert loaded._hash_function.keywords['k0'] != key
+    assert loaded.get_stats()['keyed_hash']
+    assert pairs(loaded) == sorted(expected.items())
+
+
+def test_mapped_table(tmp_path):
+    expected = {'key' + str(i): value for i, value in enumerate(
+        [None, 'text', b'bytes', -7, 2.5, True] * 50)}
+    path = str(tmp_path / 'map.mmap')
+    save_mapped(path, expected.items(), hash_function_2)
+
+    with MappedHashMap(path) as mapped:
+        assert mapped.get_size() == len(expected)
+        for key, value in expected.items():
+            assert mapped.get(key) == value
+            assert type(mapped.get(key)) is type(value)
+        assert not mapped.contains_key('missing')
+        assert mapped.get('missing') is None
+        assert sorted(mapped.keys()) == sorted(expected)
+
+
+def test_corrupt_mapped_table_is_refused(tmp_path):
+    path = tmp_path / 'map.mmap'
+    save_mapped(str(path), [('key' + str(i), i) for i in range(100)])
+    good = path.read_bytes()
+
+    # a flipped heap byte, and a flipped byte of the size in the header
+    for offset in (len(good) - 1, 24):
+        data = bytearray(good)
+        data[offset] ^= 1
+        path.write_bytes(bytes(data))
+        with pytest.raises(SnapshotError, match='checksum'):
+            MappedHashMap(str(path))
+
+        # opening without verify doesn't read the file, verify() does
+        with MappedHashMap(str(path), verify=False) as mapped:
+            with pytest.raises(SnapshotError, match='checksum'):
+                mapped.verify()
+
+
+def test_mapped_table_with_keyed_function(tmp_path):
+    function = make_siphash(bytes(range(16)))
+    path = str(tmp_path / 'map.mmap')
+    save_mapped(path, [('a', 1), ('b', 2)], function)
+
+    with pytest.raises(SnapshotError, match='keyed'):
+        MappedHashMap(path)
+    with MappedHashMap(path, function) as mapped:
+        assert mapped.get('b') == 2
@@ -0,0 +1,226 @@
+"""
+Tests of DurableHashMap: reopening replays the log over the snapshot, a
+torn log tail is cut off, and checkpoints empty the log.
+"""
+
+import os
+import pickle
+import random
+import shutil
+import time
+import zlib
+
+import pytest
+
+import hash_map_wal
+from a6_include import hash_function_1, hash_function_2
+from hash_family import make_siphash
+from hash_map_snapshot import SnapshotError
+from hash_map_wal import LOG_NAME, SNAPSHOT_NAME, DurableHashMap
+
+
+def contents(durable) -> dict:
+    return dict(durable.items())
+
+
+def test_reopen_replays_log(tmp_path):
+    with DurableHashMap(str(tmp_path), 11, hash_function_2) as durable:
+        for i in range(200):
+            durable.put('key' + str(i), i)
+        for i in range(0, 200, 3):
+            durable.remove('key' + str(i))
+        durable.put_many([('a', 1), ('b', 2)])
+        durable.remove_many(['b', 'missing'])
+        expected = contents(durable)
+
+    with DurableHashMap(str(tmp_path)) as durable:
+        assert contents(durable) == expected
+        assert durable.get('a') == 1
+        assert not durable.contains_key('b')
+
+
+def test_reopen_keeps_hash_function_and_options(tmp_path):
+    with DurableHashMap(str(tmp_path), 11, hash_function_2,
+                        power_of_two=True) as durable:
+        durable.put('key', 1)
+
+    with DurableHashMap(str(tmp_path)) as durable:
+        assert durable._map._hash_function is hash_function_2
+        assert durable._map._power_of_two
+        assert durable.get('key') == 1
+
+
+def test_reopen_with_keyed_function(tmp_path):
+    function = make_siphash(bytes(range(16)))
+    with DurableHashMap(str(tmp_path), 11, function) as durable:
+        durable.put('key', 1)
+
+    # the snapshot doesn't hold the key
+    with pytest.raises(SnapshotError, match='keyed'):
+        DurableHashMap(str(tmp_path))
+    with DurableHashMap(str(tmp_path), function=function) as durable:
+        assert durable.get('key') == 1
+
+
+def test_clear_is_logged(tmp_path):
+    with DurableHashMap(str(tmp_path), 11, hash_function_2) as durable:
+        durable.put('a', 1)
+        durable.clear()
+        durable.put('b', 2)
+
+    with DurableHashMap(str(tmp_path)) as durable:
+        assert contents(durable) == {'b': 2}
+
+
+def test_torn_tail_is_cut_off(tmp_path):
+    rng = random.Random(3)
+    states = [{}]
+    with DurableHashMap(str(tmp_path), 11, hash_function_2) as durable:
+        for i in range(300):
+            key = 'key' + str(rng.randrange(50))
+            if rng.random() < 0.7:
+                durable.put(key, i)
+            else:
+                durable.remove(key)
+            states.append(contents(durable))
+
+    log = tmp_path / LOG_NAME
+    size = os.path.getsize(log)
+    for cut in (size - 1, size // 2, 5):
+        with open(log, 'r+b') as file:
+            file.truncate(cut)
+
+        # recovery lands on some earlier state, and appends after it work
+        with DurableHashMap(str(tmp_path)) as durable:
+            assert contents(durable) in states
+            durable.put('after', cut)
+        with DurableHashMap(str(tmp_path)) as durable:
+            assert durable.get('after') == cut
+            states.append(contents(durable))
+
+
+def test_corrupt_record_ends_replay(tmp_path):
+    with DurableHashMap(str(tmp_path), 11, hash_function_2) as durable:
+        durable.put('first', 1)
+        durable.sync()
+        size = os.path.getsize(tmp_path / LOG_NAME)
+        durable.put('second', 2)
+
+    data = bytearray((tmp_path / LOG_NAME).read_bytes())
+    data[-1] ^= 0xFF
+    (tmp_path / LOG_NAME).write_bytes(bytes(data))
+
+    with DurableHashMap(str(tmp_path)) as durable:
+        assert contents(durable) == {'first': 1}
+        assert os.path.getsize(tmp_path / LOG_NAME) == size
+
+
+def test_checkpoint_empties_log(tmp_path):
+    with DurableHashMap(str(tmp_path), 11, hash_function_2,
+                        checkpoint_bytes=4096) as durable:
+        for i in range(500):
+            durable.put('key' + str(i), i)
+        assert os.path.getsize(tmp_path / LOG_NAME) < 4096
+        expected = contents(durable)
+
+    with DurableHashMap(str(tmp_path)) as durable:
+        assert contents(durable) == expected
+
+
+def test_replay_over_newer_snapshot_is_harmless(tmp_path):
+    """A crash between the snapshot rename and the log truncate."""
+    with DurableHashMap(str(tmp_path), 11, hash_function_2) as durable:
+        for i in range(100):
+            durable.put('key' + str(i), i)
+        durable.remove('key5')
+        durable.sync()
+        log = (tmp_path / LOG_NAME).read_bytes()
+        durable.checkpoint()
+        expected = contents(durable)
+    (tmp_path / LOG_NAME).write_bytes(log)
+
+    with DurableHashMap(str(tmp_path)) as durable:
+        assert contents(durable) == expected
+
+
+def test_rejected_operations_are_not_logged(tmp_path):
+    with DurableHashMap(str(tmp_path), 11, hash_function_1) as durable:
+        durable.put('a', 1)
+        with pytest.raises(TypeError):
+            durable.put(5, 'x')
+        with pytest.raises(TypeError):
+            durable.put_many([('b', 2), (6, 'y')])
+        with pytest.raises(TypeError):
+            durable.remove_many(['a', 7])
+        with pytest.raises(Exception):
+            durable.put('c', lambda: None)
+        assert contents(durable) == {'a': 1}
+
+    with DurableHashMap(str(tmp_path)) as durable:
+        assert contents(durable) == {'a': 1}
+
+
+def test_unreplayable_record_ends_replay_with_warning(tmp_path):
+    with DurableHashMap(str(tmp_path), 11, hash_function_1) as durable:
+        durable.put('a', 1)
+
+    # a record written before rejected operations stayed out of the log
+    log = tmp_path / LOG_NAME
+    good_size = os.path.getsize(log)
+    encoded = pickle.dumps((5, 'x'))
+    checksum = zlib.crc32(encoded, zlib.crc32(bytes((hash_map_wal._PUT,))))
+    with open(log, 'ab') as file:
+        file.write(hash_map_wal._RECORD.pack(checksum, len(encoded),
+                                             hash_map_wal._PUT) + encoded)
+
+    with pytest.warns(RuntimeWarning, match='offset'):
+        durable = DurableHashMap(str(tmp_path))
+    with durable:
+        assert contents(durable) == {'a': 1}
+        assert os.path.getsize(log) == good_size
+        durable.put('b', 2)
+
+    with DurableHashMap(str(tmp_path)) as durable:
+        assert contents(durable) == {'a': 1, 'b': 2}
+
+
+def test_idle_records_reach_the_log(tmp_path):
+    store = tmp_path / 'store'
+    with DurableHashMap(str(store), 11, hash_function_2,
+                        commit_interval=0.01) as durable:
+        durable.put('a', 1)
+        durable.put('b', 2)
+
+        # the flusher thread fsyncs them without another operation
+        deadline = time.monotonic() + 5
+        while durable._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert durable._pending == 0
+
+        # a crash now loses nothing: a copy of the files holds both
+        shutil.copytree(store, tmp_path / 'copy')
+
+    with DurableHashMap(str(tmp_path / 'copy')) as copy:
+        assert contents(copy) == {'a': 1, 'b': 2}
+
+
+def test_zero_interval_syncs_every_operation(tmp_path):
+    with DurableHashMap(str(tmp_path), 11, hash_function_2,
+                        commit_interval=0) as durable:
+        durable.put('a', 1)
+        assert durable._pending == 0
+        assert os.path.getsize(tmp_path / LOG_NAME) > 0
+
+
+def test_new_store_checkpoints_at_once(tmp_path):
+    DurableHashMap(str(tmp_path), 11, hash_function_2).close()
+    assert os.path.exists(tmp_path / SNAPSHOT_NAME)
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        DurableHashMap(str(tmp_path), commit_records=0)
+    with pytest.raises(ValueError):
+        DurableHashMap(str(tmp_path), commit_interval=-1)
+    with pytest.raises(ValueError):
+        DurableHashMap(str(tmp_path), function=lambda key: 0)
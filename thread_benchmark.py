@@ -0,0 +1,201 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Multi-threaded throughput benchmark for shared maps. Runs the
+#              same mixed get / put / remove workload from 1, 2, 4, ...
+#              threads against one map shared by all of them and reports
+#              total operations per second and the speedup over one thread.
+#              'global_lock' is an OA map behind a single lock, the way a
+#              thread pool shares a map without ConcurrentHashMap;
+#              'concurrent' is the lock-striped ConcurrentHashMap.
+#
+#              Under the GIL only one thread runs Python code at a time, so
+#              there the benchmark shows lock overhead and contention rather
+#              than parallel speedup; a free-threaded build shows both. The
+#              report says which kind of interpreter ran it.
+#
+# Usage:       python thread_benchmark.py --threads 1 2 4 8
+#              python thread_benchmark.py --read-ratio 0.5 --json
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from threading import Barrier, Lock, Thread
+
+import hash_map_oa
+from benchmark import HASH_FUNCTIONS
+from hash_map_concurrent import ConcurrentHashMap
+
+
+class GlobalLockHashMap:
+    """
+    hash_map_oa.HashMap with one lock around every operation
+    """
+
+    def __init__(self, capacity: int, function) -> None:
+        self._map = hash_map_oa.HashMap(capacity, function)
+        self._lock = Lock()
+
+    def put(self, key: str, value: object) -> None:
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        with self._lock:
+            return self._map.get(key)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._map.remove(key)
+
+
+# map name -> factory taking (capacity, hash function)
+MAPS = {
+    'global_lock': GlobalLockHashMap,
+    'concurrent': ConcurrentHashMap,
+}
+
+
+def make_operations(rng: random.Random, keys: list, count: int,
+                    read_ratio: float) -> list:
+    """
+    Returns count (operation, key) pairs over keys: gets with probability
+    read_ratio, the rest split evenly between puts and removes
+    """
+    operations = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < read_ratio:
+            operation = 'get'
+        elif roll < (1 + read_ratio) / 2:
+            operation = 'put'
+        else:
+            operation = 'remove'
+        operations.append((operation, rng.choice(keys)))
+    return operations
+
+
+def run_threads(hash_map, workloads: list) -> float:
+    """
+    Runs each workload in workloads on its own thread against hash_map,
+    all starting together. Returns the wall time in seconds
+    """
+    barrier = Barrier(len(workloads) + 1)
+
+    def worker(operations: list) -> None:
+        get, put, remove = hash_map.get, hash_map.put, hash_map.remove
+        barrier.wait()
+        for operation, key in operations:
+            if operation == 'get':
+                get(key)
+            elif operation == 'put':
+                put(key, key)
+            else:
+                remove(key)
+
+    threads = [Thread(target=worker, args=(operations,))
+               for operations in workloads]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def run(maps: list, thread_counts: list, size: int = 10000,
+        operations: int = 50000, read_ratio: float = 0.9,
+        function: str = 'xxh64', seed: int = 261) -> dict:
+    """
+    Measures every map in maps at every thread count. Each thread runs
+    operations operations over size keys, the map holding half of them
+    to begin with. Returns a JSON-able report
+    """
+    if not 0 <= read_ratio <= 1:
+        raise ValueError("read_ratio must be between 0 and 1")
+    if size < 1 or operations < 1:
+        raise ValueError("size and operations must be at least 1")
+
+    rng = random.Random(seed)
+    keys = ['key' + str(i) for i in range(size)]
+    workloads = [make_operations(rng, keys, operations, read_ratio)
+                 for _ in range(max(thread_counts))]
+
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)
+    report = {
+        'python': platform.python_version(),
+        'gil': is_gil_enabled(),
+        'hash_function': function,
+        'size': size,
+        'operations_per_thread': operations,
+        'read_ratio': read_ratio,
+        'results': {},
+    }
+
+    for name in maps:
+        results = {}
+        for threads in thread_counts:
+            hash_map = MAPS[name](size, HASH_FUNCTIONS[function])
+            for key in keys[::2]:
+                hash_map.put(key, key)
+            seconds = run_threads(hash_map, workloads[:threads])
+            results[threads] = {
+                'seconds': seconds,
+                'ops_per_second': threads * operations / seconds,
+            }
+
+        single = results[min(thread_counts)]['ops_per_second']
+        for measures in results.values():
+            measures['speedup'] = measures['ops_per_second'] / single
+        report['results'][name] = results
+
+    return report
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='measure shared map throughput across threads')
+    parser.add_argument('--maps', nargs='+', default=list(MAPS),
+                        choices=list(MAPS))
+    parser.add_argument('--threads', nargs='+', type=int,
+                        default=[1, 2, 4, 8])
+    parser.add_argument('--size', type=int, default=10000)
+    parser.add_argument('--operations', type=int, default=50000,
+                        help='operations per thread (default: 50000)')
+    parser.add_argument('--read-ratio', type=float, default=0.9)
+    parser.add_argument('--hash-function', default='xxh64',
+                        choices=list(HASH_FUNCTIONS))
+    parser.add_argument('--seed', type=int, default=261)
+    parser.add_argument('--json', action='store_true',
+                        help='print JSON instead of a table')
+    args = parser.parse_args(argv)
+
+    if min(args.threads) < 1:
+        parser.error("thread counts must be at least 1")
+
+    report = run(args.maps, sorted(set(args.threads)), args.size,
+                 args.operations, args.read_ratio, args.hash_function,
+                 args.seed)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f'python {report["python"]}, GIL '
+          f'{"enabled" if report["gil"] else "disabled"}, '
+          f'read ratio {report["read_ratio"]}')
+    print(f'{"map":14}{"threads":>8}{"ops/s":>14}{"speedup":>10}')
+    for name, results in report['results'].items():
+        for threads, measures in results.items():
+            print(f'{name:14}{threads:>8}{measures["ops_per_second"]:>14.0f}'
+                  f'{measures["speedup"]:>10.2f}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
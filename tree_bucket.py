@@ -0,0 +1,142 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Sorted bucket for the SC hash map. Once a chain grows past
+#              the map's treeify threshold it is converted to a TreeBucket,
+#              which keeps its nodes ordered by (hash, key) and finds keys
+#              by binary search, so even a bucket every key collides into
+#              costs O(log n) per lookup.
+
+from bisect import bisect_left, bisect_right
+
+from a6_include import LinkedList, SLNode
+
+
+class TreeBucket(LinkedList):
+    """
+    LinkedList whose nodes are kept sorted by (hash, key) in parallel
+    arrays searched with bisect. The nodes also stay linked in that order,
+    so code that walks the chain from _head works unchanged
+    """
+
+    __slots__ = ('_ordered', '_nodes', '_hashes', '_keys')
+
+    def __init__(self, bucket: LinkedList = None) -> None:
+        """
+        Initialize a sorted bucket holding the nodes of bucket, if given
+        """
+        super().__init__()
+
+        # keys sharing a hash are kept sorted too, unless two of them turn
+        # out not to be comparable; those runs are then scanned
+        self._ordered = True
+
+        nodes = [] if bucket is None else list(bucket)
+        try:
+            nodes.sort(key=lambda node: (node.hash, node.key))
+        except TypeError:
+            nodes.sort(key=lambda node: node.hash)
+            self._ordered = False
+
+        self._nodes = nodes
+        self._hashes = [node.hash for node in nodes]
+        self._keys = [node.key for node in nodes]
+        self._size = len(nodes)
+
+        # relink the reused nodes in sorted order
+        for node, next_node in zip(nodes, nodes[1:]):
+            node.next = next_node
+        if nodes:
+            nodes[-1].next = None
+            self._head = nodes[0]
+
+    def to_linked_list(self) -> LinkedList:
+        """
+        Returns a plain LinkedList holding the same nodes
+        """
+        bucket = LinkedList()
+        bucket._head = self._head
+        bucket._size = self._size
+        return bucket
+
+    def _find(self, key: object, hash: int) -> int:
+        """
+        Returns position of the node for key, or -1 if it isn't here
+        """
+        low = bisect_left(self._hashes, hash)
+        high = bisect_right(self._hashes, hash, low)
+        keys = self._keys
+
+        if high - low > 1 and self._ordered:
+            try:
+                index = bisect_left(keys, key, low, high)
+            except TypeError:
+                pass
+            else:
+                return index if index < high and keys[index] == key else -1
+
+        for index in range(low, high):
+            if keys[index] == key:
+                return index
+        return -1
+
+    def insert(self, key: object, value: object, hash: int = None) -> None:
+        """
+        Insert new node in sorted position.
+        """
+        if hash is None:
+            hash = 0
+
+        low = bisect_left(self._hashes, hash)
+        index = bisect_right(self._hashes, hash, low)
+        if index - low > 0 and self._ordered:
+            try:
+                index = bisect_left(self._keys, key, low, index)
+            except TypeError:
+                self._ordered = False
+
+        following = self._nodes[index] if index < self._size else None
+        node = SLNode(key, value, following, hash)
+        if index == 0:
+            self._head = node
+        else:
+            self._nodes[index - 1].next = node
+
+        self._nodes.insert(index, node)
+        self._hashes.insert(index, hash)
+        self._keys.insert(index, key)
+        self._size += 1
+
+    def remove(self, key: object, hash: int = None) -> bool:
+        """
+        Remove node with matching key.
+        Return True if removal was successful, False otherwise.
+        """
+        index = self._find(key, 0 if hash is None else hash)
+        if index == -1:
+            return False
+
+        following = self._nodes[index].next
+        if index == 0:
+            self._head = following
+        else:
+            self._nodes[index - 1].next = following
+
+        del self._nodes[index]
+        del self._hashes[index]
+        del self._keys[index]
+        self._size -= 1
+        return True
+
+    def contains(self, key: object, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        """
+        index = self._find(key, 0 if hash is None else hash)
+        return None if index == -1 else self._nodes[index]
+
+    def search_cost(self) -> int:
+        """
+        Returns the number of comparisons a binary search of this bucket
+        makes, for probe statistics
+        """
+        return self._size.bit_length()